@@ -0,0 +1,58 @@
+"""
+Line-count accuracy and throughput of detect-every-N against every-frame detection.
+
+Usage:
+    python -m benchmarks.cadence_accuracy --video recordings/camera_1/clip.avi --camera "Camera 1"
+
+The ROIs of the given camera are loaded from roi_data/. Every-frame detection
+(interval 1) is the reference; for the other cadences the per-line in/out
+counts are compared to it and the absolute error is reported.
+"""
+import argparse
+import time
+import cv2
+from count.counting import ObjectCounter
+from count.roi_manager import load_roi
+
+
+def count_clip(video, rois, model, interval, device=None):
+    counter = ObjectCounter(model, [0], rois, device=device, motion_threshold=None, detect_interval=interval)
+    capture = cv2.VideoCapture(video)
+    counter.set_source_fps(capture.get(cv2.CAP_PROP_FPS) or 25)
+    frames = 0
+    start = time.perf_counter()
+    while True:
+        ret, frame = capture.read()
+        if not ret:
+            break
+        counter.analyze(cv2.resize(frame, (640, 480)))
+        frames += 1
+    elapsed = time.perf_counter() - start
+    capture.release()
+    return counter.get_line_counts(), frames / elapsed if elapsed > 0 else 0.0, counter.cadence_stats()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--video", required=True)
+    parser.add_argument("--camera", required=True, help='ROI name, e.g. "Camera 1"')
+    parser.add_argument("--model", default="yolo11n.pt")
+    parser.add_argument("--intervals", default="2,3,4,auto")
+    parser.add_argument("--device", default=None)
+    args = parser.parse_args()
+
+    rois = load_roi(args.camera)
+    reference, reference_fps, _ = count_clip(args.video, rois, args.model, 1, args.device)
+    print(f"{'interval':>8} {'fps':>7} {'detector':>9} {'abs error':>10}  counts")
+    print(f"{1:>8} {reference_fps:7.1f} {'100%':>9} {0:>10}  {reference}")
+    for value in args.intervals.split(","):
+        interval = value if value == "auto" else int(value)
+        counts, fps, cadence = count_clip(args.video, rois, args.model, interval, args.device)
+        error = sum(abs(counts[line][d] - reference[line][d]) for line in reference for d in ("in", "out"))
+        runs = cadence["detector_runs"] + cadence["flow_runs"]
+        share = cadence["detector_runs"] / runs if runs else 1.0
+        print(f"{value:>8} {fps:7.1f} {share:9.0%} {error:>10}  {counts}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+FPS and mAP of each detector backend (PyTorch, ONNX Runtime, OpenVINO, FP32/INT8).
+
+Usage:
+    python -m benchmarks.detector_backends --model yolo11n.pt --data coco8.yaml --video path/to/clip.mp4
+
+mAP is measured with ultralytics validation on --data (a labelled dataset
+yaml); FPS is single-frame CPU prediction on frames of --video, or on a
+synthetic 640x480 frame. INT8 variants are calibrated on --calibration
+(see core.detector.build_calibration_set) and skipped if it does not exist.
+"""
+import argparse
+import time
+import cv2
+import numpy as np
+from core.detector import available_backends, load_detector
+
+VARIANTS = [("pytorch", False), ("onnx", False), ("onnx", True), ("openvino", False), ("openvino", True)]
+
+
+def load_frames(video, count):
+    if video is None:
+        rng = np.random.default_rng(0)
+        return [rng.integers(0, 255, (480, 640, 3), dtype=np.uint8)] * count
+    capture = cv2.VideoCapture(video)
+    frames = []
+    while len(frames) < count:
+        ret, frame = capture.read()
+        if not ret:
+            break
+        frames.append(cv2.resize(frame, (640, 480)))
+    capture.release()
+    return frames
+
+
+def measure_fps(model, device, frames, imgsz, warmup=5):
+    for frame in frames[:warmup]:
+        model(frame, imgsz=imgsz, device=device, verbose=False)
+    start = time.perf_counter()
+    for frame in frames[warmup:]:
+        model(frame, imgsz=imgsz, device=device, verbose=False)
+    elapsed = time.perf_counter() - start
+    return (len(frames) - warmup) / elapsed if elapsed > 0 else 0.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", default="yolo11n.pt")
+    parser.add_argument("--data", default="coco8.yaml")
+    parser.add_argument("--video", default=None)
+    parser.add_argument("--frames", type=int, default=100)
+    parser.add_argument("--imgsz", type=int, default=640)
+    parser.add_argument("--calibration", default="calibration/data.yaml")
+    args = parser.parse_args()
+
+    frames = load_frames(args.video, args.frames)
+    installed = available_backends()
+    baseline = None
+    print(f"{'backend':<16} {'fps':>7} {'mAP50-95':>9} {'mAP50':>7} {'dmAP':>7}")
+    for backend, int8 in VARIANTS:
+        name = backend + ("-int8" if int8 else "")
+        if backend not in installed:
+            print(f"{name:<16} not installed")
+            continue
+        try:
+            model, device = load_detector(args.model, backend=backend, device="cpu", imgsz=args.imgsz,
+                                          int8=int8, calibration=args.calibration if int8 else None)
+        except Exception as e:
+            print(f"{name:<16} skipped: {e}")
+            continue
+        fps = measure_fps(model, device, frames, args.imgsz)
+        metrics = model.val(data=args.data, imgsz=args.imgsz, device=device, batch=1, verbose=False, plots=False)
+        map50_95, map50 = metrics.box.map, metrics.box.map50
+        if baseline is None:
+            baseline = map50_95
+        print(f"{name:<16} {fps:7.1f} {map50_95:9.3f} {map50:7.3f} {map50_95 - baseline:+7.3f}")
+
+
+if __name__ == "__main__":
+    main()
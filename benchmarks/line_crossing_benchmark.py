@@ -0,0 +1,61 @@
+"""
+Per-pair vs vectorized line-side test.
+
+Usage:
+    python -m benchmarks.line_crossing_benchmark --tracks 100,300,1000 --lines 1,10,50
+
+Random boxes over a 640x480 frame crossed by random lines. Both paths must
+report the same side of every line for every box; the time per frame (all
+tracks against all lines) is printed for each combination.
+"""
+import argparse
+import time
+import numpy as np
+from count.line_crossing import LineCrossingEngine, box_side
+
+
+def make_case(tracks, lines, seed=0):
+    rng = np.random.default_rng(seed)
+    segments = [(tuple(rng.uniform((0, 0), (640, 480))), tuple(rng.uniform((0, 0), (640, 480)))) for _ in range(lines)]
+    corners = rng.uniform((0, 0), (640, 480), size=(tracks, 2))
+    boxes = np.hstack([corners, corners + rng.uniform((10, 20), (60, 120), size=(tracks, 2))])
+    return segments, boxes
+
+
+def per_pair(segments, boxes):
+    result = np.zeros((len(boxes), len(segments)), dtype=np.int8)
+    for i, box in enumerate(boxes.tolist()):
+        for j, (start, end) in enumerate(segments):
+            result[i, j] = box_side(box, start, end)
+    return result
+
+
+def timed(fn, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = fn()
+    return (time.perf_counter() - start) / repeat * 1e6, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tracks", default="100,300,1000")
+    parser.add_argument("--lines", default="1,10,50")
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    print(f"{'tracks':>7} {'lines':>6} {'per-pair us':>12} {'vectorized us':>14} {'speedup':>8} {'sided':>10}")
+    for tracks in (int(t) for t in args.tracks.split(",")):
+        for lines in (int(n) for n in args.lines.split(",")):
+            segments, boxes = make_case(tracks, lines)
+            engine = LineCrossingEngine(segments)
+            loop_us, expected = timed(lambda: per_pair(segments, boxes), max(1, args.repeat // 4))
+            vector_us, got = timed(lambda: engine.sides(boxes), args.repeat)
+            if not np.array_equal(expected, got):
+                raise AssertionError(f"Mismatch for {tracks} tracks x {lines} lines")
+            print(f"{tracks:>7} {lines:>6} {loop_us:>12.0f} {vector_us:>14.0f} {loop_us / vector_us:>7.1f}x "
+                  f"{int(np.count_nonzero(got)):>10}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+Re-count speed over detection sidecars.
+
+Usage:
+    python -m benchmarks.recount_benchmark --hours 24 --people 8 --fps 10
+
+Writes synthetic sidecars (random walks of `people` concurrent tracks at the
+analytics frame rate, one file per 10-minute segment) into a temporary
+directory and times count.recount over them with a few lines and zones.
+"""
+import argparse
+import os
+import tempfile
+import time
+import numpy as np
+from count.recount import find_sidecars, recount
+from count.sidecar import HEADER, MAGIC, RECORD
+
+LINES = [{"name": "Door", "start": [320, 160], "end": [320, 360]},
+         {"name": "Corridor", "start": [0, 240], "end": [640, 240]}]
+ZONES = [{"name": f"Shelf {i + 1}", "points": [[60 * i, 300], [60 * i + 50, 300], [60 * i + 50, 470], [60 * i, 470]]}
+         for i in range(10)]
+
+
+def write_segment(path, start, seconds, people, fps, rng, first_id):
+    frames = int(seconds * fps)
+    header = np.zeros(1, dtype=HEADER)
+    header["magic"], header["width"], header["height"], header["start_time"] = MAGIC, 640, 480, start
+    rows = np.empty(frames * people, dtype=RECORD)
+    # Each person walks for ~20 s, then is replaced by a new track id
+    life = int(20 * fps)
+    frame = np.repeat(np.arange(frames), people)
+    slot = np.tile(np.arange(people), frames)
+    rows["time"] = start + frame / fps
+    rows["track_id"] = first_id + (frame // life) * people + slot
+    rows["class_id"] = 0
+    rows["confidence"] = 0.8
+    steps = rng.normal(0, 4, size=(frames, people, 2)).cumsum(axis=0).reshape(-1, 2)
+    centers = np.abs((steps + rng.uniform((0, 0), (640, 480), size=(1, 2))) % (1280, 960) - (640, 480))
+    rows["box"] = np.hstack([centers - (20, 50), centers + (20, 50)])
+    with open(path, "wb") as f:
+        f.write(header.tobytes())
+        f.write(rows.tobytes())
+    return int(rows["track_id"].max()) + 1
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--hours", type=float, default=24.0)
+    parser.add_argument("--people", type=int, default=8)
+    parser.add_argument("--fps", type=float, default=10.0)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    with tempfile.TemporaryDirectory() as directory:
+        start = time.time() - args.hours * 3600
+        next_id = 1
+        for segment in range(int(args.hours * 6)):
+            path = os.path.join(directory, f"segment_{segment:04d}.trk")
+            next_id = write_segment(path, start + segment * 600, 600, args.people, args.fps, rng, next_id)
+        files = find_sidecars([directory])
+        size = sum(os.path.getsize(f) for f in files)
+        began = time.perf_counter()
+        result = recount(files, LINES, ZONES, bucket=3600)
+        elapsed = time.perf_counter() - began
+        print(f"{result['rows']} rows in {len(files)} files ({size / 2 ** 20:.0f} MB) re-counted in {elapsed:.2f}s")
+        print(result["lines"])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""
+Throughput of line counting with full-frame vs ROI-cropped detection.
+
+Usage:
+    python -m benchmarks.roi_crop_benchmark --video path/to/doorway.mp4 --model yolo11n.pt
+
+Without --video a synthetic 640x480 frame is used, which only measures the
+cost of the forward pass (no objects are found).
+"""
+import argparse
+import time
+import cv2
+import numpy as np
+from count.counting import ObjectCounter
+
+# Typical doorway layouts on the 640x480 frames used by the count module
+LAYOUTS = {
+    "door_vertical": [{"name": "Door", "start": [320, 160], "end": [320, 360]}],
+    "door_horizontal": [{"name": "Door", "start": [220, 380], "end": [420, 380]}],
+    "two_doors": [
+        {"name": "Left", "start": [80, 200], "end": [80, 330]},
+        {"name": "Right", "start": [200, 200], "end": [200, 330]},
+    ],
+    "full_width": [{"name": "Corridor", "start": [0, 240], "end": [640, 240]}],
+}
+
+
+def load_frames(video, count):
+    if video is None:
+        rng = np.random.default_rng(0)
+        return [rng.integers(0, 255, (480, 640, 3), dtype=np.uint8)] * count
+    capture = cv2.VideoCapture(video)
+    frames = []
+    while len(frames) < count:
+        ret, frame = capture.read()
+        if not ret:
+            break
+        frames.append(cv2.resize(frame, (640, 480)))
+    capture.release()
+    return frames
+
+
+def run(counter, frames, warmup=5):
+    for frame in frames[:warmup]:
+        counter.analyze(frame)
+    start = time.perf_counter()
+    for frame in frames[warmup:]:
+        counter.analyze(frame)
+    elapsed = time.perf_counter() - start
+    return (len(frames) - warmup) / elapsed if elapsed > 0 else 0.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--video", default=None)
+    parser.add_argument("--model", default="yolo11n.pt")
+    parser.add_argument("--frames", type=int, default=200)
+    parser.add_argument("--device", default=None)
+    args = parser.parse_args()
+
+    frames = load_frames(args.video, args.frames)
+    print(f"{'layout':<16} {'crop':>18} {'full fps':>9} {'crop fps':>9} {'gain':>6}")
+    for name, rois in LAYOUTS.items():
+        full = ObjectCounter(args.model, [0], rois, device=args.device, motion_threshold=None, roi_crop=False)
+        cropped = ObjectCounter(args.model, [0], rois, device=args.device, motion_threshold=None, roi_crop=True)
+        region = cropped.crop_region(frames[0].shape)
+        full_fps = run(full, frames)
+        crop_fps = run(cropped, frames)
+        print(f"{name:<16} {str(region or 'full frame'):>18} {full_fps:9.1f} {crop_fps:9.1f} {crop_fps / full_fps:5.2f}x")
+
+
+if __name__ == "__main__":
+    main()
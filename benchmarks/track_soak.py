@@ -0,0 +1,69 @@
+"""
+Soak test for per-track memory: loop a recorded clip through ObjectCounter.
+
+Usage:
+    python -m benchmarks.track_soak --camera 1 --clip recordings/camera_1/20250101_080000.avi --hours 168
+
+The clip is replayed forever (until --hours elapse) with frame timestamps
+advancing as if it were live, so every loop brings new track ids. Resident
+memory and the counter's track statistics are printed every --report seconds;
+both should level off after the first loops.
+"""
+import argparse
+import os
+import time
+import cv2
+from count.counting import ObjectCounter
+from count.roi_manager import load_roi, load_zones
+
+
+def resident_bytes():
+    """Current resident set size (Linux /proc; psutil elsewhere when installed)."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except OSError:
+        try:
+            import psutil
+        except ImportError:
+            return 0
+        return psutil.Process().memory_info().rss
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--camera", type=int, required=True)
+    parser.add_argument("--clip", required=True)
+    parser.add_argument("--model", default="yolo11n.pt")
+    parser.add_argument("--hours", type=float, default=168.0)
+    parser.add_argument("--report", type=float, default=600.0)
+    parser.add_argument("--ttl", type=float, default=10.0)
+    args = parser.parse_args()
+
+    camera_name = f"Camera {args.camera}"
+    counter = ObjectCounter(args.model, [0], load_roi(camera_name), zone_list=load_zones(camera_name),
+                            detect_interval="auto", track_ttl=args.ttl)
+    capture = cv2.VideoCapture(args.clip)
+    counter.set_source_fps(capture.get(cv2.CAP_PROP_FPS) or 25.0)
+
+    start = time.monotonic()
+    next_report = start
+    frames = loops = 0
+    while time.monotonic() - start < args.hours * 3600:
+        ret, frame = capture.read()
+        if not ret:
+            capture.set(cv2.CAP_PROP_POS_FRAMES, 0)
+            loops += 1
+            continue
+        counter.analyze(cv2.resize(frame, (640, 480)))
+        frames += 1
+        if time.monotonic() >= next_report:
+            hours = (time.monotonic() - start) / 3600
+            print(f"{hours:7.2f}h loops={loops} frames={frames} rss={resident_bytes() / 2 ** 20:.1f}MB "
+                  f"tracks={counter.track_stats()}")
+            next_report += args.report
+    capture.release()
+
+
+if __name__ == "__main__":
+    main()
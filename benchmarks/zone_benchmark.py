@@ -0,0 +1,77 @@
+"""
+Per-frame cost of zone analytics: label-mask lookup vs point-in-polygon per zone.
+
+Usage:
+    python -m benchmarks.zone_benchmark --zones 1,5,20,50 --tracks 50
+
+Zones are random quadrilaterals on a 640x480 frame. Both paths must agree on
+which zone every point is in; the time per frame is printed for each case.
+"""
+import argparse
+import time
+import cv2
+import numpy as np
+from count.zones import ZoneAnalytics, ZoneMap
+
+
+def make_zones(count, rng):
+    zones = []
+    for i in range(count):
+        cx, cy = rng.uniform(40, 600), rng.uniform(40, 440)
+        w, h = rng.uniform(20, 60), rng.uniform(20, 60)
+        zones.append({"name": f"Zone {i + 1}", "points": [[int(cx - w), int(cy - h)], [int(cx + w), int(cy - h)],
+                                                          [int(cx + w), int(cy + h)], [int(cx - w), int(cy + h)]]})
+    return zones
+
+
+def per_polygon(polygons, points):
+    # Later zones win, like the label mask
+    result = np.full(len(points), -1, dtype=np.int32)
+    contours = [np.array(p, dtype=np.int32).reshape(-1, 1, 2) for p in polygons]
+    for i, (x, y) in enumerate(points.tolist()):
+        for idx, contour in enumerate(contours):
+            if cv2.pointPolygonTest(contour, (float(int(x)), float(int(y))), False) >= 0:
+                result[i] = idx
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--zones", default="1,5,20,50")
+    parser.add_argument("--tracks", type=int, default=50)
+    parser.add_argument("--frames", type=int, default=500)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    print(f"{'zones':>6} {'polygon us':>11} {'mask us':>8} {'analytics us':>13}")
+    for count in (int(z) for z in args.zones.split(",")):
+        zones = make_zones(count, rng)
+        analytics = ZoneAnalytics(zones)
+        analytics.set_frame_shape((480, 640))
+        zone_map = ZoneMap(analytics.polygons, (480, 640))
+        ids = np.arange(args.tracks)
+        points = rng.uniform((0, 0), (640, 480), size=(args.tracks, 2))
+
+        if not np.array_equal(per_polygon(analytics.polygons, points), zone_map.lookup(points)):
+            print(f"  {count} zones: mask and polygon tests disagree on an edge pixel")
+
+        start = time.perf_counter()
+        for _ in range(args.frames // 10):
+            per_polygon(analytics.polygons, points)
+        polygon_us = (time.perf_counter() - start) / (args.frames // 10) * 1e6
+
+        start = time.perf_counter()
+        for _ in range(args.frames):
+            zone_map.lookup(points)
+        mask_us = (time.perf_counter() - start) / args.frames * 1e6
+
+        start = time.perf_counter()
+        for frame in range(args.frames):
+            points = np.clip(points + rng.normal(0, 3, size=points.shape), 0, (639, 479))
+            analytics.update(ids, points, frame / 25.0)
+        analytics_us = (time.perf_counter() - start) / args.frames * 1e6
+        print(f"{count:>6} {polygon_us:>11.0f} {mask_us:>8.1f} {analytics_us:>13.1f}")
+
+
+if __name__ == "__main__":
+    main()
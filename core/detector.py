@@ -0,0 +1,245 @@
+import glob
+import importlib.util
+import os
+import random
+import cv2
+import numpy as np
+import torch
+from ultralytics import YOLO
+
+BACKENDS = ("pytorch", "onnx", "openvino")
+
+# Selected once per process; "auto" picks PyTorch on GPU machines and the best installed CPU runtime otherwise
+DEFAULT_BACKEND = os.environ.get("DETECTOR_BACKEND", "auto")
+DEFAULT_INT8 = os.environ.get("DETECTOR_INT8", "0") == "1"
+DEFAULT_CALIBRATION = os.environ.get("DETECTOR_CALIBRATION", "calibration")
+# Fewer frames than this give meaningless activation ranges, so INT8 is not attempted
+MIN_CALIBRATION_FRAMES = 50
+
+
+def available_backends():
+    """Backends whose runtime is installed in this environment."""
+    backends = ["pytorch"]
+    if importlib.util.find_spec("onnxruntime") is not None:
+        backends.append("onnx")
+    if importlib.util.find_spec("openvino") is not None:
+        backends.append("openvino")
+    return backends
+
+
+def select_backend(backend="auto"):
+    """
+    Resolve "auto" to a concrete backend.
+
+    Args:
+        backend (str): "auto", "pytorch", "onnx" or "openvino".
+
+    Returns:
+        str: Backend to use.
+    """
+    if backend != "auto":
+        if backend not in BACKENDS:
+            raise ValueError(f"Unknown detector backend: {backend}")
+        return backend
+    if torch.cuda.is_available():
+        return "pytorch"
+    available = available_backends()
+    for candidate in ("openvino", "onnx"):
+        if candidate in available:
+            return candidate
+    return "pytorch"
+
+
+def _is_fresh(artifact, source):
+    return os.path.exists(artifact) and (not os.path.exists(source) or os.path.getmtime(artifact) >= os.path.getmtime(source))
+
+
+def build_calibration_set(sources, out_dir=DEFAULT_CALIBRATION, count=300, names=None, min_frames=MIN_CALIBRATION_FRAMES):
+    """
+    Collect frames from our own recordings/snapshots as an INT8 calibration set.
+
+    Args:
+        sources (list): Video files, image files or directories containing them.
+        out_dir (str): Directory to write images/ and data.yaml into.
+        count (int): Number of frames to sample.
+        names (dict): Class names of the model, written to data.yaml.
+        min_frames (int): Smallest usable set; nothing is written below it.
+
+    Returns:
+        str: Path to the dataset yaml (ultralytics format, train and val both point at images/).
+
+    Raises:
+        ValueError: If fewer than min_frames frames could be read from the sources.
+    """
+    image_dir = os.path.join(out_dir, "images")
+    files = []
+    for source in sources:
+        if os.path.isdir(source):
+            for pattern in ("*.jpg", "*.png", "*.webp", "*.avi", "*.mp4", "*.mkv"):
+                files.extend(glob.glob(os.path.join(source, "**", pattern), recursive=True))
+        elif os.path.exists(source):
+            files.append(source)
+    videos = [f for f in files if f.lower().endswith((".avi", ".mp4", ".mkv"))]
+    images = [f for f in files if f not in videos]
+
+    frames = []
+    for path in random.sample(images, min(len(images), count)):
+        frame = cv2.imread(path)
+        if frame is not None:
+            frames.append(frame)
+    per_video = (count - len(frames)) // len(videos) + 1 if videos and len(frames) < count else 0
+    for path in videos:
+        capture = cv2.VideoCapture(path)
+        total = int(capture.get(cv2.CAP_PROP_FRAME_COUNT)) or per_video
+        for index in np.linspace(0, max(total - 1, 0), per_video).astype(int):
+            capture.set(cv2.CAP_PROP_POS_FRAMES, int(index))
+            ret, frame = capture.read()
+            if ret:
+                frames.append(frame)
+        capture.release()
+
+    if len(frames) < min_frames:
+        raise ValueError(f"INT8 calibration needs at least {min_frames} frames, found {len(frames)} in {sources}")
+    # data.yaml is written last, so its presence means a complete set
+    os.makedirs(image_dir, exist_ok=True)
+    for path in glob.glob(os.path.join(image_dir, "calib_*.jpg")):
+        os.remove(path)
+    for i, frame in enumerate(frames[:count]):
+        cv2.imwrite(os.path.join(image_dir, f"calib_{i:05d}.jpg"), frame)
+
+    yaml_path = os.path.join(out_dir, "data.yaml")
+    with open(yaml_path, "w", encoding="utf-8") as f:
+        f.write(f"path: {os.path.abspath(out_dir)}\ntrain: images\nval: images\nnames:\n")
+        for class_id, name in sorted((names or {0: "person"}).items()):
+            f.write(f"  {class_id}: {name}\n")
+    return yaml_path
+
+
+class _CalibrationReader:
+    """Feeds calibration images to onnxruntime static quantization, preprocessed like ultralytics."""
+
+    def __init__(self, image_dir, input_name, imgsz):
+        self.paths = sorted(glob.glob(os.path.join(image_dir, "*.jpg")))
+        self.input_name = input_name
+        self.imgsz = imgsz
+        self.index = 0
+
+    def _preprocess(self, path):
+        image = cv2.imread(path)
+        h, w = image.shape[:2]
+        scale = self.imgsz / max(h, w)
+        resized = cv2.resize(image, (int(round(w * scale)), int(round(h * scale))))
+        canvas = np.full((self.imgsz, self.imgsz, 3), 114, dtype=np.uint8)
+        top = (self.imgsz - resized.shape[0]) // 2
+        left = (self.imgsz - resized.shape[1]) // 2
+        canvas[top:top + resized.shape[0], left:left + resized.shape[1]] = resized
+        tensor = canvas[:, :, ::-1].transpose(2, 0, 1).astype(np.float32) / 255.0
+        return tensor[None]
+
+    def get_next(self):
+        if self.index >= len(self.paths):
+            return None
+        path = self.paths[self.index]
+        self.index += 1
+        return {self.input_name: self._preprocess(path)}
+
+    def rewind(self):
+        self.index = 0
+
+
+def quantize_onnx(onnx_path, calibration_yaml, imgsz=640):
+    """
+    Statically quantize an ONNX model to INT8 with onnxruntime.
+
+    Args:
+        onnx_path (str): FP32 model exported by ultralytics.
+        calibration_yaml (str): Dataset yaml from build_calibration_set().
+        imgsz (int): Input size the model was exported with.
+
+    Returns:
+        str: Path to the INT8 model.
+    """
+    import onnxruntime
+    from onnxruntime.quantization import QuantFormat, QuantType, quantize_static
+
+    int8_path = onnx_path.replace(".onnx", "_int8.onnx")
+    if _is_fresh(int8_path, onnx_path):
+        return int8_path
+    session = onnxruntime.InferenceSession(onnx_path, providers=["CPUExecutionProvider"])
+    reader = _CalibrationReader(os.path.join(os.path.dirname(calibration_yaml), "images"),
+                                session.get_inputs()[0].name, imgsz)
+    quantize_static(onnx_path, int8_path, reader, quant_format=QuantFormat.QDQ,
+                    activation_type=QuantType.QUInt8, weight_type=QuantType.QInt8, per_channel=True)
+    return int8_path
+
+
+def export_model(model_path, backend, imgsz=640, int8=False, calibration=None):
+    """
+    Export a .pt model for a CPU runtime, reusing an earlier export when it is up to date.
+
+    Args:
+        model_path (str): PyTorch weights, e.g. "yolo11n.pt".
+        backend (str): "pytorch", "onnx" or "openvino".
+        imgsz (int): Input size to export with.
+        int8 (bool): Quantize to INT8.
+        calibration (str): Dataset yaml for INT8 calibration (see build_calibration_set).
+
+    Returns:
+        str: Path that YOLO() can load for this backend.
+    """
+    if backend == "pytorch" or not model_path.endswith(".pt"):
+        return model_path
+    if int8 and not (calibration and os.path.exists(calibration)):
+        raise ValueError("INT8 export needs a calibration dataset yaml, see build_calibration_set()")
+    stem = os.path.splitext(model_path)[0]
+
+    if backend == "onnx":
+        onnx_path = stem + ".onnx"
+        if not _is_fresh(onnx_path, model_path):
+            onnx_path = YOLO(model_path).export(format="onnx", imgsz=imgsz, dynamic=True, simplify=True)
+        return quantize_onnx(onnx_path, calibration, imgsz) if int8 else onnx_path
+
+    target = f"{stem}_int8_openvino_model" if int8 else f"{stem}_openvino_model"
+    if not _is_fresh(target, model_path):
+        target = YOLO(model_path).export(format="openvino", imgsz=imgsz, dynamic=True, int8=int8, data=calibration)
+    return target
+
+
+def load_detector(model_path, backend=None, device=None, imgsz=640, int8=None, calibration=None):
+    """
+    Load a YOLO model through the selected backend.
+
+    Exported models keep the ultralytics API (same Results objects), so callers
+    do not depend on the backend.
+
+    Args:
+        model_path (str): PyTorch weights or an already exported model.
+        backend (str): "auto", "pytorch", "onnx" or "openvino"; default from DETECTOR_BACKEND.
+        device (str): Torch device for the PyTorch backend; exported models run on CPU.
+        imgsz (int): Inference size.
+        int8 (bool): Use an INT8 quantized export; default from DETECTOR_INT8.
+        calibration (str): Calibration dataset yaml; default DETECTOR_CALIBRATION/data.yaml.
+
+    Returns:
+        tuple: (YOLO model, device string to pass to predict)
+    """
+    backend = select_backend(backend or DEFAULT_BACKEND)
+    int8 = DEFAULT_INT8 if int8 is None else int8
+    if int8 and calibration is None:
+        calibration = os.path.join(DEFAULT_CALIBRATION, "data.yaml")
+        if not os.path.exists(calibration):
+            # Calibrate on frames from our own cameras rather than a generic dataset
+            try:
+                calibration = build_calibration_set(["snapshots", "recordings"], DEFAULT_CALIBRATION)
+            except ValueError as e:
+                print(f"Detector {model_path}: {e}; falling back to FP32")
+                int8, calibration = False, None
+    path = export_model(model_path, backend, imgsz=imgsz, int8=int8, calibration=calibration)
+    model = YOLO(path, task="detect")
+    if backend == "pytorch" and path.endswith(".pt"):
+        device = device if device else ("cuda:0" if torch.cuda.is_available() else "cpu")
+        model.to(device)
+    else:
+        device = "cpu"
+    print(f"Detector {model_path}: backend={backend}, int8={int8}, path={path}, device={device}")
+    return model, device
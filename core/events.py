@@ -0,0 +1,80 @@
+import threading
+import time
+
+_bus = None
+_bus_lock = threading.Lock()
+
+
+class Event:
+    """One analytics event (line crossing, motion, detection) raised for a video source."""
+
+    __slots__ = ("kind", "source", "timestamp", "data")
+
+    def __init__(self, kind, source, data=None, timestamp=None):
+        self.kind = kind
+        self.source = source
+        self.timestamp = time.monotonic() if timestamp is None else timestamp
+        self.data = data or {}
+
+    def __repr__(self):
+        return f"Event({self.kind!r}, {self.source!r}, {self.data!r})"
+
+
+class EventBus:
+    """
+    In-process publish/subscribe for analytics events.
+
+    Producers (counters, motion detectors) publish events keyed by the video
+    source they analysed, so consumers in other modules that open the same
+    source through the FrameHub can react to them. Callbacks run on the
+    publisher's thread and must return quickly.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscribers = []
+
+    def subscribe(self, callback, source=None, kinds=None):
+        """
+        Register a callback.
+
+        Args:
+            callback (callable): Called with each matching Event.
+            source: Only deliver events for this source, or None for every source.
+            kinds (iterable): Only deliver these event kinds, or None for all.
+
+        Returns:
+            tuple: Token to pass to unsubscribe().
+        """
+        token = (callback, source, frozenset(kinds) if kinds else None)
+        with self._lock:
+            self._subscribers.append(token)
+        return token
+
+    def unsubscribe(self, token):
+        with self._lock:
+            if token in self._subscribers:
+                self._subscribers.remove(token)
+
+    def publish(self, event):
+        """Deliver an Event to every matching subscriber."""
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for callback, source, kinds in subscribers:
+            if source is not None and source != event.source:
+                continue
+            if kinds is not None and event.kind not in kinds:
+                continue
+            try:
+                callback(event)
+            except Exception as e:
+                print(f"[EventBus] Subscriber error for {event}: {e}")
+
+
+def get_event_bus():
+    """Get the process-wide EventBus."""
+    global _bus
+    with _bus_lock:
+        if _bus is None:
+            _bus = EventBus()
+        return _bus
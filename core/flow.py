@@ -0,0 +1,161 @@
+import cv2
+import numpy as np
+
+
+class BoxPropagator:
+    """
+    Carries detection boxes forward between detector runs with sparse optical flow.
+
+    A few points inside each box are tracked with pyramidal Lucas-Kanade from
+    the previous frame to the current one and the box is shifted by their
+    median displacement. Boxes whose points are all lost keep their last
+    velocity (constant-velocity fallback). Velocities are indexed by box
+    position, and the tracker does not keep box order between detector runs,
+    so they start from zero after every detection.
+    """
+
+    def __init__(self, grid=3, win_size=(15, 15), max_level=2):
+        """
+        Initialize BoxPropagator.
+
+        Args:
+            grid (int): Points per side sampled in the inner half of each box.
+            win_size (tuple): Lucas-Kanade search window.
+            max_level (int): Pyramid levels.
+        """
+        self.grid = grid
+        self.lk_params = dict(winSize=win_size, maxLevel=max_level,
+                              criteria=(cv2.TERM_CRITERIA_EPS | cv2.TERM_CRITERIA_COUNT, 10, 0.03))
+        self.prev_gray = None
+        self.velocity = None
+        self.max_speed = 0.0
+
+    def reset(self, gray, boxes):
+        """
+        Start from a fresh detection.
+
+        Args:
+            gray (np.ndarray): Grayscale frame the boxes were detected on.
+            boxes (np.ndarray): (N, 4) boxes x1, y1, x2, y2.
+        """
+        self.prev_gray = gray
+        self.velocity = np.zeros((len(boxes), 2), dtype=np.float32)
+
+    def _sample_points(self, boxes):
+        steps = (np.arange(self.grid, dtype=np.float32) + 0.5) / self.grid
+        # Inner half of the box avoids background at the edges
+        fx, fy = np.meshgrid(0.25 + 0.5 * steps, 0.25 + 0.5 * steps)
+        fx, fy = fx.ravel(), fy.ravel()
+        x1, y1, x2, y2 = (boxes[:, i:i + 1] for i in range(4))
+        xs = x1 + (x2 - x1) * fx
+        ys = y1 + (y2 - y1) * fy
+        return np.stack([xs, ys], axis=-1).reshape(-1, 1, 2).astype(np.float32)
+
+    def propagate(self, gray, boxes):
+        """
+        Move boxes from the previous frame to this one.
+
+        Args:
+            gray (np.ndarray): Current grayscale frame.
+            boxes (np.ndarray): (N, 4) boxes on the previous frame.
+
+        Returns:
+            np.ndarray: (N, 4) boxes on the current frame.
+        """
+        if self.prev_gray is None or len(boxes) == 0 or self.prev_gray.shape != gray.shape:
+            self.prev_gray = gray
+            self.max_speed = 0.0
+            return boxes
+        if self.velocity is None or len(self.velocity) != len(boxes):
+            self.velocity = np.zeros((len(boxes), 2), dtype=np.float32)
+
+        points = self._sample_points(boxes)
+        moved, status, _ = cv2.calcOpticalFlowPyrLK(self.prev_gray, gray, points, None, **self.lk_params)
+        per_box = self.grid * self.grid
+        shift = (moved - points).reshape(len(boxes), per_box, 2)
+        good = status.reshape(len(boxes), per_box).astype(bool)
+
+        for i in range(len(boxes)):
+            if good[i].any():
+                self.velocity[i] = np.median(shift[i][good[i]], axis=0)
+
+        self.prev_gray = gray
+        self.max_speed = float(np.abs(self.velocity).max()) if len(self.velocity) else 0.0
+        return boxes + np.hstack([self.velocity, self.velocity])
+
+
+class DetectionCadence:
+    """
+    Chooses how many frames pass between detector runs.
+
+    With CPU headroom the detector runs every frame. When detection is
+    expensive relative to the frame period, the interval grows just enough to
+    fit the budget, up to a limit set by how far objects may move between
+    detections (shorter when they move fast or there are many of them), since
+    flow propagation drifts over long gaps.
+    """
+
+    def __init__(self, min_interval=1, max_interval=6, target_busy=0.7, max_jump=40.0, crowd=10, smoothing=0.1):
+        """
+        Initialize DetectionCadence.
+
+        Args:
+            min_interval (int): Smallest interval (1 means every frame).
+            max_interval (int): Largest interval.
+            target_busy (float): Fraction of the frame period analytics may use on average.
+            max_jump (float): Pixels an object may travel between detections.
+            crowd (int): Track count at which the interval is halved.
+            smoothing (float): EMA weight for the timing estimates.
+        """
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.target_busy = target_busy
+        self.max_jump = max_jump
+        self.crowd = crowd
+        self.smoothing = smoothing
+        self.detect_time = None
+        self.detect_samples = 0
+        self.flow_time = 0.0
+        self.frame_period = None
+        self.interval = min_interval
+
+    def _ema(self, current, value):
+        return value if current is None else current + self.smoothing * (value - current)
+
+    def record_detect(self, seconds):
+        self.detect_samples += 1
+        # The first run includes loading the model in the background; do not let it skew the estimate
+        if self.detect_samples > 1:
+            self.detect_time = self._ema(self.detect_time, seconds)
+
+    def record_flow(self, seconds):
+        self.flow_time = self._ema(self.flow_time, seconds)
+
+    def update(self, track_count, max_speed):
+        """
+        Recompute the interval.
+
+        Args:
+            track_count (int): Objects currently tracked.
+            max_speed (float): Fastest track displacement in pixels per frame.
+
+        Returns:
+            int: Frames between detector runs.
+        """
+        interval = self.min_interval
+        if self.detect_time is not None and self.frame_period:
+            # Smallest N with (detect + (N - 1) * flow) / N within budget
+            budget = self.target_busy * self.frame_period
+            if self.detect_time > budget:
+                denominator = max(budget - self.flow_time, 1e-6)
+                interval = int(np.ceil((self.detect_time - self.flow_time) / denominator))
+        limit = self.max_interval
+        if track_count:
+            # Longest gap over which the fastest object stays within max_jump pixels
+            limit = self.max_jump / max(max_speed, 1e-6)
+            if track_count >= self.crowd:
+                limit /= 2
+        # Accuracy caps the gap the CPU budget asks for; analytics falls behind (and drops frames) beyond it
+        interval = min(interval, int(limit), self.max_interval)
+        self.interval = int(max(interval, self.min_interval))
+        return self.interval
@@ -0,0 +1,353 @@
+import os
+import threading
+import time
+import cv2
+from core.mailbox import LatestFrameMailbox
+from core.pipeline import StageStats
+
+RECONNECT_DELAY = 1.0  # seconds between reopen attempts on a live source
+DEFAULT_FPS = 25.0  # assumed when the source reports no frame rate (many RTSP streams report 0)
+
+
+class Frame:
+    """
+    A decoded frame shared between subscribers.
+
+    The image is marked read-only and handed out by reference, so every
+    subscriber of the same source and size sees the same array; copy it
+    before drawing on it.
+    """
+    __slots__ = ("image", "seq", "timestamp")
+
+    def __init__(self, image, seq, timestamp):
+        self.image = image
+        self.seq = seq
+        self.timestamp = timestamp
+
+
+class Subscription:
+    """
+    One consumer's view of a source: its own output size and maximum rate.
+    """
+
+    def __init__(self, hub, source, size=None, fps=None, loop=True):
+        """
+        Args:
+            hub (FrameHub): Hub that owns the source.
+            source (str or int): Source key.
+            size (tuple): Output (width, height), or None for the decoded size.
+            fps (float): Maximum delivery rate, or None for every decoded frame.
+            loop (bool): Keep receiving frames when a file source wraps around.
+        """
+        self.hub = hub
+        self.source = source
+        self.size = tuple(size) if size else None
+        self.fps = fps
+        self.loop = loop
+        self._cond = threading.Condition()
+        self._latest = None
+        self._mailbox = LatestFrameMailbox()
+        self._next_accept_time = 0.0
+        self._closed = False
+        self._ended = False
+        self._reader = None
+
+    @property
+    def info(self):
+        """Source properties: {"fps": float, "width": int, "height": int}."""
+        return self._reader.info()
+
+    @property
+    def ended(self):
+        """
+        True once no more frames will arrive: the subscription is closed, the source
+        failed or stopped, or (without loop) a file source reached its end.
+        """
+        return self._closed or self._ended or self._reader.ended
+
+    def wait_opened(self, timeout=None):
+        """
+        Wait until the source has been opened.
+
+        Returns:
+            bool: True if the source is open, False if it failed or timed out.
+        """
+        return self._reader.wait_opened(timeout)
+
+    def _offer(self, frame):
+        """Called from the reader thread for every decoded frame."""
+        if self.fps:
+            # Accept on a fixed 1/fps schedule rather than a minimum gap since the last
+            # frame, so 25 fps thinned to 15 delivers 15 and not every other frame.
+            # Half an interval of slack keeps same-rate sources from losing jittery frames.
+            interval = 1.0 / self.fps
+            if frame.timestamp < self._next_accept_time - interval / 2:
+                return
+            self._next_accept_time += interval
+            if self._next_accept_time < frame.timestamp:
+                # Source slower than fps, a stall or the first frame: restart the schedule here
+                self._next_accept_time = frame.timestamp + interval
+        with self._cond:
+            self._latest = frame
+            self._cond.notify_all()
+        self._mailbox.put(frame)
+
+    def _wake(self):
+        with self._cond:
+            self._cond.notify_all()
+        self._mailbox.close()
+
+    def _end(self):
+        """Called from the reader thread when a file ends and this subscriber does not loop."""
+        self._ended = True
+        self._wake()
+
+    def stats(self):
+        """Decode-to-consumer handoff counters: {"put": int, "taken": int, "dropped": int}."""
+        return self._mailbox.stats()
+
+    def decode_stats(self):
+        """Timing of the shared decode stage for this source (see StageStats.snapshot)."""
+        return self._reader.decode_stats.snapshot()
+
+    def read(self, timeout=None):
+        """
+        Wait for a frame newer than the last one returned.
+
+        Frames that arrived while the consumer was busy are skipped; only the
+        most recent one is returned and the rest are counted as dropped.
+
+        Args:
+            timeout (float): Seconds to wait, or None to wait indefinitely.
+
+        Returns:
+            Frame: The most recent frame, or None on timeout, end of stream or close.
+                Check `ended` on None: once it is set read() returns immediately, so
+                callers must stop or resubscribe instead of polling again.
+        """
+        return self._mailbox.get(timeout)
+
+    def latest(self, timeout=None):
+        """
+        Get the most recent frame, waiting only if none has arrived yet.
+
+        Returns:
+            Frame: The most recent frame, or None if nothing arrived in time.
+        """
+        with self._cond:
+            self._cond.wait_for(lambda: self.ended or self._latest is not None, timeout)
+            return self._latest
+
+    def close(self):
+        """Release this subscription; the source is closed when its last subscriber leaves."""
+        if self._closed:
+            return
+        self._closed = True
+        self._wake()
+        self.hub.unsubscribe(self)
+
+    def resubscribe(self):
+        """
+        Close this subscription and open a new one with the same settings.
+
+        Used after `ended` to retry a source that failed to open or finished.
+
+        Returns:
+            Subscription: The new subscription.
+        """
+        self.close()
+        return self.hub.subscribe(self.source, size=self.size, fps=self.fps, loop=self.loop)
+
+
+class _SourceReader:
+    """Decodes one source in its own thread and fans frames out to subscribers."""
+
+    def __init__(self, source):
+        self.source = source
+        self.is_file = isinstance(source, str) and os.path.isfile(source)
+        self.subscribers = []
+        self.lock = threading.Lock()
+        self.running = True
+        self.ended = False
+        self.failed = False
+        self._opened = threading.Event()
+        self._info = {"fps": 0.0, "width": 0, "height": 0}
+        self._seq = 0
+        self.decode_stats = StageStats("decode")
+        self.thread = threading.Thread(target=self.run, name=f"decode-{source}", daemon=True)
+
+    def info(self):
+        return dict(self._info)
+
+    def rewind_at_end(self):
+        """
+        Handle the end of a file source.
+
+        Subscribers that did not ask to loop are ended; the file is replayed if
+        any remaining subscriber loops.
+
+        Returns:
+            bool: True to rewind and keep decoding, False to stop.
+        """
+        with self.lock:
+            subscribers = list(self.subscribers)
+        for subscription in subscribers:
+            if not subscription.loop:
+                subscription._end()
+        return any(subscription.loop for subscription in subscribers)
+
+    def wait_opened(self, timeout=None):
+        self._opened.wait(timeout)
+        return self._opened.is_set() and not self.failed
+
+    def open(self):
+        capture = cv2.VideoCapture(self.source)
+        if capture.isOpened():
+            self._info = {
+                "fps": capture.get(cv2.CAP_PROP_FPS) or 0.0,
+                "width": int(capture.get(cv2.CAP_PROP_FRAME_WIDTH)),
+                "height": int(capture.get(cv2.CAP_PROP_FRAME_HEIGHT)),
+            }
+        return capture
+
+    def run(self):
+        capture = self.open()
+        if not capture.isOpened() and self.is_file:
+            print(f"Cannot open source: {self.source}")
+            self.failed = True
+            self.finish()
+            return
+        if capture.isOpened():
+            self._opened.set()
+        # File sources are paced to their native frame rate, live sources are read as they arrive
+        frame_interval = 1.0 / (self._info["fps"] or DEFAULT_FPS) if self.is_file else 0.0
+        next_frame_time = time.monotonic()
+
+        while self.running:
+            read_start = time.perf_counter()
+            ret, image = capture.read() if capture.isOpened() else (False, None)
+            if not ret:
+                if self.is_file:
+                    if self.rewind_at_end():
+                        capture.set(cv2.CAP_PROP_POS_FRAMES, 0)
+                        continue
+                    break
+                # Live source dropped: reconnect
+                capture.release()
+                time.sleep(RECONNECT_DELAY)
+                capture = self.open()
+                if capture.isOpened():
+                    self._opened.set()
+                continue
+
+            self.publish(image)
+            self.decode_stats.record(time.perf_counter() - read_start)
+
+            if frame_interval:
+                next_frame_time += frame_interval
+                delay = next_frame_time - time.monotonic()
+                if delay > 0:
+                    time.sleep(delay)
+                else:
+                    next_frame_time = time.monotonic()
+
+        capture.release()
+        self.finish()
+
+    def publish(self, image):
+        image.flags.writeable = False
+        self._seq += 1
+        now = time.monotonic()
+        resized = {None: Frame(image, self._seq, now)}
+        with self.lock:
+            subscribers = list(self.subscribers)
+        for subscription in subscribers:
+            if subscription._ended:
+                continue
+            # Subscribers asking for the same size share one resized frame
+            frame = resized.get(subscription.size)
+            if frame is None:
+                scaled = cv2.resize(image, subscription.size)
+                scaled.flags.writeable = False
+                frame = resized[subscription.size] = Frame(scaled, self._seq, now)
+            subscription._offer(frame)
+
+    def finish(self):
+        if not self._opened.is_set():
+            self.failed = True
+        self.ended = True
+        self._opened.set()
+        with self.lock:
+            subscribers = list(self.subscribers)
+        for subscription in subscribers:
+            subscription._wake()
+
+    def stop(self):
+        self.running = False
+
+
+class FrameHub:
+    """
+    Process-wide registry of decoded sources.
+
+    Each RTSP URL, file or device is opened and decoded once no matter how
+    many windows show it; the reader stops when its last subscriber closes.
+    """
+
+    def __init__(self):
+        self._readers = {}
+        self._lock = threading.Lock()
+
+    def subscribe(self, source, size=None, fps=None, loop=True):
+        """
+        Subscribe to a source, opening it if this is the first subscriber.
+
+        Args:
+            source (str or int): RTSP URL, file path or device index.
+            size (tuple): Output (width, height), or None for the decoded size.
+            fps (float): Maximum delivery rate for this subscriber.
+            loop (bool): Keep receiving a file source from the start when it ends. The
+                file is replayed while any subscriber loops; a subscriber without loop
+                is ended (see Subscription.ended) the first time the file ends.
+
+        Returns:
+            Subscription: Handle to read frames from; close() it when done.
+        """
+        subscription = Subscription(self, source, size=size, fps=fps, loop=loop)
+        with self._lock:
+            reader = self._readers.get(source)
+            if reader is None or reader.ended:
+                reader = _SourceReader(source)
+                self._readers[source] = reader
+                reader.thread.start()
+            with reader.lock:
+                reader.subscribers.append(subscription)
+            subscription._reader = reader
+        return subscription
+
+    def unsubscribe(self, subscription):
+        """Remove a subscription and stop its source if nobody else uses it."""
+        with self._lock:
+            reader = subscription._reader
+            with reader.lock:
+                if subscription in reader.subscribers:
+                    reader.subscribers.remove(subscription)
+                remaining = len(reader.subscribers)
+            if remaining == 0:
+                reader.stop()
+                if self._readers.get(subscription.source) is reader:
+                    del self._readers[subscription.source]
+
+    def subscriber_count(self, source):
+        """Number of active subscriptions on a source."""
+        with self._lock:
+            reader = self._readers.get(source)
+            return len(reader.subscribers) if reader else 0
+
+
+_hub = FrameHub()
+
+
+def get_frame_hub():
+    """Get the process-wide FrameHub."""
+    return _hub
@@ -0,0 +1,182 @@
+import threading
+import time
+from concurrent.futures import Future
+from core.model_registry import get_model_registry
+
+DEFAULT_BATCH_SIZE = 8
+DEFAULT_MAX_WAIT = 0.02  # seconds
+
+_servers = {}
+_servers_lock = threading.Lock()
+
+
+class InferenceServer:
+    """
+    One YOLO model shared by every camera in the process.
+
+    Cameras submit their latest frame under their own key; a worker thread
+    collects the pending frames, runs a single batched forward pass and hands
+    each camera its ultralytics Results through a Future. A newer frame from
+    the same camera replaces one that is still waiting. The model comes from
+    the shared ModelRegistry and is only requested when the first frame
+    arrives, so creating a server is cheap.
+    """
+
+    def __init__(self, model_path, batch_size=DEFAULT_BATCH_SIZE, max_wait=DEFAULT_MAX_WAIT, conf=0.1, imgsz=640, device=None,
+                 backend=None):
+        """
+        Initialize InferenceServer and start its worker thread; the model is loaded on first use.
+
+        Args:
+            model_path (str): Path to YOLO model.
+            batch_size (int): Maximum number of frames per forward pass.
+            max_wait (float): Seconds to wait for more cameras once one frame is pending.
+            conf (float): Minimum confidence kept by the model; callers apply their own thresholds.
+            imgsz (int): Inference image size.
+            device (str or torch.device): Device for the PyTorch backend; exported CPU backends ignore it.
+            backend (str): Detector backend (see core.detector), None for the process default.
+        """
+        self.model_path = model_path
+        self.batch_size = batch_size
+        self.max_wait = max_wait
+        self.conf = conf
+        self.imgsz = imgsz
+        # PyTorch on GPU, or an exported ONNX/OpenVINO model on CPU, shared through the registry
+        self.backend = backend
+        self.device = device
+        self.model = None
+        self.model_lock = None
+
+        self.batches = 0
+        self.frames = 0
+        self.replaced = 0
+
+        self._pending = {}
+        self._cond = threading.Condition()
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name=f"inference-{model_path}", daemon=True)
+        self._thread.start()
+
+    def configure(self, batch_size=None, max_wait=None):
+        """Change batching parameters at runtime."""
+        with self._cond:
+            if batch_size is not None:
+                self.batch_size = max(1, int(batch_size))
+            if max_wait is not None:
+                self.max_wait = max(0.0, float(max_wait))
+            self._cond.notify_all()
+
+    def submit(self, key, frame):
+        """
+        Queue a frame for the next batch.
+
+        Args:
+            key: Identifier of the submitting camera.
+            frame (np.ndarray): BGR frame.
+
+        Returns:
+            Future: Resolves to the ultralytics Results for this frame.
+        """
+        future = Future()
+        with self._cond:
+            previous = self._pending.pop(key, None)
+            if previous is not None:
+                previous[1].cancel()
+                self.replaced += 1
+            self._pending[key] = (frame, future)
+            self._cond.notify_all()
+        return future
+
+    def infer(self, key, frame, timeout=None):
+        """Submit a frame and block until its Results are ready."""
+        return self.submit(key, frame).result(timeout)
+
+    def stats(self):
+        """
+        Get batching statistics.
+
+        Returns:
+            dict: {"batches": int, "frames": int, "replaced": int, "avg_batch": float}
+        """
+        avg_batch = self.frames / self.batches if self.batches else 0.0
+        return {"batches": self.batches, "frames": self.frames, "replaced": self.replaced, "avg_batch": avg_batch}
+
+    def _collect(self):
+        with self._cond:
+            while self._running and not self._pending:
+                self._cond.wait()
+            if not self._running:
+                return []
+            # Give the other cameras a short window to join the batch
+            deadline = time.monotonic() + self.max_wait
+            while self._running and len(self._pending) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+            keys = list(self._pending)[:self.batch_size]
+            return [self._pending.pop(key) for key in keys]
+
+    def _run(self):
+        while self._running:
+            batch = [(frame, future) for frame, future in self._collect()
+                     if future.set_running_or_notify_cancel()]
+            if not batch:
+                continue
+            try:
+                if self.model is None:
+                    self.model, self.device, self.model_lock = get_model_registry().get(
+                        self.model_path, backend=self.backend, device=self.device, imgsz=self.imgsz).result()
+                with self.model_lock:
+                    results = self.model([frame for frame, _ in batch], conf=self.conf, imgsz=self.imgsz,
+                                         device=self.device, verbose=False)
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+            self.batches += 1
+            self.frames += len(batch)
+            for (_, future), result in zip(batch, results):
+                future.set_result(result)
+
+    def stop(self):
+        """Stop the worker thread and cancel frames that are still waiting."""
+        with self._cond:
+            self._running = False
+            for _, future in self._pending.values():
+                future.cancel()
+            self._pending.clear()
+            self._cond.notify_all()
+        self._thread.join(timeout=5)
+
+
+def get_inference_server(model_path, imgsz=640, backend=None, **kwargs):
+    """
+    Get the process-wide InferenceServer for a model setting, creating it on first use.
+
+    Cameras tuned to the same (model, imgsz, backend) share one server and its batches.
+
+    Args:
+        model_path (str): Path to YOLO model.
+        imgsz (int): Inference image size.
+        backend (str): Detector backend, None for the process default.
+        **kwargs: Passed to InferenceServer when the server is created.
+
+    Returns:
+        InferenceServer: Shared server for this setting.
+    """
+    key = (model_path, imgsz, backend)
+    with _servers_lock:
+        server = _servers.get(key)
+        if server is None:
+            server = InferenceServer(model_path, imgsz=imgsz, backend=backend, **kwargs)
+            _servers[key] = server
+        return server
+
+
+def shutdown_inference_servers():
+    """Stop every shared InferenceServer."""
+    with _servers_lock:
+        for server in _servers.values():
+            server.stop()
+        _servers.clear()
@@ -0,0 +1,85 @@
+import threading
+
+
+class LatestFrameMailbox:
+    """
+    Single-slot handoff between two pipeline stages where the latest item wins.
+
+    The producer never blocks: putting into a full mailbox replaces the unread
+    item and counts it as dropped, so a slow consumer only ever sees the most
+    recent frame and memory stays bounded to one item.
+    """
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._item = None
+        self._has_item = False
+        self._closed = False
+        self.put_count = 0
+        self.taken = 0
+        self.dropped = 0
+
+    def put(self, item):
+        """
+        Store an item, replacing any unread one.
+
+        Args:
+            item: Item to hand to the consumer.
+
+        Returns:
+            bool: True if an unread item was dropped to make room.
+        """
+        with self._cond:
+            dropped = self._has_item
+            if dropped:
+                self.dropped += 1
+            self._item = item
+            self._has_item = True
+            self.put_count += 1
+            self._cond.notify_all()
+            return dropped
+
+    def get(self, timeout=None):
+        """
+        Take the latest item, waiting for one if the mailbox is empty.
+
+        Args:
+            timeout (float): Seconds to wait, or None to wait indefinitely.
+
+        Returns:
+            The latest item, or None on timeout or when the mailbox is closed.
+        """
+        with self._cond:
+            if not self._cond.wait_for(lambda: self._has_item or self._closed, timeout):
+                return None
+            return self._take()
+
+    def get_nowait(self):
+        """Take the latest item if there is one, otherwise return None."""
+        with self._cond:
+            return self._take() if self._has_item else None
+
+    def _take(self):
+        if not self._has_item:
+            return None
+        item = self._item
+        self._item = None
+        self._has_item = False
+        self.taken += 1
+        return item
+
+    def close(self):
+        """Wake up any waiting consumer; later gets return None once empty."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+    def stats(self):
+        """
+        Get handoff counters.
+
+        Returns:
+            dict: {"put": int, "taken": int, "dropped": int}
+        """
+        with self._cond:
+            return {"put": self.put_count, "taken": self.taken, "dropped": self.dropped}
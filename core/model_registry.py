@@ -0,0 +1,109 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import torch
+from core.detector import DEFAULT_BACKEND, load_detector, select_backend
+
+_registry = None
+_registry_lock = threading.Lock()
+
+
+class ModelRegistry:
+    """
+    Process-wide cache of loaded detectors.
+
+    Each (weights, backend, device) combination is loaded once, on first use,
+    on a background loader thread, followed by a warmup inference so the first
+    real frame does not pay for lazy initialisation. Callers get a Future and
+    only block when they actually need the model, which keeps the GUI thread
+    free while cameras open. ultralytics predictors are not thread-safe, so
+    every model comes with a lock that callers hold around inference. A load
+    that fails is forgotten, so the next request tries again.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._models = {}
+        self._load_times = {}
+        # One loader thread: models load one after another instead of all at once
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="model-loader")
+
+    @staticmethod
+    def _key(model_path, backend, device):
+        backend = select_backend(backend or DEFAULT_BACKEND)
+        if backend == "pytorch":
+            device = str(device) if device else ("cuda:0" if torch.cuda.is_available() else "cpu")
+        else:
+            device = "cpu"
+        return model_path, backend, device
+
+    def get(self, model_path, backend=None, device=None, imgsz=640):
+        """
+        Get the shared model, scheduling the load if this is the first request.
+
+        Args:
+            model_path (str): Path to YOLO weights.
+            backend (str): Detector backend, None for the process default.
+            device (str): Torch device for the PyTorch backend.
+            imgsz (int): Image size used for the warmup inference.
+
+        Returns:
+            Future: Resolves to (YOLO model, device string, threading.Lock).
+        """
+        key = self._key(model_path, backend, device)
+        with self._lock:
+            future = self._models.get(key)
+            # The failure callback may not have run yet when a waiter sees the exception
+            if future is not None and not (future.done() and future.exception() is not None):
+                return future
+            future = self._executor.submit(self._load, key, imgsz)
+            self._models[key] = future
+        # Outside the lock: the callback runs right away if the load already finished
+        future.add_done_callback(lambda done: self._forget_failed(key, done))
+        return future
+
+    def _forget_failed(self, key, future):
+        """Drop a failed load so the next get() retries it."""
+        error = future.exception()
+        if error is None:
+            return
+        with self._lock:
+            if self._models.get(key) is future:
+                del self._models[key]
+        print(f"Model {key[0]} ({key[1]}, {key[2]}) failed to load: {error}")
+
+    def _load(self, key, imgsz):
+        model_path, backend, device = key
+        start = time.perf_counter()
+        model, device = load_detector(model_path, backend=backend, device=device, imgsz=imgsz)
+        model(np.zeros((imgsz, imgsz, 3), dtype=np.uint8), imgsz=imgsz, device=device, verbose=False)
+        with self._lock:
+            self._load_times[key] = time.perf_counter() - start
+        print(f"Model {model_path} ({backend}, {device}) loaded and warmed up in {self._load_times[key]:.1f}s")
+        return model, device, threading.Lock()
+
+    def preload(self, model_path, backend=None, device=None, imgsz=640):
+        """Start loading a model in the background without waiting for it."""
+        self.get(model_path, backend=backend, device=device, imgsz=imgsz)
+
+    def stats(self):
+        """
+        Get the state of every requested model.
+
+        Returns:
+            dict: {(model_path, backend, device): {"ready": bool, "load_seconds": float or None}}
+        """
+        with self._lock:
+            return {key: {"ready": future.done() and future.exception() is None,
+                          "load_seconds": self._load_times.get(key)}
+                    for key, future in self._models.items()}
+
+
+def get_model_registry():
+    """Get the process-wide ModelRegistry."""
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            _registry = ModelRegistry()
+        return _registry
@@ -0,0 +1,171 @@
+import threading
+import cv2
+
+
+class MotionDetector:
+    """
+    Cheap motion score from frame differencing on a downscaled grayscale image.
+
+    The score is the fraction of pixels whose difference against a running
+    background exceeds `pixel_threshold`, so it is independent of resolution.
+    """
+
+    def __init__(self, width=160, pixel_threshold=25, learning_rate=0.05, blur=5, roi=None):
+        """
+        Initialize MotionDetector.
+
+        Args:
+            width (int): Width the frame (or ROI) is downscaled to before comparison.
+            pixel_threshold (int): Minimum gray-level change for a pixel to count as moving.
+            learning_rate (float): Weight of the new frame in the running background.
+            blur (int): Gaussian blur kernel size, odd, or 0 to disable.
+            roi (tuple): (x1, y1, x2, y2) in frame pixels to score, or None for the whole frame.
+        """
+        self.width = width
+        self.pixel_threshold = pixel_threshold
+        self.learning_rate = learning_rate
+        self.blur = blur
+        self.roi = roi
+        self.background = None
+        self.score = 0.0
+
+    def reset(self):
+        self.background = None
+        self.score = 0.0
+
+    def _prepare(self, frame):
+        if self.roi is not None:
+            x1, y1, x2, y2 = self.roi
+            cropped = frame[max(y1, 0):y2, max(x1, 0):x2]
+            if cropped.size:
+                frame = cropped
+        h, w = frame.shape[:2]
+        height = max(1, int(h * self.width / w))
+        small = cv2.resize(frame, (self.width, height), interpolation=cv2.INTER_AREA)
+        gray = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY) if small.ndim == 3 else small
+        if self.blur:
+            gray = cv2.GaussianBlur(gray, (self.blur, self.blur), 0)
+        return gray
+
+    def update(self, frame):
+        """
+        Compare a frame against the background and update it.
+
+        Args:
+            frame (np.ndarray): BGR or grayscale image.
+
+        Returns:
+            float: Fraction of moving pixels in [0, 1].
+        """
+        gray = self._prepare(frame)
+        if self.background is None or self.background.shape != gray.shape:
+            self.background = gray.astype("float32")
+            self.score = 0.0
+            return self.score
+        diff = cv2.absdiff(gray, cv2.convertScaleAbs(self.background))
+        moving = cv2.countNonZero(cv2.threshold(diff, self.pixel_threshold, 255, cv2.THRESH_BINARY)[1])
+        cv2.accumulateWeighted(gray, self.background, self.learning_rate)
+        self.score = moving / float(diff.size)
+        return self.score
+
+
+class MotionGate:
+    """
+    Decides per frame whether the detector needs to run.
+
+    Inference is skipped while the motion score stays below `threshold`. It
+    keeps running for `hold_frames` frames after the last motion so objects
+    that stop moving are still tracked, and is forced every `max_skip`
+    skipped frames so stationary objects entering a static scene are not
+    missed forever.
+    """
+
+    def __init__(self, threshold=0.002, hold_frames=15, max_skip=50, roi=None, **detector_kwargs):
+        """
+        Initialize MotionGate.
+
+        Args:
+            threshold (float): Minimum motion score that triggers inference.
+            hold_frames (int): Frames to keep inferring after motion stops.
+            max_skip (int): Force one inference after this many consecutive skips, 0 to disable.
+            roi (tuple): (x1, y1, x2, y2) region scored for motion, or None for the whole frame.
+            **detector_kwargs: Passed to MotionDetector.
+        """
+        self.threshold = threshold
+        self.hold_frames = hold_frames
+        self.max_skip = max_skip
+        self.detector = MotionDetector(roi=roi, **detector_kwargs)
+        self._lock = threading.Lock()
+        self.hold = 0
+        self.consecutive_skips = 0
+        self.frames = 0
+        self.inferences = 0
+        self.skipped = 0
+
+    def set_roi(self, roi):
+        self.detector.roi = roi
+        self.detector.reset()
+
+    def should_infer(self, frame):
+        """
+        Score a frame and decide whether to run inference on it.
+
+        Args:
+            frame (np.ndarray): Input frame.
+
+        Returns:
+            bool: True if the detector should run.
+        """
+        score = self.detector.update(frame)
+        if score >= self.threshold:
+            self.hold = self.hold_frames
+        run = self.hold > 0 or (self.max_skip and self.consecutive_skips >= self.max_skip)
+        if self.hold > 0:
+            self.hold -= 1
+        with self._lock:
+            self.frames += 1
+            if run:
+                self.inferences += 1
+                self.consecutive_skips = 0
+            else:
+                self.skipped += 1
+                self.consecutive_skips += 1
+        return bool(run)
+
+    def stats(self):
+        """
+        Get gating counters.
+
+        Returns:
+            dict: {"frames", "inferences", "skipped", "saved_ratio", "score"}
+        """
+        with self._lock:
+            return {
+                "frames": self.frames,
+                "inferences": self.inferences,
+                "skipped": self.skipped,
+                "saved_ratio": self.skipped / self.frames if self.frames else 0.0,
+                "score": self.detector.score,
+            }
+
+
+def lines_roi(lines, frame_shape, margin=0.1):
+    """
+    Bounding box around counting lines, padded by a fraction of the frame size.
+
+    Args:
+        lines (list): ((x1, y1), (x2, y2)) line endpoints in frame pixels.
+        frame_shape (tuple): (h, w, ...) of the frame.
+        margin (float): Padding as a fraction of the frame width/height.
+
+    Returns:
+        tuple: (x1, y1, x2, y2) clipped to the frame, or None if there are no lines.
+    """
+    if not lines:
+        return None
+    h, w = frame_shape[:2]
+    xs = [p[0] for line in lines for p in line]
+    ys = [p[1] for line in lines for p in line]
+    pad_x, pad_y = int(w * margin), int(h * margin)
+    return (max(0, min(xs) - pad_x), max(0, min(ys) - pad_y),
+            min(w, max(xs) + pad_x), min(h, max(ys) + pad_y))
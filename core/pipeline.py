@@ -0,0 +1,76 @@
+import threading
+import time
+
+
+class StageStats:
+    """
+    Timing statistics for one pipeline stage (decode, analytics, display, ...).
+
+    Updated from the stage's own thread and read from any other thread.
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self._lock = threading.Lock()
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.last = 0.0
+        self.first_time = None
+        self.last_time = None
+
+    def record(self, seconds):
+        """Record the duration of one processed item."""
+        now = time.monotonic()
+        with self._lock:
+            self.count += 1
+            self.total += seconds
+            self.last = seconds
+            self.max = max(self.max, seconds)
+            if self.first_time is None:
+                self.first_time = now
+            self.last_time = now
+
+    def measure(self):
+        """
+        Context manager that records the time spent inside the block.
+
+        Example:
+            with stats.measure():
+                process(frame)
+        """
+        return _Measure(self)
+
+    def snapshot(self):
+        """
+        Get the current statistics.
+
+        Returns:
+            dict: {"name", "count", "avg_ms", "last_ms", "max_ms", "fps"}
+        """
+        with self._lock:
+            elapsed = (self.last_time - self.first_time) if self.count > 1 else 0.0
+            return {
+                "name": self.name,
+                "count": self.count,
+                "avg_ms": 1000.0 * self.total / self.count if self.count else 0.0,
+                "last_ms": 1000.0 * self.last,
+                "max_ms": 1000.0 * self.max,
+                "fps": (self.count - 1) / elapsed if elapsed > 0 else 0.0,
+            }
+
+
+class _Measure:
+    __slots__ = ("stats", "start")
+
+    def __init__(self, stats):
+        self.stats = stats
+        self.start = 0.0
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stats.record(time.perf_counter() - self.start)
+        return False
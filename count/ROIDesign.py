@@ -1,10 +1,12 @@
 import cv2
 import json
+import numpy as np
 import os
 from PyQt5.QtWidgets import QWidget, QLabel, QPushButton, QVBoxLayout, QHBoxLayout, QComboBox, QMessageBox, QInputDialog
 from PyQt5.QtGui import QPixmap, QImage
 from PyQt5.QtCore import Qt, QPoint
-from count.roi_manager import save_roi, load_roi
+from core.frame_hub import get_frame_hub
+from count.roi_manager import save_roi, load_roi, save_zones, load_zones
 
 class ROIDesign(QWidget):
     def __init__(self, camera_sources: dict):
@@ -14,8 +16,14 @@ class ROIDesign(QWidget):
         self.current_camera = None
         # Mỗi ROI là một dict chứa "name", "start" và "end"
         self.lines = []
+        # Mỗi vùng là một dict chứa "name" và "points" (đa giác)
+        self.zones = []
+        # Các đỉnh của vùng đang vẽ
+        self.zone_points = []
+        self.mode = "Line"
         self.drawing = False
         self.start_point = QPoint()
+        self.subscription = None
 
         self.init_ui()
 
@@ -27,6 +35,11 @@ class ROIDesign(QWidget):
         self.comboBox.addItems(self.camera_sources.keys())
         self.comboBox.currentTextChanged.connect(self.change_camera)
 
+        # Line: kéo chuột để vẽ đường đếm; Zone: click trái thêm đỉnh, click phải để đóng vùng
+        self.modeBox = QComboBox()
+        self.modeBox.addItems(["Line", "Zone"])
+        self.modeBox.currentTextChanged.connect(self.change_mode)
+
         btn_save = QPushButton("Lưu ROI")
         btn_clear = QPushButton("Xóa ROI")
         btn_close = QPushButton("Đóng")
@@ -37,6 +50,7 @@ class ROIDesign(QWidget):
 
         top_bar = QHBoxLayout()
         top_bar.addWidget(self.comboBox)
+        top_bar.addWidget(self.modeBox)
         top_bar.addWidget(btn_save)
         top_bar.addWidget(btn_clear)
         top_bar.addWidget(btn_close)
@@ -50,17 +64,47 @@ class ROIDesign(QWidget):
 
     def change_camera(self, camera_name):
         self.current_camera = camera_name
-        self.cap = cv2.VideoCapture(self.camera_sources[camera_name])
+        # Dùng chung luồng giải mã với các cửa sổ camera đang mở
+        if self.subscription:
+            self.subscription.close()
+        self.subscription = get_frame_hub().subscribe(self.camera_sources[camera_name], size=(640, 480))
         # Load ROI đã lưu nếu có
         self.lines = load_roi(camera_name)
+        self.zones = load_zones(camera_name)
+        self.zone_points = []
+        self.update_frame()
+
+    def change_mode(self, mode):
+        self.mode = mode
+        self.zone_points = []
+        self.drawing = False
         self.update_frame()
 
     def mousePressEvent(self, event):
+        if self.mode == "Zone":
+            pos = self.label.mapFromGlobal(event.globalPos())
+            if event.button() == Qt.LeftButton:
+                self.zone_points.append([max(0, min(pos.x(), 640)), max(0, min(pos.y(), 480))])
+                self.update_frame()
+            elif event.button() == Qt.RightButton:
+                self.finish_zone()
+            return
         if event.button() == Qt.LeftButton:
             pos = self.label.mapFromGlobal(event.globalPos())
             self.start_point = (pos.x(), pos.y())
             self.drawing = True
 
+    def finish_zone(self):
+        if len(self.zone_points) < 3:
+            QMessageBox.warning(self, "Vẽ vùng", "Vùng cần ít nhất 3 điểm.")
+            return
+        zone_name, ok = QInputDialog.getText(self, "Nhập tên vùng", "Tên vùng:")
+        if not ok or not zone_name.strip():
+            zone_name = f"Zone {len(self.zones)+1}"
+        self.zones.append({"name": zone_name, "points": self.zone_points})
+        self.zone_points = []
+        self.update_frame()
+
     def mouseReleaseEvent(self, event):
         if event.button() == Qt.LeftButton and self.drawing:
             pos = self.label.mapFromGlobal(event.globalPos())
@@ -88,18 +132,31 @@ class ROIDesign(QWidget):
             roi_name = line.get("name", f"ROI {i+1}")
             cv2.putText(image, roi_name, mid_point, cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 255, 0), 2)
 
+    def paint_zones(self, image):
+        for i, zone in enumerate(self.zones):
+            points = np.array(zone["points"], dtype=np.int32)
+            cv2.polylines(image, [points], True, (0, 200, 255), 2)
+            zone_name = zone.get("name", f"Zone {i+1}")
+            cv2.putText(image, zone_name, tuple(points[0]), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 200, 255), 2)
+        # Vùng đang vẽ dở
+        if self.zone_points:
+            points = np.array(self.zone_points, dtype=np.int32)
+            cv2.polylines(image, [points], False, (0, 0, 255), 2)
+            for point in self.zone_points:
+                cv2.circle(image, tuple(point), 3, (0, 0, 255), -1)
 
     def update_frame(self):
-        if not self.cap or not self.cap.isOpened():
+        if not self.subscription:
             return
 
-        ret, frame = self.cap.read()
-        if not ret:
+        shared_frame = self.subscription.latest(timeout=2.0)
+        if shared_frame is None:
             return
 
-        # Resize frame để phù hợp với UI (640x480)
-        frame = cv2.resize(frame, (640, 480))
+        # FrameHub đã resize về 640x480; sao chép trước khi vẽ
+        frame = shared_frame.image.copy()
         self.paint_lines(frame)
+        self.paint_zones(frame)
 
         rgb_image = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
         height, width, channel = rgb_image.shape
@@ -112,8 +169,17 @@ class ROIDesign(QWidget):
         if not self.current_camera:
             return
         save_roi(self.current_camera, self.lines)
+        save_zones(self.current_camera, self.zones)
         QMessageBox.information(self, "Lưu ROI", "Đã lưu thành công!")
 
     def clear_roi(self):
         self.lines = []
+        self.zones = []
+        self.zone_points = []
         self.update_frame()
+
+    def closeEvent(self, event):
+        if self.subscription:
+            self.subscription.close()
+            self.subscription = None
+        super().closeEvent(event)
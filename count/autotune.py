@@ -0,0 +1,207 @@
+"""
+Chọn mô hình / imgsz / backend cho từng camera đếm người.
+
+Usage:
+    python -m count.autotune --camera 1 --clip recordings/camera_1/20250101_080000.avi --target-fps 10
+
+Mỗi tổ hợp (model, imgsz, backend) được chạy trên clip mẫu của camera (chỉ trên
+vùng quanh các đường line, giống ObjectCounter). Độ khớp phát hiện được so với
+cấu hình tham chiếu lớn nhất; cấu hình rẻ nhất vừa đạt FPS mục tiêu vừa đạt
+độ khớp tối thiểu được lưu vào khóa "inference" của roi_data/Camera N.json.
+"""
+import argparse
+import itertools
+import time
+from datetime import datetime
+import cv2
+import numpy as np
+from core.detector import available_backends, load_detector
+from count.counting import detection_region
+from count.roi_manager import load_roi, save_inference_config
+
+DEFAULT_MODELS = ("yolo11n.pt", "yolo11s.pt", "yolo11m.pt")
+DEFAULT_IMGSZ = (320, 480, 640, 960)
+
+
+def load_clip(path, count, size=(640, 480)):
+    """Đọc tối đa `count` frame rải đều trong clip, đổi về kích thước phân tích của module đếm."""
+    capture = cv2.VideoCapture(path)
+    total = int(capture.get(cv2.CAP_PROP_FRAME_COUNT))
+    indexes = set(np.linspace(0, max(total - 1, 0), count).astype(int)) if total > count else None
+    frames = []
+    index = 0
+    while len(frames) < count:
+        ret, frame = capture.read()
+        if not ret:
+            break
+        if indexes is None or index in indexes:
+            frames.append(cv2.resize(frame, size))
+        index += 1
+    capture.release()
+    return frames
+
+
+def box_iou(a, b):
+    """IoU giữa hai tập hộp (N, 4) và (M, 4)."""
+    if len(a) == 0 or len(b) == 0:
+        return np.zeros((len(a), len(b)))
+    x1 = np.maximum(a[:, None, 0], b[None, :, 0])
+    y1 = np.maximum(a[:, None, 1], b[None, :, 1])
+    x2 = np.minimum(a[:, None, 2], b[None, :, 2])
+    y2 = np.minimum(a[:, None, 3], b[None, :, 3])
+    inter = np.clip(x2 - x1, 0, None) * np.clip(y2 - y1, 0, None)
+    area_a = (a[:, 2] - a[:, 0]) * (a[:, 3] - a[:, 1])
+    area_b = (b[:, 2] - b[:, 0]) * (b[:, 3] - b[:, 1])
+    return inter / (area_a[:, None] + area_b[None, :] - inter + 1e-9)
+
+
+def agreement(reference, candidate, iou_threshold=0.5):
+    """
+    Độ khớp F1 giữa phát hiện của cấu hình thử và cấu hình tham chiếu trên toàn clip.
+
+    Args:
+        reference (list): Các mảng hộp (N, 4) của tham chiếu, mỗi frame một mảng.
+        candidate (list): Các mảng hộp của cấu hình thử.
+
+    Returns:
+        float: 2 * số cặp khớp / (tổng hộp tham chiếu + tổng hộp thử), 1.0 nếu cả hai đều rỗng.
+    """
+    matched = 0
+    total = 0
+    for ref_boxes, cand_boxes in zip(reference, candidate):
+        total += len(ref_boxes) + len(cand_boxes)
+        iou = box_iou(ref_boxes, cand_boxes)
+        # Ghép tham lam theo IoU giảm dần
+        while iou.size and iou.max() >= iou_threshold:
+            i, j = np.unravel_index(np.argmax(iou), iou.shape)
+            matched += 1
+            iou[i, :] = 0
+            iou[:, j] = 0
+    return 2.0 * matched / total if total else 1.0
+
+
+def run_candidate(model_path, imgsz, backend, frames, region, classes=(0,), conf=0.25):
+    """
+    Chạy một cấu hình trên các frame mẫu.
+
+    Returns:
+        tuple: (fps, danh sách hộp theo tọa độ frame)
+    """
+    model, device = load_detector(model_path, backend=backend, imgsz=imgsz)
+    if region is not None:
+        x1, y1, x2, y2 = region
+        inputs = [frame[y1:y2, x1:x2] for frame in frames]
+        offset = np.array([x1, y1, x1, y1], dtype=np.float32)
+    else:
+        inputs = frames
+        offset = np.zeros(4, dtype=np.float32)
+    for image in inputs[:3]:  # Khởi động
+        model(image, imgsz=imgsz, device=device, classes=list(classes), conf=conf, verbose=False)
+    boxes = []
+    start = time.perf_counter()
+    for image in inputs:
+        result = model(image, imgsz=imgsz, device=device, classes=list(classes), conf=conf, verbose=False)[0]
+        boxes.append(result.boxes.xyxy.cpu().numpy() + offset if result.boxes is not None else np.zeros((0, 4)))
+    elapsed = time.perf_counter() - start
+    return (len(inputs) / elapsed if elapsed > 0 else 0.0), boxes
+
+
+def choose(results, target_fps, min_agreement):
+    """
+    Chọn cấu hình rẻ nhất (FPS cao nhất) đạt cả FPS mục tiêu và độ khớp tối thiểu.
+
+    Nếu không có cấu hình nào đạt cả hai, ưu tiên cấu hình đạt FPS có độ khớp cao
+    nhất, sau cùng là cấu hình nhanh nhất.
+    """
+    passing = [r for r in results if r["fps"] >= target_fps and r["agreement"] >= min_agreement]
+    if passing:
+        return max(passing, key=lambda r: r["fps"])
+    fast_enough = [r for r in results if r["fps"] >= target_fps]
+    if fast_enough:
+        return max(fast_enough, key=lambda r: r["agreement"])
+    return max(results, key=lambda r: r["fps"])
+
+
+def autotune(cam_id, clip, target_fps=10.0, min_agreement=0.85, models=DEFAULT_MODELS, imgsz_list=DEFAULT_IMGSZ,
+             backends=None, frames=150, reference=None, save=True):
+    """
+    Tinh chỉnh và (tùy chọn) lưu cấu hình suy luận cho một camera.
+
+    Args:
+        cam_id (int): Mã camera, cấu hình lưu vào roi_data/Camera {cam_id}.json.
+        clip (str): Video mẫu của camera.
+        target_fps (float): FPS phân tích tối thiểu cần đạt.
+        min_agreement (float): Độ khớp F1 tối thiểu so với tham chiếu.
+        models (iterable): Các file mô hình thử.
+        imgsz_list (iterable): Các kích thước ảnh thử.
+        backends (iterable): Các backend thử, mặc định mọi backend đã cài.
+        frames (int): Số frame mẫu.
+        reference (tuple): (model, imgsz, backend) tham chiếu, mặc định mô hình và imgsz lớn nhất trên pytorch.
+        save (bool): Ghi cấu hình đã chọn vào file của camera.
+
+    Returns:
+        dict: Cấu hình đã chọn.
+    """
+    camera_name = f"Camera {cam_id}"
+    samples = load_clip(clip, frames)
+    if not samples:
+        raise ValueError(f"Không đọc được frame nào từ {clip}")
+    lines = [((int(r["start"][0]), int(r["start"][1])), (int(r["end"][0]), int(r["end"][1])))
+             for r in load_roi(camera_name) if "start" in r and "end" in r]
+    region = detection_region(lines, samples[0].shape) if lines else None
+    backends = list(backends or available_backends())
+    reference = reference or (list(models)[-1], max(imgsz_list), "pytorch")
+
+    print(f"[{camera_name}] {len(samples)} frame, vùng phát hiện {region or 'toàn frame'}, tham chiếu {reference}")
+    _, reference_boxes = run_candidate(*reference, samples, region)
+
+    results = []
+    for model_path, imgsz, backend in itertools.product(models, imgsz_list, backends):
+        try:
+            fps, boxes = run_candidate(model_path, imgsz, backend, samples, region)
+        except Exception as e:
+            print(f"  {model_path:<12} {imgsz:>4} {backend:<9} lỗi: {e}")
+            continue
+        score = agreement(reference_boxes, boxes)
+        results.append({"model": model_path, "imgsz": imgsz, "backend": backend, "fps": fps, "agreement": score})
+        print(f"  {model_path:<12} {imgsz:>4} {backend:<9} {fps:7.1f} fps  khớp {score:.3f}")
+    if not results:
+        raise RuntimeError("Không chạy được cấu hình nào")
+
+    best = choose(results, target_fps, min_agreement)
+    config = {
+        "model": best["model"],
+        "imgsz": best["imgsz"],
+        "backend": best["backend"],
+        "fps": round(best["fps"], 1),
+        "agreement": round(best["agreement"], 3),
+        "target_fps": target_fps,
+        "tuned_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+    }
+    print(f"[{camera_name}] Chọn: {config}")
+    if save:
+        save_inference_config(camera_name, config)
+    return config
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--camera", type=int, required=True)
+    parser.add_argument("--clip", required=True)
+    parser.add_argument("--target-fps", type=float, default=10.0)
+    parser.add_argument("--min-agreement", type=float, default=0.85)
+    parser.add_argument("--models", default=",".join(DEFAULT_MODELS))
+    parser.add_argument("--imgsz", default=",".join(str(s) for s in DEFAULT_IMGSZ))
+    parser.add_argument("--backends", default=None, help="Ví dụ: pytorch,openvino (mặc định: mọi backend đã cài)")
+    parser.add_argument("--frames", type=int, default=150)
+    parser.add_argument("--dry-run", action="store_true", help="Chỉ in kết quả, không lưu cấu hình")
+    args = parser.parse_args()
+
+    autotune(args.camera, args.clip, target_fps=args.target_fps, min_agreement=args.min_agreement,
+             models=args.models.split(","), imgsz_list=[int(s) for s in args.imgsz.split(",")],
+             backends=args.backends.split(",") if args.backends else None, frames=args.frames,
+             save=not args.dry_run)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,17 +1,33 @@
 # camera_thread.py
 from PyQt5.QtCore import QThread, pyqtSignal
 import cv2
-from count.roi_manager import load_roi
+from count.roi_manager import load_roi, load_zones
 from count.counting import ObjectCounter
+from core.inference_server import get_inference_server
+from core.frame_hub import RECONNECT_DELAY, get_frame_hub
+from core.mailbox import LatestFrameMailbox
+from core.pipeline import StageStats
+from count.stats_writer import StatsWriter
+import threading
+import queue
 import time
-import json
-import os
-import cv2
 
 class CameraThread(QThread):
-    frame_received = pyqtSignal(int, object, int, int, int)
+    """
+    Pipeline đếm người của một camera, tách thành các chặng chạy song song:
+
+    - decode: luồng đọc của FrameHub, không bao giờ bị chặn bởi các chặng sau;
+    - analytics: luồng chạy ObjectCounter.analyze với tốc độ mà mô hình cho phép;
+    - display: chính QThread này, vẽ kết quả phân tích mới nhất lên frame trực tiếp;
+    - stats_io: luồng ghi thống kê ra đĩa.
+
+    Các chặng nối với nhau bằng mailbox/hàng đợi có giới hạn.
+    """
+    # Chỉ báo có frame mới; giao diện lấy frame mới nhất từ display_mailbox
+    frame_ready = pyqtSignal(int)
 
-    def __init__(self, cam_id, source, model_path='yolov8x.pt', classes_to_count=[0], threshold=0.25):
+    def __init__(self, cam_id, source, model_path='yolo11n.pt', classes_to_count=[0], threshold=0.25, data_manager=None,
+                 imgsz=640, backend=None):
         super().__init__()
         self.cam_id = cam_id
         self.source = source
@@ -23,26 +39,51 @@ class CameraThread(QThread):
         self.threshold = threshold
         self.last_save_time = time.time()
         self.save_interval = 10  # Save every 10 seconds
+        self.subscription = None
+        self.analytics_subscription = None
+        # (frame, in, out, total) mới nhất chờ giao diện hiển thị
+        self.display_mailbox = LatestFrameMailbox()
+        # Bản chụp bất biến (AnalyticsSnapshot) của frame phân tích mới nhất, chặng display chỉ vẽ lại nó
+        self.latest_snapshot = None
+        self.stats_queue = queue.Queue(maxsize=64)
+        # Chuỗi thời gian chỉ ghi nối thêm: stats_data/camera_{id}_stats.jsonl
+        self.stats_writer = StatsWriter(f"stats_data/camera_{cam_id}_stats")
+        # DataManager dùng chung; save_stats chỉ đưa vào hàng đợi của luồng ghi SQLite
+        self.data_manager = data_manager
+        self.stats_dropped = 0
+        self.analytics_stats = StageStats("analytics")
+        self.display_stats = StageStats("display")
+        self.stats_io_stats = StageStats("stats_io")
+        self._ai_event = threading.Event()
+        self.analytics_thread = threading.Thread(target=self.analytics_loop, name=f"count-analytics-{cam_id}", daemon=True)
+        self.stats_thread = threading.Thread(target=self.stats_loop, name=f"count-stats-{cam_id}", daemon=True)
 
         self.roi_list = load_roi(f"Camera {cam_id}")
-        print(f"Loaded ROI for Camera {cam_id}: {self.roi_list}")
-        if self.roi_list:
+        self.zone_list = load_zones(f"Camera {cam_id}")
+        print(f"Loaded ROI for Camera {cam_id}: {self.roi_list}, zones: {[z.get('name') for z in self.zone_list]}")
+        if self.roi_list or self.zone_list:
             try:
-                self.counter = ObjectCounter(model_path, classes_to_count, self.roi_list, save_interval=self.save_interval, threshold=self.threshold)
+                self.counter = ObjectCounter(model_path, classes_to_count, self.roi_list, save_interval=self.save_interval, threshold=self.threshold,
+                                             inference_server=get_inference_server(model_path, imgsz=imgsz, backend=backend), source_id=f"count-{cam_id}",
+                                             event_source=source, detect_interval="auto", zone_list=self.zone_list)
                 print(f"Initialized ObjectCounter for Camera {cam_id}")
             except ValueError as e:
                 print(f"Error initializing ObjectCounter for Camera {cam_id}: {e}")
 
     def set_ai_enabled(self, enabled):
         self.ai_enabled = enabled
+        self.latest_snapshot = None
+        if enabled:
+            self._ai_event.set()
+        else:
+            self._ai_event.clear()
 
     def save_stats(self):
+        """Đưa số liệu vào hàng đợi ghi định kỳ; việc ghi file do stats_loop đảm nhiệm."""
         if not self.ai_enabled or not self.counter:
             return
         current_time = time.time()
         if current_time - self.last_save_time >= self.save_interval:
-            stats_file = f"stats_data/camera_{self.cam_id}_stats.json"
-            os.makedirs("stats_data", exist_ok=True)
             total_counts = self.counter.get_total_counts()
             data = {
                 "camera_id": self.cam_id,
@@ -51,34 +92,121 @@ class CameraThread(QThread):
                 "out": total_counts["out"],
                 "total": total_counts["total"]
             }
+            zone_stats = self.counter.get_zone_stats()
+            if zone_stats:
+                # Số người đang trong vùng và thời gian lưu lại
+                data["zones"] = zone_stats
             try:
-                with open(stats_file, 'r') as f:
-                    stats = json.load(f)
-            except (FileNotFoundError, json.JSONDecodeError):
-                stats = []
-            stats.append(data)
-            with open(stats_file, 'w') as f:
-                json.dump(stats, f, indent=4)
+                self.stats_queue.put_nowait(data)
+            except queue.Full:
+                self.stats_dropped += 1
             self.last_save_time = current_time
 
-    def run(self):
-        cap = cv2.VideoCapture(self.source)
+    def write_stats(self, data):
+        self.stats_writer.append(data)
+        if self.data_manager:
+            self.data_manager.save_stats(self.cam_id, data["in"], data["out"], data["total"])
+
+    def stats_loop(self):
+        while True:
+            data = self.stats_queue.get()
+            if data is None:
+                break
+            with self.stats_io_stats.measure():
+                self.write_stats(data)
+        self.stats_writer.close()
+
+    def analytics_loop(self):
+        self.analytics_subscription = get_frame_hub().subscribe(self.source, size=(640, 480))
+        if self.counter:
+            # Ngân sách thời gian mỗi frame cho nhịp phát hiện thích ứng; nguồn không báo fps
+            # (hoặc chưa mở được) dùng fps mặc định
+            self.analytics_subscription.wait_opened(timeout=10)
+            self.counter.set_source_fps(self.analytics_subscription.info["fps"])
         while self.running:
-            ret, frame = cap.read()
-            if ret:
-                frame = cv2.resize(frame, (640, 480))
+            if not (self.ai_enabled and self.counter):
+                self._ai_event.wait(timeout=0.5)
+                continue
+            # Luôn lấy frame mới nhất, các frame cũ hơn bị bỏ qua
+            shared_frame = self.analytics_subscription.read(timeout=1.0)
+            if shared_frame is None:
+                if self.analytics_subscription.ended and self.running:
+                    # Nguồn không mở được hoặc đã dừng: chờ rồi đăng ký lại, không quay vòng liên tục
+                    time.sleep(RECONNECT_DELAY)
+                    self.analytics_subscription = self.analytics_subscription.resubscribe()
+                continue
+            try:
+                with self.analytics_stats.measure():
+                    tracked_detections = self.counter.analyze(shared_frame.image)
+                    # Trạng thái của counter chỉ được đọc trên luồng này; display vẽ bản chụp
+                    self.latest_snapshot = self.counter.snapshot(tracked_detections)
+                self.save_stats()  # Lưu thống kê định kỳ
+            except Exception as e:
+                # Không để chặng analytics dừng im lặng; chờ một lúc để lỗi lặp lại không làm ngập log
+                print(f"Camera {self.cam_id}: analytics error: {e!r}")
+                time.sleep(RECONNECT_DELAY)
+        self.analytics_subscription.close()
 
+    def frame_stats(self):
+        """
+        Số frame bị bỏ qua ở từng chặng khi xử lý hoặc giao diện chạy chậm hơn nguồn.
+
+        Returns:
+            dict: {"decode": {...}, "display": {...}} với các bộ đếm put/taken/dropped; "decode" là
+                số frame chặng analytics nhận/bỏ qua từ FrameHub.
+        """
+        subscription = self.analytics_subscription
+        return {
+            "decode": subscription.stats() if subscription else {},
+            "display": self.display_mailbox.stats(),
+        }
+
+    def stage_stats(self):
+        """
+        Thời gian xử lý của từng chặng (xem StageStats.snapshot).
+
+        Returns:
+            dict: {"decode": {...}, "analytics": {...}, "display": {...}, "stats_io": {...}, "motion_gate": {...}, "cadence": {...},
+                   "tracks": {...}}
+        """
+        subscription = self.analytics_subscription
+        return {
+            "decode": subscription.decode_stats() if subscription else {},
+            "analytics": self.analytics_stats.snapshot(),
+            "display": self.display_stats.snapshot(),
+            "stats_io": self.stats_io_stats.snapshot(),
+            # Số lần suy luận đã bỏ qua khi cảnh tĩnh
+            "motion_gate": self.counter.gate_stats() if self.counter else {},
+            # Số frame chạy mô hình và số frame chỉ dùng optical flow
+            "cadence": self.counter.cadence_stats() if self.counter else {},
+            # Số track đang giữ và bộ nhớ trạng thái track (track cũ bị xóa sau TTL)
+            "tracks": self.counter.track_stats() if self.counter else {},
+        }
+
+    def run(self):
+        self.subscription = get_frame_hub().subscribe(self.source, size=(640, 480))
+        self.analytics_thread.start()
+        self.stats_thread.start()
+        while self.running:
+            # Luôn lấy frame mới nhất, các frame cũ hơn bị bỏ qua
+            shared_frame = self.subscription.read(timeout=1.0)
+            if shared_frame is None:
+                if self.subscription.ended and self.running:
+                    time.sleep(RECONNECT_DELAY)
+                    self.subscription = self.subscription.resubscribe()
+                continue
+            with self.display_stats.measure():
                 # Tạo bản sao mới của frame gốc để vẽ ROI
-                frame_with_counts = frame.copy()
+                frame_with_counts = shared_frame.image.copy()
 
-                if self.ai_enabled and self.counter:
-                    # Đếm đối tượng và lấy các kết quả đếm
-                    frame_with_counts, _ = self.counter.count(frame)
-                    total_counts = self.counter.get_total_counts()
+                snapshot = self.latest_snapshot
+                if self.ai_enabled and self.counter and snapshot is not None:
+                    # Vẽ kết quả phân tích mới nhất, không chờ chặng analytics
+                    frame_with_counts = self.counter.annotate(frame_with_counts, snapshot)
+                    total_counts = snapshot.total_counts()
                     in_count = total_counts['in']
                     out_count = total_counts['out']
                     total = total_counts['total']
-                    self.save_stats()  # Lưu thống kê định kỳ
                 else:
                     in_count, out_count, total = 0, 0, 0
                     # Vẽ lại các ROI
@@ -87,15 +215,24 @@ class CameraThread(QThread):
                             pt1, pt2 = tuple(line[0]), tuple(line[1])  # Chuyển tọa độ ROI thành tuple
                             cv2.line(frame_with_counts, pt1, pt2, (0, 255, 0), 2)  # Vẽ ROI với màu xanh lá
 
-                # Gửi tín hiệu với thông tin frame và các số liệu đếm
-                self.frame_received.emit(self.cam_id, frame_with_counts, in_count, out_count, total)
-            else:
-                cap.set(cv2.CAP_PROP_POS_FRAMES, 0)  # Đặt lại video nếu hết đoạn
-                continue
-            self.msleep(30)  # Dừng lại 30ms trước khi tiếp tục
-        cap.release()
+            # Chỉ gửi tín hiệu khi giao diện đã lấy frame trước đó, tránh dồn tín hiệu trên event loop
+            if not self.display_mailbox.put((frame_with_counts, in_count, out_count, total)):
+                self.frame_ready.emit(self.cam_id)
+        self.subscription.close()
+        self.display_mailbox.close()
 
     def stop(self):
         self.running = False
+        self._ai_event.set()
+        if self.analytics_thread.is_alive():
+            self.analytics_thread.join()
+        if self.stats_thread.is_alive():
+            self.stats_queue.put(None)  # Ghi nốt số liệu còn trong hàng đợi rồi dừng
+            self.stats_thread.join()
+        gate = self.counter.gate_stats() if self.counter else {}
+        if gate:
+            print(f"Camera {self.cam_id}: motion gate skipped {gate['skipped']}/{gate['frames']} inferences")
+        if self.counter:
+            self.counter.close()
         self.quit()
         self.wait()
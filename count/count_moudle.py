@@ -11,8 +11,9 @@ from count.camera_thread import CameraThread
 import cv2
 import os
 from count.ROIDesign import ROIDesign
-from count.roi_manager import load_roi
+from count.roi_manager import load_roi, load_inference_config
 from count.statistic_view import StatisticsView  # Import StatisticsView từ statistic_view.py
+from count.data_manager import DataManager
 
 class CameraWidget(QWidget):
     def __init__(self, name="Camera", in_count=0, out_count=0, total=0):
@@ -88,6 +89,8 @@ class MainWindow(QMainWindow):
         self.current_page = 0
         self.grid_mode = "2x2"
         self.camera_rois = {}
+        # Một DataManager (một luồng ghi SQLite) dùng chung cho mọi camera và trang thống kê
+        self.data_manager = DataManager()
         main_layout = QHBoxLayout()
         container = QWidget()
         container.setLayout(main_layout)
@@ -111,7 +114,7 @@ class MainWindow(QMainWindow):
         self.pages.addWidget(self.camera_page)
         
         # Thêm StatisticsView thay vì placeholder
-        self.statistics_page = StatisticsView()
+        self.statistics_page = StatisticsView(self.data_manager)
         self.pages.addWidget(self.statistics_page)  # Index 1
         
         self.pages.addWidget(QLabel("Chức năng ROI và AI xử lý tại đây."))
@@ -245,8 +248,12 @@ class MainWindow(QMainWindow):
         self.display_cameras()
 
     def start_camera(self, cam_id, source):
-        thread = CameraThread(cam_id, source, model_path='yolo11n.pt', classes_to_count=[0])  # [0] là class "person"
-        thread.frame_received.connect(self.update_camera_view)
+        # Mô hình/imgsz/backend do count.autotune chọn cho từng camera, mặc định yolo11n.pt ở 640
+        inference = load_inference_config(f"Camera {cam_id}")
+        thread = CameraThread(cam_id, source, model_path=inference.get('model', 'yolo11n.pt'), classes_to_count=[0],
+                              data_manager=self.data_manager, imgsz=inference.get('imgsz', 640),
+                              backend=inference.get('backend'))  # [0] là class "person"
+        thread.frame_ready.connect(self.on_frame_ready)
         thread.start()
         self.camera_threads[cam_id] = thread
         self.load_rois(cam_id)
@@ -255,6 +262,14 @@ class MainWindow(QMainWindow):
             lambda checked: thread.set_ai_enabled(self.camera_widgets[cam_id].ai_enabled)
         )
 
+    def on_frame_ready(self, cam_id):
+        thread = self.camera_threads.get(cam_id)
+        if thread is None:
+            return
+        item = thread.display_mailbox.get_nowait()  # Frame mới nhất, các frame cũ đã bị bỏ qua
+        if item is not None:
+            self.update_camera_view(cam_id, *item)
+
     def update_camera_view(self, cam_id, frame, in_count=0, out_count=0, total=0):
         if cam_id in self.camera_rois:
             resized_frame = frame  # Frame đã là 640x480 từ CameraThread
@@ -1,18 +1,98 @@
+import collections
 import cv2
 import time
-import json
 import os
 import numpy as np
 import supervision as sv
-from ultralytics import YOLO
 import torch
+from count.stats_writer import StatsWriter
+from core.events import Event, get_event_bus
+from core.model_registry import get_model_registry
+from core.motion import MotionGate, lines_roi
+from core.flow import BoxPropagator, DetectionCadence
+from core.frame_hub import DEFAULT_FPS
+from count.line_crossing import LineCrossingEngine
+from count.sidecar import RecordingSidecars
+from count.track_store import TrackStore
+from count.zones import ZoneAnalytics
+
+
+def detection_region(lines, frame_shape, margin=0.15, min_size=192, max_fraction=0.8):
+    """
+    Padded region around the counting lines that detection needs to look at.
+
+    Args:
+        lines (list): ((x1, y1), (x2, y2)) line endpoints in frame pixels.
+        frame_shape (tuple): (h, w, ...) of the frame.
+        margin (float): Padding around the lines as a fraction of the frame size.
+        min_size (int): Smallest crop side in pixels, so objects near the lines are not cut off.
+        max_fraction (float): Use the full frame when the crop would cover more than this fraction of it.
+
+    Returns:
+        tuple: (x1, y1, x2, y2) in frame pixels, or None to use the full frame.
+    """
+    h, w = frame_shape[:2]
+    x1, y1, x2, y2 = lines_roi(lines, frame_shape, margin)
+    # Grow small regions around their center up to min_size
+    if x2 - x1 < min_size:
+        cx = (x1 + x2) // 2
+        x1, x2 = max(0, min(cx - min_size // 2, w - min_size)), min(w, max(cx + min_size // 2, min_size))
+    if y2 - y1 < min_size:
+        cy = (y1 + y2) // 2
+        y1, y2 = max(0, min(cy - min_size // 2, h - min_size)), min(h, max(cy + min_size // 2, min_size))
+    return None if (x2 - x1) * (y2 - y1) > max_fraction * w * h else (x1, y1, x2, y2)
+
+
+class AnalyticsSnapshot:
+    """
+    What annotate() draws for one analysed frame, copied when the frame was analysed.
+
+    Line counts, track and zone arrays and traces keep changing on the analytics
+    thread while the display draws. A snapshot is built once per analysed frame
+    and never modified, so it can be drawn from another thread without locking,
+    and drawing it again adds nothing to the traces.
+    """
+    __slots__ = ("detections", "labels", "traces", "line_counts", "occupancy")
+
+    def __init__(self, detections, labels, traces, line_counts, occupancy):
+        """
+        Args:
+            detections (sv.Detections): Own copy of the tracked detections, or None.
+            labels (list): Label text per detection.
+            traces (list): (track id, (K, 2) int32 recent centre points) per detection.
+            line_counts (tuple): (in, out) per line.
+            occupancy (np.ndarray): Tracks inside each zone, or None without zones.
+        """
+        self.detections = detections
+        self.labels = labels
+        self.traces = traces
+        self.line_counts = line_counts
+        self.occupancy = occupancy
+
+    def total_counts(self):
+        """
+        Get total counts across all lines at the time of the snapshot.
+
+        Returns:
+            dict: {"total": int, "in": int, "out": int}
+        """
+        total_in = sum(count[0] for count in self.line_counts)
+        total_out = sum(count[1] for count in self.line_counts)
+        return {"total": total_in + total_out, "in": total_in, "out": total_out}
+
 
 class ObjectCounter:
     """
-    ObjectCounter using YOLOv8x and supervision ByteTrack for multi-ROI counting per camera.
+    ObjectCounter using YOLO and supervision ByteTrack for multi-ROI counting per camera.
+
+    Detection and tracking run once per frame; every ROI line is then checked
+    against the same track trajectories.
     """
 
-    def __init__(self, model_path, classes_to_count, roi_list, save_interval=10, threshold=0.25, device=None):
+    def __init__(self, model_path, classes_to_count, roi_list, save_interval=10, threshold=0.25, device=None,
+                 inference_server=None, source_id=None, event_source=None, motion_threshold=0.002,
+                 roi_crop=True, crop_margin=0.15, detect_interval=1, zone_list=None, track_ttl=10.0,
+                 sidecars=True):
         """
         Initialize ObjectCounter.
 
@@ -23,6 +103,18 @@ class ObjectCounter:
             save_interval (int): Seconds between saving counts to JSON.
             threshold (float): Confidence threshold for detections.
             device (str or torch.device): Device to run model on.
+            inference_server (InferenceServer): Shared batched model; otherwise the model comes from the ModelRegistry.
+            source_id: Key identifying this camera on the inference server.
+            event_source: Video source to publish line crossing/detection events for, or None to publish nothing.
+            motion_threshold (float): Motion score around the lines below which inference is skipped, None to always infer.
+            roi_crop (bool): Run detection only on a padded region around the lines instead of the full frame.
+            crop_margin (float): Padding around the lines as a fraction of the frame size.
+            detect_interval (int or str): Run the detector every N frames and carry tracks with
+                optical flow in between; "auto" adapts N to CPU headroom and object motion.
+            zone_list (list): Polygon zones, each with 'name' and 'points', for occupancy and dwell time.
+            track_ttl (float): Seconds after which a track that is no longer seen is forgotten.
+            sidecars (bool): Write tracked detections next to recording segments of event_source
+                so counts can be recomputed later without inference (see count.recount).
         """
         self.model_path = model_path
         self.classes_to_count = classes_to_count
@@ -32,82 +124,409 @@ class ObjectCounter:
         self.last_save_time = time.time()
         self.device = device if device else ("cuda:0" if torch.cuda.is_available() else "cpu")
 
-        self.model = YOLO(self.model_path)
-        self.model.to(self.device)
+        self.inference_server = inference_server
+        self.source_id = source_id
+        self.event_source = event_source
+        self.event_bus = get_event_bus() if event_source is not None else None
+        self.sidecars = RecordingSidecars(event_source) if event_source is not None and sidecars else None
+        self.frame_shape = None
+        # Loaded on first use, in the background, and shared with every other user of the same weights
+        self.model = None
+        self.model_lock = None
 
         self.byte_tracker = sv.ByteTrack()
         self.corner_annotator = sv.BoxCornerAnnotator()
         self.label_annotator = sv.LabelAnnotator(text_position=sv.Position.CENTER)
-        self.trace_annotator = sv.TraceAnnotator(thickness=4)
+        # Recent centre points of every live track, drawn as traces; updated only by analyze()
+        self.traces = {}
+        self.trace_length = 30
+        self.trace_palette = sv.ColorPalette.DEFAULT
 
-        # Create LineZones for each ROI
-        self.line_zones = []
-        self.line_zone_annotators = []
+        # All lines share the tracker output; each line only keeps its own in/out totals
+        self.lines = []
         self.line_names = []
+        self.line_counts = []
         for roi in self.roi_list:
             if "start" in roi and "end" in roi:
-                start_point = sv.Point(int(roi['start'][0]), int(roi['start'][1]))
-                end_point = sv.Point(int(roi['end'][0]), int(roi['end'][1]))
-                line_zone = sv.LineZone(start=start_point, end=end_point)
-                self.line_zones.append(line_zone)
-                self.line_zone_annotators.append(sv.LineZoneAnnotator(thickness=4, text_thickness=4, text_scale=1.5))
-                self.line_names.append(roi.get('name', f"Line {len(self.line_zones)}"))
-                
+                start_point = (int(roi['start'][0]), int(roi['start'][1]))
+                end_point = (int(roi['end'][0]), int(roi['end'][1]))
+                self.lines.append((start_point, end_point))
+                self.line_names.append(roi.get('name', f"Line {len(self.lines)}"))
+                self.line_counts.append({"in": 0, "out": 0})
             else:
                 print(f"Invalid ROI skipped: {roi.get('name', 'No name')}")
 
-        if not self.line_zones:
+        # Occupancy and dwell time per polygon zone, looked up in a label mask
+        self.zone_analytics = ZoneAnalytics(zone_list) if zone_list else None
+        if self.zone_analytics is not None and not self.zone_analytics.names:
+            self.zone_analytics = None
+
+        if not self.lines and self.zone_analytics is None:
             raise ValueError("No valid ROIs provided for counting.")
 
-    def count(self, frame):
+        # One vectorized test of all tracks against all lines per frame
+        self.crossing_engine = LineCrossingEngine(self.lines, self.line_names)
+        # Everything detection and motion gating need to cover: line endpoints and zone outlines
+        self.region_shapes = self.lines + (self.zone_analytics.polygons if self.zone_analytics is not None else [])
+
+        # Last committed side of every line per live track (0 until the box is clear of the line); stale tracks age out
+        self.tracks = TrackStore(ttl=track_ttl, columns={"side": (np.int8, 0, len(self.lines))})
+        self.class_names = {}
+        self.count_writer = None
+
+        # Skip detection and tracking while nothing moves near the counting lines
+        self.motion_gate = MotionGate(threshold=motion_threshold) if motion_threshold is not None else None
+        self.motion_roi_shape = None
+        self.last_detections = sv.Detections.empty()
+
+        # Detection region around the lines, recomputed when the frame size changes
+        self.roi_crop = roi_crop
+        self.crop_margin = crop_margin
+        self.crop_shape = None
+        self.crop = None
+
+        # Detect every N frames; tracks are carried by optical flow in between
+        self.detect_interval = detect_interval
+        self.cadence = DetectionCadence() if detect_interval == "auto" else None
+        self.propagator = BoxPropagator() if detect_interval != 1 else None
+        self.frames_since_detect = 0
+        self.detector_runs = 0
+        self.flow_runs = 0
+
+    def detect(self, frame):
         """
-        Count objects on the frame for all ROIs.
+        Run detection on a frame, through the shared inference server when one is set.
 
         Args:
             frame (np.ndarray): Input video frame.
 
         Returns:
-            np.ndarray: Annotated frame.
-            dict: Counts per ROI line.
+            ultralytics.engine.results.Results: Detection results for the frame.
+        """
+        if self.inference_server is not None:
+            return self.inference_server.infer(self.source_id, frame)
+        if self.model is None:
+            self.model, self.device, self.model_lock = get_model_registry().get(self.model_path, device=self.device).result()
+        with self.model_lock:
+            return self.model(frame, verbose=False, device=self.device)[0]
+
+    def crop_region(self, frame_shape):
         """
-        im0 = frame.copy()
-        counts = {}
+        Region of the frame that detection runs on (see detection_region).
+
+        Args:
+            frame_shape (tuple): (h, w, ...) of the frame.
 
-        # Run YOLO model on frame
-        results = self.model(im0, verbose=False, device=self.device)[0]
+        Returns:
+            tuple: (x1, y1, x2, y2) in frame pixels, or None to use the full frame.
+        """
+        if not self.roi_crop:
+            return None
+        if self.crop_shape != frame_shape[:2]:
+            self.crop_shape = frame_shape[:2]
+            self.crop = detection_region(self.region_shapes, frame_shape, self.crop_margin)
+        return self.crop
+
+    def analyze(self, frame):
+        """
+        Detect, track and update line counts for a frame without drawing anything.
+
+        Args:
+            frame (np.ndarray): Input video frame.
+
+        Returns:
+            sv.Detections: Tracked detections on this frame (the last ones if inference was skipped).
+        """
+        if self.motion_gate is not None:
+            if self.motion_roi_shape != frame.shape[:2]:
+                self.motion_roi_shape = frame.shape[:2]
+                self.motion_gate.set_roi(lines_roi(self.region_shapes, frame.shape))
+            if not self.motion_gate.should_infer(frame):
+                return self.last_detections
+
+        self.frame_shape = frame.shape[:2]
+        if self.zone_analytics is not None:
+            self.zone_analytics.set_frame_shape(frame.shape)
+
+        now = time.perf_counter()
+        if self.propagator is None:
+            tracked_detections = self.detect_and_track(frame)
+            self.detector_runs += 1
+        else:
+            gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+            interval = self.cadence.interval if self.cadence is not None else self.detect_interval
+            self.frames_since_detect += 1
+            if self.frames_since_detect >= interval:
+                tracked_detections = self.detect_and_track(frame)
+                self.propagator.reset(gray, tracked_detections.xyxy)
+                self.frames_since_detect = 0
+                self.detector_runs += 1
+                if self.cadence is not None:
+                    self.cadence.record_detect(time.perf_counter() - now)
+            elif len(self.last_detections) == 0:
+                # Nothing to carry forward until the next detector run
+                tracked_detections = self.last_detections
+            else:
+                tracked_detections = self.propagate_and_track(gray)
+                self.flow_runs += 1
+                if self.cadence is not None:
+                    self.cadence.record_flow(time.perf_counter() - now)
+            if self.cadence is not None:
+                self.cadence.update(len(tracked_detections), self.propagator.max_speed)
+
+        self.update_counts(tracked_detections)
+        self.last_detections = tracked_detections
+        return tracked_detections
+
+    def set_source_fps(self, fps):
+        """
+        Frame rate of the source, used by the adaptive cadence as the per-frame time budget.
+
+        Sources that report no frame rate (0, as many RTSP streams do) fall back to DEFAULT_FPS,
+        otherwise the cadence would have no budget and stay at every frame.
+        """
+        if self.cadence is not None:
+            self.cadence.frame_period = 1.0 / (fps if fps and fps > 0 else DEFAULT_FPS)
+
+    def detect_and_track(self, frame):
+        """Run the detector and feed its detections to the tracker."""
+        # Run YOLO model on the region around the lines (or the full frame)
+        region = self.crop_region(frame.shape)
+        if region is not None:
+            x1, y1, x2, y2 = region
+            results = self.detect(frame[y1:y2, x1:x2])
+        else:
+            results = self.detect(frame)
+        self.class_names = results.names
 
         # Filter detections by class and confidence
         detections = sv.Detections.from_ultralytics(results)
+        if region is not None and len(detections) > 0:
+            # Back to full-frame coordinates for tracking, line tests and drawing
+            detections.xyxy = detections.xyxy + np.array([x1, y1, x1, y1], dtype=detections.xyxy.dtype)
         detections = detections[np.isin(detections.class_id, self.classes_to_count) & (detections.confidence > self.threshold)]
 
         # Update tracker
-        tracked_detections = self.byte_tracker.update_with_detections(detections)
+        return self.byte_tracker.update_with_detections(detections)
+
+    def propagate_and_track(self, gray):
+        """Move the last tracked boxes with optical flow and feed them to the tracker."""
+        last = self.last_detections
+        propagated = sv.Detections(
+            xyxy=self.propagator.propagate(gray, last.xyxy).astype(last.xyxy.dtype),
+            confidence=last.confidence,
+            class_id=last.class_id,
+        )
+        # Keeping the tracker updated every frame keeps its IDs stable across detector runs
+        return self.byte_tracker.update_with_detections(propagated)
+
+    def update_counts(self, tracked_detections):
+        """Update line counts and zone occupancy and publish events from the boxes of each track."""
+        now = time.monotonic()
+        if self.sidecars is not None:
+            self.sidecars.write(self.frame_shape, time.time(), tracked_detections)
+        if self.zone_analytics is not None:
+            self.update_zones(tracked_detections, now)
+        # Check every line against the side each track was last committed to
+        if tracked_detections is not None and len(tracked_detections) > 0:
+            track_ids = tracked_detections.tracker_id.astype(int)
+            slots = self.tracks.touch(track_ids, now)
+            side = self.tracks["side"]
+            crossings, side[slots] = self.crossing_engine.update(track_ids, tracked_detections.xyxy, side[slots])
+            centers = tracked_detections.get_anchors_coordinates(sv.Position.CENTER).astype(np.int32)
+            for tid, point in zip(track_ids.tolist(), centers):
+                self.traces.setdefault(tid, collections.deque(maxlen=self.trace_length)).append(point)
+
+            for tid, idx, direction in crossings:
+                self.line_counts[idx]["in" if direction > 0 else "out"] += 1
+                if self.event_bus is not None:
+                    self.event_bus.publish(Event("line_crossing", self.event_source, {
+                        "line": self.line_names[idx],
+                        "direction": "in" if direction > 0 else "out",
+                        "track_id": tid,
+                    }))
+            if self.event_bus is not None:
+                self.event_bus.publish(Event("detection", self.event_source, {"count": len(tracked_detections)}))
+        for tid in self.tracks.evict(now)[1].tolist():
+            self.traces.pop(tid, None)
+
+    def update_zones(self, tracked_detections, now):
+        """Move tracks between zones by the bottom center of their box (where people stand)."""
+        if tracked_detections is not None and len(tracked_detections) > 0:
+            track_ids = tracked_detections.tracker_id.astype(int)
+            points = tracked_detections.get_anchors_coordinates(sv.Position.BOTTOM_CENTER)
+        else:
+            track_ids, points = np.zeros(0, dtype=int), np.zeros((0, 2))
+        events = self.zone_analytics.update(track_ids, points, now)
+        if self.event_bus is not None:
+            for kind, tid, zone, dwell in events:
+                data = {"zone": self.zone_analytics.names[zone], "track_id": tid}
+                if kind == "exit":
+                    data["dwell"] = round(dwell, 2)
+                self.event_bus.publish(Event(f"zone_{kind}", self.event_source, data))
+
+    def snapshot(self, tracked_detections):
+        """
+        Copy what annotate() needs for the frame just analysed.
+
+        Call on the thread that runs analyze(); the snapshot can then be drawn from any thread.
 
-        # Annotate bounding boxes and traces
-        im0 = self.trace_annotator.annotate(scene=im0, detections=tracked_detections)
-        im0 = self.corner_annotator.annotate(scene=im0, detections=tracked_detections)
+        Args:
+            tracked_detections (sv.Detections): Output of analyze().
 
-        labels = []
+        Returns:
+            AnalyticsSnapshot: Immutable drawing state.
+        """
+        labels, traces = [], []
         if tracked_detections is not None and len(tracked_detections) > 0:
+            # Indexing copies the arrays, so later tracker updates cannot change them
+            tracked_detections = tracked_detections[np.arange(len(tracked_detections))]
             for cls_id, conf, tid in zip(tracked_detections.class_id, tracked_detections.confidence, tracked_detections.tracker_id):
-                class_name = self.model.model.names.get(int(cls_id), str(cls_id)) if hasattr(self, 'model') else str(cls_id)
+                class_name = self.class_names.get(int(cls_id), str(cls_id))
                 labels.append(f"#{tid} {class_name} {conf:.2f}")
-        im0 = self.label_annotator.annotate(scene=im0, detections=tracked_detections, labels=labels)
+                points = self.traces.get(int(tid))
+                if points:
+                    traces.append((int(tid), np.array(points, dtype=np.int32)))
+        else:
+            tracked_detections = None
+        line_counts = tuple((line_count["in"], line_count["out"]) for line_count in self.line_counts)
+        occupancy = self.zone_analytics.occupancy() if self.zone_analytics is not None else None
+        return AnalyticsSnapshot(tracked_detections, labels, traces, line_counts, occupancy)
+
+    def annotate(self, im0, snapshot):
+        """
+        Draw tracked detections, traces and counting lines on a frame.
+
+        Only reads the snapshot and the fixed line/zone geometry, so it is safe to
+        call on the display thread while analyze() runs on another.
+
+        Args:
+            im0 (np.ndarray): Writable frame to draw on.
+            snapshot (AnalyticsSnapshot): Output of snapshot(), possibly from an earlier frame.
+
+        Returns:
+            np.ndarray: Annotated frame.
+        """
+        for tid, points in snapshot.traces:
+            cv2.polylines(im0, [points.reshape(-1, 1, 2)], False, self.trace_palette.by_idx(tid).as_bgr(), 4)
+        if snapshot.detections is not None:
+            im0 = self.corner_annotator.annotate(scene=im0, detections=snapshot.detections)
+            im0 = self.label_annotator.annotate(scene=im0, detections=snapshot.detections, labels=snapshot.labels)
+
+        for idx in range(len(self.lines)):
+            im0 = self.draw_line(im0, idx, snapshot.line_counts[idx])
+        if snapshot.occupancy is not None:
+            im0 = self.draw_zones(im0, snapshot.occupancy)
+        return im0
+
+    def cadence_stats(self):
+        """
+        Detector and optical-flow frames since start.
+
+        Returns:
+            dict: {"interval", "detector_runs", "flow_runs"}
+        """
+        interval = self.cadence.interval if self.cadence is not None else self.detect_interval
+        return {"interval": interval, "detector_runs": self.detector_runs, "flow_runs": self.flow_runs}
+
+    def gate_stats(self):
+        """
+        Inferences run and skipped by the motion gate (see MotionGate.stats).
+
+        Returns:
+            dict: Gate counters, empty if gating is disabled.
+        """
+        return self.motion_gate.stats() if self.motion_gate is not None else {}
+
+    def track_stats(self):
+        """
+        Live tracks and memory held by per-track state (see TrackStore.stats).
+
+        Returns:
+            dict: {"lines": {...}, "zones": {...}}, "zones" only when zones are configured.
+        """
+        stats = {"lines": self.tracks.stats()}
+        if self.zone_analytics is not None:
+            stats["zones"] = self.zone_analytics.tracks.stats()
+        return stats
+
+    def get_line_counts(self):
+        """
+        Get in/out counts per line.
+
+        Returns:
+            dict: {line name: {"in": int, "out": int}}
+        """
+        return {self.line_names[idx]: dict(line_count) for idx, line_count in enumerate(self.line_counts)}
 
-        # Count objects crossing each line zone
-        for idx, line_zone in enumerate(self.line_zones):
-            line_zone.trigger(tracked_detections)
-            im0 = self.line_zone_annotators[idx].annotate(im0, line_counter=line_zone)
-            counts[self.line_names[idx]] = {"in": line_zone.in_count, "out": line_zone.out_count}
+    def count(self, frame):
+        """
+        Count objects on the frame for all ROIs.
 
-        return im0, counts
+        Args:
+            frame (np.ndarray): Input video frame.
+
+        Returns:
+            np.ndarray: Annotated frame.
+            dict: Counts per ROI line.
+        """
+        tracked_detections = self.analyze(frame)
+        im0 = self.annotate(frame.copy(), self.snapshot(tracked_detections))
+        return im0, self.get_line_counts()
+
+    def draw_line(self, im0, idx, line_count):
+        """
+        Draw a counting line with its name and in/out totals.
+
+        Args:
+            im0 (np.ndarray): Frame to draw on.
+            idx (int): Index of the line in self.lines.
+            line_count (tuple): (in, out) totals to show.
+
+        Returns:
+            np.ndarray: Annotated frame.
+        """
+        start, end = self.lines[idx]
+        cv2.line(im0, start, end, (255, 255, 255), 4)
+        text = f"{self.line_names[idx]}: In {line_count[0]} / Out {line_count[1]}"
+        cv2.putText(im0, text, (start[0], max(start[1] - 10, 15)),
+                    cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 255), 2)
+        return im0
+
+    def draw_zones(self, im0, occupancy):
+        """
+        Draw zone outlines with their live occupancy.
+
+        Args:
+            im0 (np.ndarray): Frame to draw on.
+            occupancy (np.ndarray): Tracks inside each zone.
+
+        Returns:
+            np.ndarray: Annotated frame.
+        """
+        for idx, points in enumerate(self.zone_analytics.polygons):
+            cv2.polylines(im0, [np.array(points, dtype=np.int32)], True, (0, 200, 255), 2)
+            text = f"{self.zone_analytics.names[idx]}: {int(occupancy[idx])}"
+            cv2.putText(im0, text, (points[0][0], max(points[0][1] - 10, 15)),
+                        cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 200, 255), 2)
+        return im0
+
+    def get_zone_stats(self):
+        """
+        Get occupancy and dwell time per zone (see ZoneAnalytics.get_stats).
+
+        Returns:
+            dict: {zone name: {"occupancy", "visits", "avg_dwell", "max_dwell"}}, empty without zones.
+        """
+        return self.zone_analytics.get_stats() if self.zone_analytics is not None else {}
 
     def save_counts(self, filename):
         """
-        Save counts to JSON file if save interval elapsed.
+        Append counts to a line-delimited JSON series if save interval elapsed.
 
         Args:
-            filename (str): Path to JSON file.
+            filename (str): Series path; the extension is replaced by ".jsonl"
+                (see count.stats_writer.StatsWriter).
         """
         current_time = time.time()
         if current_time - self.last_save_time >= self.save_interval:
@@ -115,24 +534,29 @@ class ObjectCounter:
                 "timestamp": time.strftime("%Y-%m-%d %H:%M:%S", time.localtime()),
                 "counts": {}
             }
-            for idx, line_zone in enumerate(self.line_zones):
-                data["counts"][self.line_names[idx]] = {"in": line_zone.in_count, "out": line_zone.out_count}
+            for idx, line_count in enumerate(self.line_counts):
+                data["counts"][self.line_names[idx]] = dict(line_count)
+            if self.zone_analytics is not None:
+                data["zones"] = self.get_zone_stats()
 
-            # Append to existing JSON or create new
-            try:
-                with open(filename, 'r') as f:
-                    existing_data = json.load(f)
-            except (FileNotFoundError, json.JSONDecodeError):
-                existing_data = []
-
-            existing_data.append(data)
-            os.makedirs(os.path.dirname(filename), exist_ok=True)
-            with open(filename, 'w') as f:
-                json.dump(existing_data, f, indent=4)
+            # Append one line instead of rewriting the whole history
+            base_path = os.path.splitext(filename)[0]
+            if self.count_writer is None or self.count_writer.base_path != base_path:
+                if self.count_writer is not None:
+                    self.count_writer.close()
+                self.count_writer = StatsWriter(base_path)
+            self.count_writer.append(data)
 
             self.last_save_time = current_time
             print(f"Saved counts to {filename} at {data['timestamp']}")
 
+    def close(self):
+        """Stop writing detection sidecars and flush the count series."""
+        if self.sidecars is not None:
+            self.sidecars.close()
+        if self.count_writer is not None:
+            self.count_writer.close()
+
     def get_total_counts(self):
         """
         Get total counts across all lines.
@@ -140,6 +564,6 @@ class ObjectCounter:
         Returns:
             dict: {"total": int, "in": int, "out": int}
         """
-        total_in = sum(line_zone.in_count for line_zone in self.line_zones)
-        total_out = sum(line_zone.out_count for line_zone in self.line_zones)
+        total_in = sum(line_count["in"] for line_count in self.line_counts)
+        total_out = sum(line_count["out"] for line_count in self.line_counts)
         return {"total": total_in + total_out, "in": total_in, "out": total_out}
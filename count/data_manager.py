@@ -1,14 +1,58 @@
 import sqlite3
 import os
+import threading
+import queue
+import time
+import atexit
 from datetime import datetime
 
+_STOP = object()
+_REBUILD = object()
+
+# Bảng tổng hợp theo khung thời gian: tên bảng -> định dạng strftime của bucket
+ROLLUPS = {
+    "minute": ("stats_minute", "%Y-%m-%d %H:%M"),
+    "hour": ("stats_hour", "%Y-%m-%d %H:00"),
+    "day": ("stats_day", "%Y-%m-%d"),
+    "month": ("stats_month", "%Y-%m"),
+}
+
 class DataManager:
-    def __init__(self, db_path="stats_data/stats.db"):
+    """
+    SQLite store for per-camera counting stats.
+
+    `conn` is a reader connection for the GUI thread. All writes go through
+    a queue to a dedicated writer thread with its own connection, which
+    batches rows with executemany and commits when `batch_size` rows are
+    pending or `flush_interval` seconds have passed. The database runs in WAL
+    mode so the GUI can read while the writer commits.
+
+    Every row written also updates minute/hour/day/month rollup tables in the
+    same transaction. Stats rows carry running totals since the counter
+    started, so the rollups store the increase since the previous row of the
+    same camera (a drop in the running total is treated as a counter restart).
+    Dashboards read the rollups through query_rollup() and totals(). Rebuilding
+    the rollups of an existing database also runs on the writer thread.
+    """
+    def __init__(self, db_path="stats_data/stats.db", batch_size=200, flush_interval=1.0):
         self.db_path = db_path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
         os.makedirs(os.path.dirname(db_path), exist_ok=True)
         self.conn = sqlite3.connect(db_path)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.queue = queue.Queue()
         self.create_table()
 
+        self.rows_written = 0
+        self.commits = 0
+        self.closed = False
+        self._last_totals = {}  # Chỉ dùng trong luồng ghi
+        self.writer_thread = threading.Thread(target=self._writer_loop, name="stats-db-writer", daemon=True)
+        self.writer_thread.start()
+        # Ghi nốt các dòng còn trong hàng đợi khi thoát chương trình
+        atexit.register(self.close)
+
     def create_table(self):
         cursor = self.conn.cursor()
         cursor.execute('''
@@ -24,16 +68,231 @@ class DataManager:
         # Tạo chỉ mục cho camera_id và timestamp để truy vấn nhanh hơn
         cursor.execute('CREATE INDEX IF NOT EXISTS idx_camera_id ON stats(camera_id)')
         cursor.execute('CREATE INDEX IF NOT EXISTS idx_timestamp ON stats(timestamp)')
+        for table, _ in ROLLUPS.values():
+            cursor.execute(f'''
+                CREATE TABLE IF NOT EXISTS {table} (
+                    camera_id INTEGER,
+                    bucket TEXT,
+                    in_count INTEGER,
+                    out_count INTEGER,
+                    samples INTEGER,
+                    PRIMARY KEY (camera_id, bucket)
+                ) WITHOUT ROWID
+            ''')
+            cursor.execute(f'CREATE INDEX IF NOT EXISTS idx_{table}_bucket ON {table}(bucket)')
         self.conn.commit()
+        # Lần đầu nâng cấp: tổng hợp lại từ dữ liệu thô đã có (trên luồng ghi, không chặn giao diện)
+        has_rollups = cursor.execute('SELECT 1 FROM stats_day LIMIT 1').fetchone()
+        has_stats = cursor.execute('SELECT 1 FROM stats LIMIT 1').fetchone()
+        if has_stats and not has_rollups:
+            self.rebuild_rollups()
+
+    def _rollup_rows(self, rows, last_totals):
+        """
+        Turn (cam_id, timestamp, in, out, total) rows into rollup increments.
+
+        Args:
+            rows (list): Stats rows in write order.
+            last_totals (dict): cam_id -> (in, out) of the previous row; updated in place.
+
+        Returns:
+            dict: granularity -> {(cam_id, bucket): [in_delta, out_delta, samples]}
+        """
+        increments = {granularity: {} for granularity in ROLLUPS}
+        for cam_id, timestamp, in_count, out_count, _ in rows:
+            prev_in, prev_out = last_totals.get(cam_id, (0, 0))
+            in_delta = in_count - prev_in if in_count >= prev_in else in_count
+            out_delta = out_count - prev_out if out_count >= prev_out else out_count
+            last_totals[cam_id] = (in_count, out_count)
+            moment = datetime.strptime(timestamp, "%Y-%m-%d %H:%M:%S")
+            for granularity, (_, fmt) in ROLLUPS.items():
+                entry = increments[granularity].setdefault((cam_id, moment.strftime(fmt)), [0, 0, 0])
+                entry[0] += in_delta
+                entry[1] += out_delta
+                entry[2] += 1
+        return increments
+
+    def _apply_rollups(self, conn, increments):
+        for granularity, buckets in increments.items():
+            table = ROLLUPS[granularity][0]
+            conn.executemany(f'''
+                INSERT INTO {table} (camera_id, bucket, in_count, out_count, samples)
+                VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT (camera_id, bucket) DO UPDATE SET
+                    in_count = in_count + excluded.in_count,
+                    out_count = out_count + excluded.out_count,
+                    samples = samples + excluded.samples
+            ''', [(cam_id, bucket, d_in, d_out, n) for (cam_id, bucket), (d_in, d_out, n) in buckets.items()])
+
+    def rebuild_rollups(self):
+        """
+        Queue a recompute of every rollup table from the raw stats table.
+
+        The rebuild runs on the writer thread after the rows queued before it;
+        call flush() to wait for it.
+        """
+        self.queue.put(_REBUILD)
+
+    def _rebuild_rollups(self, conn, chunk_size=10000):
+        last_totals = {}
+        with conn:
+            for table, _ in ROLLUPS.values():
+                conn.execute(f'DELETE FROM {table}')
+            cursor = conn.execute('''
+                SELECT camera_id, timestamp, in_count, out_count, total_count FROM stats ORDER BY id
+            ''')
+            while True:
+                rows = cursor.fetchmany(chunk_size)
+                if not rows:
+                    break
+                self._apply_rollups(conn, self._rollup_rows(rows, last_totals))
 
     def save_stats(self, cam_id, in_count, out_count, total_count):
-        cursor = self.conn.cursor()
+        """Queue one stats row; never blocks on disk."""
         timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        cursor.execute('''
-            INSERT INTO stats (camera_id, timestamp, in_count, out_count, total_count)
-            VALUES (?, ?, ?, ?, ?)
-        ''', (cam_id, timestamp, in_count, out_count, total_count))
-        self.conn.commit()
+        self.queue.put((cam_id, timestamp, in_count, out_count, total_count))
+
+    def flush(self, timeout=None):
+        """
+        Wait until every row queued so far has been committed.
+
+        Returns:
+            bool: True if the flush completed within the timeout.
+        """
+        if self.closed:
+            return True
+        done = threading.Event()
+        self.queue.put(done)
+        return done.wait(timeout)
+
+    def _write_batch(self, conn, rows):
+        increments = self._rollup_rows(rows, self._last_totals)
+        with conn:
+            conn.executemany('''
+                INSERT INTO stats (camera_id, timestamp, in_count, out_count, total_count)
+                VALUES (?, ?, ?, ?, ?)
+            ''', rows)
+            self._apply_rollups(conn, increments)
+        self.rows_written += len(rows)
+        self.commits += 1
+
+    def _writer_loop(self):
+        conn = sqlite3.connect(self.db_path)
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        pending = []
+        waiters = []
+        oldest = None  # Thời điểm dòng đầu tiên trong lô hiện tại được nhận
+        stopping = False
+        while not stopping:
+            timeout = None
+            if pending:
+                timeout = max(0.0, self.flush_interval - (time.monotonic() - oldest))
+            items = []
+            try:
+                items.append(self.queue.get(timeout=timeout))
+                # Lấy luôn các dòng đang chờ để ghi một lần
+                while len(items) < self.batch_size:
+                    items.append(self.queue.get_nowait())
+            except queue.Empty:
+                pass
+
+            for item in items:
+                if item is _STOP:
+                    stopping = True
+                elif item is _REBUILD:
+                    try:
+                        # Rows queued before the rebuild are part of it
+                        if pending:
+                            self._write_batch(conn, pending)
+                            pending = []
+                        self._rebuild_rollups(conn)
+                    except sqlite3.Error as e:
+                        print(f"Error rebuilding stats rollups: {e}")
+                elif isinstance(item, threading.Event):
+                    waiters.append(item)
+                else:
+                    if not pending:
+                        oldest = time.monotonic()
+                    pending.append(item)
+
+            if pending and (stopping or waiters or len(pending) >= self.batch_size
+                            or time.monotonic() - oldest >= self.flush_interval):
+                try:
+                    self._write_batch(conn, pending)
+                except sqlite3.Error as e:
+                    print(f"Error writing stats batch: {e}")
+                pending = []
+            for waiter in waiters:
+                waiter.set()
+            waiters = []
+        conn.close()
+
+    def query_rollup(self, granularity, camera_id=None, start=None, end=None):
+        """
+        Read IN/OUT per time bucket from a rollup table.
+
+        Args:
+            granularity (str): "minute", "hour", "day" or "month".
+            camera_id (int): Only this camera, or None to sum all cameras.
+            start (str): First bucket to include, in the table's bucket format (see ROLLUPS);
+                buckets are compared as text, so a finer-grained timestamp skips the bucket it falls in.
+            end (str): Last bucket to include.
+
+        Returns:
+            list: [(bucket, in_count, out_count)] ordered by bucket.
+        """
+        table = ROLLUPS[granularity][0]
+        conditions = []
+        params = []
+        if camera_id is not None:
+            conditions.append('camera_id = ?')
+            params.append(camera_id)
+        if start is not None:
+            conditions.append('bucket >= ?')
+            params.append(start)
+        if end is not None:
+            conditions.append('bucket <= ?')
+            params.append(end)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ''
+        return self.conn.execute(f'''
+            SELECT bucket, SUM(in_count), SUM(out_count) FROM {table}
+            {where}
+            GROUP BY bucket ORDER BY bucket
+        ''', params).fetchall()
+
+    def totals(self, camera_id=None, start=None, end=None, granularity="day"):
+        """
+        Sum IN/OUT over a range of buckets.
+
+        Returns:
+            tuple: (in_count, out_count)
+        """
+        rows = self.query_rollup(granularity, camera_id, start, end)
+        return sum(row[1] for row in rows), sum(row[2] for row in rows)
+
+    def latest_stats(self, camera_id):
+        """
+        Get the most recent raw stats row of a camera.
+
+        Returns:
+            tuple: (in_count, out_count, total_count) or None.
+        """
+        return self.conn.execute('''
+            SELECT in_count, out_count, total_count FROM stats
+            WHERE camera_id = ?
+            ORDER BY id DESC LIMIT 1
+        ''', (camera_id,)).fetchone()
+
+    def camera_ids(self):
+        """List the cameras that have rollup data."""
+        return [row[0] for row in self.conn.execute('SELECT DISTINCT camera_id FROM stats_month ORDER BY camera_id')]
 
     def close(self):
+        """Flush queued rows, stop the writer thread and close the connections."""
+        if self.closed:
+            return
+        self.closed = True
+        self.queue.put(_STOP)
+        self.writer_thread.join()
         self.conn.close()
@@ -0,0 +1,251 @@
+"""
+Đếm lại số liệu lịch sử từ file phát hiện (.trk) đi kèm các đoạn ghi hình, không chạy mô hình.
+
+Usage:
+    python -m count.recount --camera 1 --date 2025-01-01
+    python -m count.recount --camera 1 --roi new_layout.json --sidecars recordings/camera_1 --bucket 3600 --json out.json
+
+ObjectCounter ghi mọi detection đã track vào file .trk cạnh từng đoạn ghi
+(xem count.sidecar). Công cụ này đọc các file đó bằng memmap và áp lại bất kỳ
+bộ đường line / vùng nào (mặc định là cấu hình hiện tại trong
+roi_data/Camera N.json) cho toàn bộ quỹ đạo trong một lần tính vector hóa.
+Quy ước giống lúc đếm trực tiếp: line dùng bốn góc hộp (như LineZone), vùng
+dùng điểm giữa cạnh dưới, track vắng quá `track_ttl` giây (vùng: `zone_grace` giây) được coi là
+track mới.
+"""
+import argparse
+import glob
+import json
+import os
+import time
+from datetime import datetime, timedelta
+import numpy as np
+from count.line_crossing import LineCrossingEngine
+from count.roi_manager import load_roi, load_zones
+from count.sidecar import RECORD, SIDECAR_EXTENSION, open_sidecar
+from count.zones import ZoneAnalytics, ZoneMap
+
+# Số bản ghi tính phía với các line mỗi lượt, giới hạn bộ nhớ tạm
+CHUNK = 1 << 16
+
+
+def find_sidecars(paths):
+    """Mọi file .trk trong các đường dẫn (file hoặc thư mục, duyệt đệ quy)."""
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files.extend(glob.glob(os.path.join(path, "**", f"*{SIDECAR_EXTENSION}"), recursive=True))
+        elif os.path.exists(path):
+            files.append(path)
+    return sorted(set(files))
+
+
+def load_tracks(files, start=None, end=None):
+    """
+    Gộp các bản ghi của nhiều file .trk trong khoảng thời gian [start, end).
+
+    Returns:
+        tuple: (bản ghi RECORD đã sắp theo track rồi thời gian, khóa track int64, (h, w) của frame phân tích)
+    """
+    parts, keys, shape = [], [], None
+    for path in files:
+        try:
+            header, rows = open_sidecar(path)
+        except (OSError, ValueError) as e:
+            print(f"Bỏ qua {path}: {e}")
+            continue
+        if len(rows) == 0 or (end is not None and header["start_time"] >= end):
+            continue
+        if shape is None:
+            shape = (int(header["height"]), int(header["width"]))
+        elif shape != (int(header["height"]), int(header["width"])):
+            print(f"Bỏ qua {path}: kích thước frame {header['width']}x{header['height']} khác {shape[1]}x{shape[0]}")
+            continue
+        mask = np.ones(len(rows), dtype=bool)
+        if start is not None:
+            mask &= rows["time"] >= start
+        if end is not None:
+            mask &= rows["time"] < end
+        rows = np.asarray(rows[mask])
+        parts.append(rows)
+        # ID track chỉ duy nhất trong một lần chạy tracker
+        keys.append((np.int64(header["run_id"]) << 32) | rows["track_id"].astype(np.int64))
+    if not parts:
+        return np.zeros(0, dtype=RECORD), np.zeros(0, dtype=np.int64), shape
+    rows, keys = np.concatenate(parts), np.concatenate(keys)
+    order = np.lexsort((rows["time"], keys))
+    return rows[order], keys[order], shape
+
+
+def _bucket_index(times, origin, bucket):
+    if not bucket:
+        return np.zeros(len(times), dtype=np.intp)
+    return ((times - origin) // bucket).astype(np.intp)
+
+
+def recount_lines(rows, keys, roi_list, track_ttl=10.0, bucket=None, origin=0.0):
+    """
+    Số lượt vào/ra của từng line.
+
+    Returns:
+        tuple: (tên các line, mảng (B, L, 2) số lượt "in"/"out" theo từng khoảng thời gian)
+    """
+    engine = LineCrossingEngine.from_rois(roi_list)
+    times = rows["time"]
+    # Mỗi đoạn là chuỗi bản ghi liên tiếp của cùng một track, không vắng quá track_ttl
+    continues = np.zeros(len(rows), dtype=bool)
+    continues[1:] = (keys[1:] == keys[:-1]) & (np.diff(times) <= track_ttl)
+    segment = np.cumsum(~continues)
+    buckets = _bucket_index(times, origin, bucket)
+    counts = np.zeros((int(buckets.max()) + 1 if len(buckets) else 1, len(engine.names), 2), dtype=np.int64)
+    sides = np.zeros((len(rows), len(engine.names)), dtype=np.int8)
+    for i in range(0, len(rows), CHUNK):
+        sides[i:i + CHUNK] = engine.sides(rows["box"][i:i + CHUNK])
+    for line in range(len(engine.names)):
+        # Chỉ bản ghi có phía rõ ràng mới được ghi nhận; đếm khi phía khác lần ghi nhận trước của cùng đoạn
+        committed = np.nonzero(sides[:, line])[0]
+        side = sides[committed, line]
+        crossed = (segment[committed[1:]] == segment[committed[:-1]]) & (side[1:] != side[:-1])
+        np.add.at(counts, (buckets[committed[1:][crossed]], line, (side[1:][crossed] < 0).astype(np.intp)), 1)
+    return engine.names, counts
+
+
+def recount_zones(rows, keys, zone_list, frame_shape, zone_grace=2.0, bucket=None, origin=0.0):
+    """
+    Số lượt vào và thời gian lưu lại trong từng vùng.
+
+    Returns:
+        tuple: (tên các vùng, mảng (B, Z) số lượt vào, tổng dwell (Z,), số lượt (Z,), dwell lớn nhất (Z,))
+    """
+    zones = ZoneAnalytics(zone_list)
+    count = len(zones.names)
+    times = rows["time"]
+    boxes = rows["box"]
+    bottoms = np.stack([(boxes[:, 0] + boxes[:, 2]) / 2, boxes[:, 3]], axis=1)
+    zone = ZoneMap(zones.polygons, frame_shape).lookup(bottoms)
+    buckets = _bucket_index(times, origin, bucket)
+    visits = np.zeros((int(buckets.max()) + 1 if len(buckets) else 1, count), dtype=np.int64)
+    if len(rows) == 0 or count == 0:
+        return zones.names, visits, np.zeros(count), np.zeros(count, dtype=np.int64), np.zeros(count)
+
+    # Một "lượt" là chuỗi bản ghi liên tiếp của cùng track trong cùng vùng
+    continues = np.zeros(len(rows), dtype=bool)
+    continues[1:] = (keys[1:] == keys[:-1]) & (np.diff(times) <= zone_grace)
+    run_start = ~continues
+    run_start[1:] |= zone[1:] != zone[:-1]
+    starts = np.nonzero(run_start)[0]
+    ends = np.append(starts[1:], len(rows)) - 1
+    inside = zone[starts] >= 0
+    starts, ends = starts[inside], ends[inside]
+    run_zone = zone[starts]
+    np.add.at(visits, (buckets[starts], run_zone), 1)
+
+    # Ra khỏi vùng ở bản ghi kế tiếp nếu track vẫn tiếp tục, nếu không thì ở lần thấy cuối
+    following = np.minimum(ends + 1, len(rows) - 1)
+    moved_on = (ends + 1 < len(rows)) & continues[following]
+    exit_time = np.where(moved_on, times[following], times[ends])
+    dwell = exit_time - times[starts]
+    # Lượt cuối cùng chưa kết thúc nếu track vẫn trong vùng ở cuối dữ liệu; vẫn tính đến lần thấy cuối
+    dwell_total = np.bincount(run_zone, weights=dwell, minlength=count)
+    completed = np.bincount(run_zone, minlength=count)
+    dwell_max = np.zeros(count)
+    np.maximum.at(dwell_max, run_zone, dwell)
+    return zones.names, visits, dwell_total, completed, dwell_max
+
+
+def recount(files, roi_list, zone_list, start=None, end=None, bucket=None, track_ttl=10.0, zone_grace=2.0):
+    """
+    Đếm lại từ các file .trk.
+
+    Args:
+        files (list): Các file .trk.
+        roi_list (list): Các đường line ('name', 'start', 'end').
+        zone_list (list): Các vùng ('name', 'points').
+        start (float): time.time() bắt đầu, None để lấy hết.
+        end (float): time.time() kết thúc (không tính), None để lấy hết.
+        bucket (float): Độ dài mỗi khoảng thống kê (giây), None để chỉ lấy tổng.
+        track_ttl (float): Như ObjectCounter.track_ttl.
+        zone_grace (float): Như ZoneAnalytics.grace.
+
+    Returns:
+        dict: {"rows", "lines": {...}, "zones": {...}, "buckets": [...]} cùng định dạng với số liệu đếm trực tiếp.
+    """
+    rows, keys, frame_shape = load_tracks(files, start, end)
+    origin = start if start is not None else (float(rows["time"].min()) if len(rows) else 0.0)
+    result = {"rows": int(len(rows)), "lines": {}, "zones": {}}
+
+    line_names, line_counts = recount_lines(rows, keys, roi_list, track_ttl, bucket, origin) if roi_list else ([], None)
+    for idx, name in enumerate(line_names):
+        result["lines"][name] = {"in": int(line_counts[:, idx, 0].sum()), "out": int(line_counts[:, idx, 1].sum())}
+
+    zone_names, visits = [], None
+    if zone_list and frame_shape is not None:
+        zone_names, visits, dwell_total, completed, dwell_max = recount_zones(
+            rows, keys, zone_list, frame_shape, zone_grace, bucket, origin)
+        for idx, name in enumerate(zone_names):
+            result["zones"][name] = {
+                "visits": int(visits[:, idx].sum()),
+                "avg_dwell": round(float(dwell_total[idx] / completed[idx]), 1) if completed[idx] else 0.0,
+                "max_dwell": round(float(dwell_max[idx]), 1),
+            }
+
+    if bucket:
+        total = max(len(line_counts) if line_counts is not None else 0, len(visits) if visits is not None else 0)
+        result["buckets"] = []
+        for b in range(total):
+            entry = {"start": datetime.fromtimestamp(origin + b * bucket).strftime("%Y-%m-%d %H:%M:%S"),
+                     "counts": {}, "zones": {}}
+            if line_counts is not None and b < len(line_counts):
+                entry["counts"] = {name: {"in": int(line_counts[b, i, 0]), "out": int(line_counts[b, i, 1])}
+                                   for i, name in enumerate(line_names)}
+            if visits is not None and b < len(visits):
+                entry["zones"] = {name: {"visits": int(visits[b, i])} for i, name in enumerate(zone_names)}
+            result["buckets"].append(entry)
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--camera", type=int, required=True)
+    parser.add_argument("--roi", default=None, help="File JSON có khóa \"lines\"/\"zones\" (mặc định roi_data/Camera N.json)")
+    parser.add_argument("--sidecars", nargs="*", default=None, help="File/thư mục .trk (mặc định recordings/camera_N)")
+    parser.add_argument("--date", default=None, help="Ngày cần đếm lại, YYYY-MM-DD")
+    parser.add_argument("--start", default=None, help="YYYY-MM-DD HH:MM:SS")
+    parser.add_argument("--end", default=None, help="YYYY-MM-DD HH:MM:SS")
+    parser.add_argument("--bucket", type=float, default=None, help="Thống kê theo từng khoảng (giây), ví dụ 3600")
+    parser.add_argument("--track-ttl", type=float, default=10.0)
+    parser.add_argument("--zone-grace", type=float, default=2.0)
+    parser.add_argument("--json", default=None, help="Ghi kết quả ra file JSON")
+    args = parser.parse_args()
+
+    if args.roi:
+        with open(args.roi, "r") as f:
+            config = json.load(f)
+        roi_list, zone_list = config.get("lines", []), config.get("zones", [])
+    else:
+        roi_list, zone_list = load_roi(f"Camera {args.camera}"), load_zones(f"Camera {args.camera}")
+    start = end = None
+    if args.date:
+        day = datetime.strptime(args.date, "%Y-%m-%d")
+        start, end = day.timestamp(), (day + timedelta(days=1)).timestamp()
+    if args.start:
+        start = datetime.strptime(args.start, "%Y-%m-%d %H:%M:%S").timestamp()
+    if args.end:
+        end = datetime.strptime(args.end, "%Y-%m-%d %H:%M:%S").timestamp()
+
+    files = find_sidecars(args.sidecars or [os.path.join("recordings", f"camera_{args.camera}")])
+    began = time.perf_counter()
+    result = recount(files, roi_list, zone_list, start, end, args.bucket,
+                     args.track_ttl, args.zone_grace)
+    print(f"Đếm lại {result['rows']} bản ghi từ {len(files)} file trong {time.perf_counter() - began:.2f}s")
+    for name, count in result["lines"].items():
+        print(f"  {name}: In {count['in']} / Out {count['out']}")
+    for name, stats in result["zones"].items():
+        print(f"  {name}: {stats['visits']} lượt, lưu lại TB {stats['avg_dwell']}s, tối đa {stats['max_dwell']}s")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=4, ensure_ascii=False)
+
+
+if __name__ == "__main__":
+    main()
@@ -3,11 +3,26 @@ import json
 import os
 
         
-def save_roi(camera_name, roi_lines, folder="roi_data"):
+def _load_config(camera_name, folder="roi_data"):
+    path = os.path.join(folder, f"{camera_name}.json")
+    if os.path.exists(path):
+        with open(path, "r") as f:
+            return json.load(f)
+    return {}
+
+
+def _save_config(camera_name, data, folder="roi_data"):
     os.makedirs(folder, exist_ok=True)
     path = os.path.join(folder, f"{camera_name}.json")
     with open(path, "w") as f:
-        json.dump({"lines": roi_lines}, f, indent=4)
+        json.dump(data, f, indent=4)
+
+
+def save_roi(camera_name, roi_lines, folder="roi_data"):
+    # Giữ lại các khóa khác của camera (ví dụ cấu hình "inference")
+    data = _load_config(camera_name, folder)
+    data["lines"] = roi_lines
+    _save_config(camera_name, data, folder)
 
 
 def load_roi(camera_name, folder="roi_data"):
@@ -17,3 +32,26 @@ def load_roi(camera_name, folder="roi_data"):
             data = json.load(f)
             return data.get("lines", [])
     return []
+
+
+def save_zones(camera_name, zones, folder="roi_data"):
+    # Mỗi vùng là một dict {"name": ..., "points": [[x, y], ...]} theo tọa độ frame 640x480
+    data = _load_config(camera_name, folder)
+    data["zones"] = zones
+    _save_config(camera_name, data, folder)
+
+
+def load_zones(camera_name, folder="roi_data"):
+    """Các vùng đa giác của camera, [] nếu chưa có."""
+    return _load_config(camera_name, folder).get("zones", [])
+
+
+def load_inference_config(camera_name, folder="roi_data"):
+    """Cấu hình mô hình/imgsz/backend đã tinh chỉnh cho camera, {} nếu chưa có."""
+    return _load_config(camera_name, folder).get("inference", {})
+
+
+def save_inference_config(camera_name, config, folder="roi_data"):
+    data = _load_config(camera_name, folder)
+    data["inference"] = config
+    _save_config(camera_name, data, folder)
@@ -0,0 +1,167 @@
+import os
+import random
+import threading
+import numpy as np
+from core.events import get_event_bus
+
+SIDECAR_EXTENSION = ".trk"
+MAGIC = b"TRK1"
+
+# Fixed 32-byte header followed by one 32-byte record per tracked detection
+HEADER = np.dtype([
+    ("magic", "S4"),
+    ("width", "<u2"),
+    ("height", "<u2"),
+    ("run_id", "<u4"),
+    ("reserved", "V12"),
+    ("start_time", "<f8"),
+])
+RECORD = np.dtype([
+    ("time", "<f8"),
+    ("track_id", "<i4"),
+    ("class_id", "<i2"),
+    ("confidence", "<f2"),
+    ("box", "<f4", (4,)),
+])
+
+
+def sidecar_path(video_path):
+    """Sidecar file that belongs to a recording segment."""
+    return os.path.splitext(video_path)[0] + SIDECAR_EXTENSION
+
+
+class SidecarWriter:
+    """
+    Append-only binary file of tracked detections.
+
+    Each analysed frame appends one fixed-size record per tracked detection
+    (wall-clock time, track id, class, confidence, box in analytics-frame
+    pixels), so the file can be memory-mapped as a NumPy structured array and
+    replayed without running the detector again (see count.recount).
+    """
+
+    def __init__(self, path, frame_shape, run_id, start_time):
+        """
+        Initialize SidecarWriter.
+
+        Args:
+            path (str): Output file.
+            frame_shape (tuple): (h, w, ...) of the analysed frames the boxes refer to.
+            run_id (int): Identifies one tracker instance; track ids are only unique within a run.
+            start_time (float): time.time() the segment started at.
+        """
+        self.path = path
+        self.rows = 0
+        header = np.zeros(1, dtype=HEADER)
+        header["magic"] = MAGIC
+        header["height"], header["width"] = frame_shape[:2]
+        header["run_id"] = run_id
+        header["start_time"] = start_time
+        self._file = open(path, "wb")
+        self._file.write(header.tobytes())
+
+    def write(self, timestamp, tracked_detections):
+        """
+        Append the tracked detections of one frame.
+
+        Args:
+            timestamp (float): time.time() of the frame.
+            tracked_detections (sv.Detections): Detections with tracker ids.
+        """
+        count = len(tracked_detections)
+        if count == 0:
+            return
+        rows = np.empty(count, dtype=RECORD)
+        rows["time"] = timestamp
+        rows["track_id"] = tracked_detections.tracker_id
+        rows["class_id"] = tracked_detections.class_id
+        rows["confidence"] = tracked_detections.confidence
+        rows["box"] = tracked_detections.xyxy
+        self._file.write(rows.tobytes())
+        self.rows += count
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+def open_sidecar(path):
+    """
+    Memory-map a sidecar file.
+
+    A record cut short by a crash at the end of the file is ignored.
+
+    Args:
+        path (str): Sidecar file.
+
+    Returns:
+        tuple: (header as np.void with HEADER fields, np.memmap of RECORD rows)
+    """
+    header = np.fromfile(path, dtype=HEADER, count=1)
+    if len(header) == 0 or header[0]["magic"] != MAGIC:
+        raise ValueError(f"Not a detection sidecar: {path}")
+    count = (os.path.getsize(path) - HEADER.itemsize) // RECORD.itemsize
+    if count == 0:
+        return header[0], np.zeros(0, dtype=RECORD)
+    return header[0], np.memmap(path, dtype=RECORD, mode="r", offset=HEADER.itemsize, shape=(count,))
+
+
+class RecordingSidecars:
+    """
+    Writes a detection sidecar next to every recording segment of a source.
+
+    Recorders publish "recording_segment" and "recording_closed" events on
+    the EventBus; the counter analysing the same source starts a new sidecar
+    for each segment and stops when recording stops. Events arrive on the
+    recorder's thread while frames are written from the analytics thread.
+    """
+
+    def __init__(self, source):
+        """
+        Initialize RecordingSidecars.
+
+        Args:
+            source: Video source whose recordings get sidecars.
+        """
+        self.run_id = random.getrandbits(32)
+        self.lock = threading.Lock()
+        self.writer = None
+        self.pending = None
+        self.event_bus = get_event_bus()
+        self.token = self.event_bus.subscribe(self._on_event, source=source,
+                                              kinds=("recording_segment", "recording_closed"))
+
+    def _on_event(self, event):
+        path = sidecar_path(event.data["path"])
+        with self.lock:
+            if event.kind == "recording_segment":
+                self._close_writer()
+                self.pending = (path, event.data["start_time"])
+            elif (self.writer is not None and self.writer.path == path) or (self.pending and self.pending[0] == path):
+                self._close_writer()
+                self.pending = None
+
+    def _close_writer(self):
+        if self.writer is not None:
+            self.writer.close()
+            self.writer = None
+
+    def write(self, frame_shape, timestamp, tracked_detections):
+        """Append a frame to the sidecar of the segment being recorded, if any."""
+        with self.lock:
+            if self.pending is not None:
+                path, start_time = self.pending
+                self.pending = None
+                try:
+                    self.writer = SidecarWriter(path, frame_shape, self.run_id, start_time)
+                except OSError as e:
+                    print(f"Cannot create sidecar {path}: {e}")
+            if self.writer is not None and tracked_detections is not None:
+                self.writer.write(timestamp, tracked_detections)
+
+    def close(self):
+        self.event_bus.unsubscribe(self.token)
+        with self.lock:
+            self._close_writer()
+            self.pending = None
@@ -1,11 +1,29 @@
-from PyQt5.QtWidgets import QWidget, QGridLayout, QLabel, QComboBox, QPushButton, QFrame
+from PyQt5.QtWidgets import QWidget, QGridLayout, QLabel, QComboBox, QPushButton, QFrame, QFileDialog
 from PyQt5.QtCore import Qt
-from count.data_manager import DataManager
+from datetime import datetime, timedelta
+from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
+from matplotlib.figure import Figure
+from count.data_manager import ROLLUPS, DataManager
+
+# Khoảng thời gian -> (bảng tổng hợp, độ dài khoảng)
+TIME_RANGES = {
+    "60 phút qua": ("minute", timedelta(hours=1)),
+    "24 giờ qua": ("hour", timedelta(days=1)),
+    "7 ngày qua": ("day", timedelta(days=7)),
+    "30 ngày qua": ("day", timedelta(days=30)),
+}
+TOTAL_RANGES = {
+    "Hôm nay": timedelta(days=0),
+    "7 ngày qua": timedelta(days=6),
+    "30 ngày qua": timedelta(days=29),
+    "Tất cả": None,
+}
+ALL_CAMERAS = "Tất cả camera"
 
 class StatisticsView(QWidget):
-    def __init__(self):
+    def __init__(self, data_manager=None):
         super().__init__()
-        self.data_manager = DataManager()
+        self.data_manager = data_manager if data_manager else DataManager()
         self.initUI()
 
     def initUI(self):
@@ -24,11 +42,12 @@ class StatisticsView(QWidget):
         realtime_layout = QGridLayout()
         realtime_frame.setLayout(realtime_layout)
         realtime_layout.addWidget(QLabel("Thống kê thời gian thực"), 0, 0, 1, 2, alignment=Qt.AlignCenter)
-        realtime_layout.addWidget(QLabel("[Biểu đồ tròn % IN]"), 1, 0)
-        realtime_layout.addWidget(QLabel("[Biểu đồ tròn % OUT]"), 1, 1)
+        self.realtime_figure, self.realtime_canvas = self.create_chart()
+        realtime_layout.addWidget(self.realtime_canvas, 1, 0, 1, 2)
         self.realtime_label = QLabel("Tổng IN: 0   Tổng OUT: 0")  # Thêm label để cập nhật
         realtime_layout.addWidget(self.realtime_label, 2, 0, 1, 2, alignment=Qt.AlignCenter)
         self.camera_combo = QComboBox()  # ComboBox chọn camera
+        self.camera_combo.currentTextChanged.connect(self.refresh)
         realtime_layout.addWidget(self.camera_combo, 3, 0, 1, 2)
         left_layout.addWidget(realtime_frame, 0, 0)
         
@@ -38,9 +57,16 @@ class StatisticsView(QWidget):
         time_series_layout = QGridLayout()
         time_series_frame.setLayout(time_series_layout)
         time_series_layout.addWidget(QLabel("Lượng người theo thời gian"), 0, 0, 1, 2, alignment=Qt.AlignCenter)
-        time_series_layout.addWidget(QLabel("[Biểu đồ cột IN/OUT]"), 1, 0, 1, 2)
-        time_series_layout.addWidget(QComboBox(), 2, 0)  # ComboBox chọn khoảng thời gian
-        time_series_layout.addWidget(QPushButton("Làm mới"), 2, 1)
+        self.time_series_figure, self.time_series_canvas = self.create_chart()
+        time_series_layout.addWidget(self.time_series_canvas, 1, 0, 1, 2)
+        self.time_range_combo = QComboBox()  # ComboBox chọn khoảng thời gian
+        self.time_range_combo.addItems(TIME_RANGES.keys())
+        self.time_range_combo.setCurrentText("24 giờ qua")
+        self.time_range_combo.currentTextChanged.connect(self.update_time_series)
+        time_series_layout.addWidget(self.time_range_combo, 2, 0)
+        refresh_button = QPushButton("Làm mới")
+        refresh_button.clicked.connect(self.update_time_series)
+        time_series_layout.addWidget(refresh_button, 2, 1)
         left_layout.addWidget(time_series_frame, 1, 0)
         
 
@@ -59,9 +85,14 @@ class StatisticsView(QWidget):
         monthly_comparison_layout = QGridLayout()
         monthly_comparison_frame.setLayout(monthly_comparison_layout)
         monthly_comparison_layout.addWidget(QLabel("So sánh theo tháng"), 0, 0, 1, 2, alignment=Qt.AlignCenter)
-        monthly_comparison_layout.addWidget(QLabel("[Biểu đồ cột so sánh IN/OUT]"), 1, 0, 1, 2)
-        monthly_comparison_layout.addWidget(QComboBox(), 2, 0)  # ComboBox chọn tháng
-        monthly_comparison_layout.addWidget(QPushButton("Xuất PNG"), 2, 1)
+        self.monthly_figure, self.monthly_canvas = self.create_chart()
+        monthly_comparison_layout.addWidget(self.monthly_canvas, 1, 0, 1, 2)
+        self.year_combo = QComboBox()  # ComboBox chọn năm
+        self.year_combo.currentTextChanged.connect(self.update_monthly_comparison)
+        monthly_comparison_layout.addWidget(self.year_combo, 2, 0)
+        export_button = QPushButton("Xuất PNG")
+        export_button.clicked.connect(self.export_monthly_png)
+        monthly_comparison_layout.addWidget(export_button, 2, 1)
         right_layout.addWidget(monthly_comparison_frame, 0, 0)
 
         # Tổng lượng người
@@ -69,9 +100,15 @@ class StatisticsView(QWidget):
         total_people_layout = QGridLayout()
         total_people_frame.setLayout(total_people_layout)
         total_people_layout.addWidget(QLabel("Tổng lượng người"), 0, 0, 1, 2, alignment=Qt.AlignCenter)
-        total_people_layout.addWidget(QLabel("Tổng IN: X   Tổng OUT: Y"), 1, 0, 1, 2, alignment=Qt.AlignCenter)
-        total_people_layout.addWidget(QComboBox(), 2, 0)  # ComboBox chọn khoảng thời gian
-        total_people_layout.addWidget(QPushButton("Cập nhật"), 2, 1)
+        self.total_label = QLabel("Tổng IN: 0   Tổng OUT: 0")
+        total_people_layout.addWidget(self.total_label, 1, 0, 1, 2, alignment=Qt.AlignCenter)
+        self.total_range_combo = QComboBox()  # ComboBox chọn khoảng thời gian
+        self.total_range_combo.addItems(TOTAL_RANGES.keys())
+        self.total_range_combo.currentTextChanged.connect(self.update_total_people)
+        total_people_layout.addWidget(self.total_range_combo, 2, 0)
+        update_button = QPushButton("Cập nhật")
+        update_button.clicked.connect(self.update_total_people)
+        total_people_layout.addWidget(update_button, 2, 1)
         right_layout.addWidget(total_people_frame, 1, 0)
 
         layout.addWidget(right_column, 0, 1)
@@ -84,15 +121,112 @@ class StatisticsView(QWidget):
         left_layout.setRowStretch(2, 2)
         right_layout.setRowStretch(0, 1)
         right_layout.setRowStretch(1, 1)
-        
+
+    def create_chart(self):
+        figure = Figure(figsize=(4, 2.5), tight_layout=True)
+        canvas = FigureCanvas(figure)
+        return figure, canvas
+
+    def selected_camera(self):
+        """Camera đang chọn, hoặc None khi xem tất cả camera."""
+        text = self.camera_combo.currentText()
+        if not text or text == ALL_CAMERAS:
+            return None
+        return int(text.replace("Camera ", ""))
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        self.reload_filters()
+        self.refresh()
+
+    def reload_filters(self):
+        """Nạp lại danh sách camera và năm có dữ liệu."""
+        current_camera = self.camera_combo.currentText()
+        self.camera_combo.blockSignals(True)
+        self.camera_combo.clear()
+        self.camera_combo.addItem(ALL_CAMERAS)
+        self.camera_combo.addItems([f"Camera {cam_id}" for cam_id in self.data_manager.camera_ids()])
+        if current_camera:
+            self.camera_combo.setCurrentText(current_camera)
+        self.camera_combo.blockSignals(False)
+
+        current_year = self.year_combo.currentText() or str(datetime.now().year)
+        years = sorted({bucket[:4] for bucket, _, _ in self.data_manager.query_rollup("month")} | {str(datetime.now().year)})
+        self.year_combo.blockSignals(True)
+        self.year_combo.clear()
+        self.year_combo.addItems(years)
+        self.year_combo.setCurrentText(current_year)
+        self.year_combo.blockSignals(False)
+
+    def refresh(self):
+        cam_id = self.selected_camera()
+        if cam_id is not None:
+            self.update_realtime_stats(cam_id)
+        else:
+            self.update_realtime_totals()
+        self.update_time_series()
+        self.update_monthly_comparison()
+        self.update_total_people()
+
+    def draw_bars(self, figure, canvas, labels, in_values, out_values):
+        figure.clear()
+        ax = figure.add_subplot(111)
+        positions = range(len(labels))
+        ax.bar([p - 0.2 for p in positions], in_values, width=0.4, label="IN", color="#4CAF50")
+        ax.bar([p + 0.2 for p in positions], out_values, width=0.4, label="OUT", color="#f44336")
+        step = max(1, len(labels) // 8)
+        ax.set_xticks(list(positions)[::step])
+        ax.set_xticklabels(labels[::step], rotation=30, fontsize=7)
+        ax.legend(fontsize=7)
+        canvas.draw_idle()
+
+    def draw_in_out_pie(self, in_count, out_count):
+        self.realtime_figure.clear()
+        ax = self.realtime_figure.add_subplot(111)
+        if in_count + out_count > 0:
+            ax.pie([in_count, out_count], labels=["IN", "OUT"], autopct="%1.0f%%", colors=["#4CAF50", "#f44336"])
+        ax.axis("equal")
+        self.realtime_canvas.draw_idle()
+
+    def update_time_series(self):
+        granularity, span = TIME_RANGES[self.time_range_combo.currentText()]
+        # Mốc bắt đầu theo định dạng bucket của bảng, so sánh chuỗi mới không bỏ sót bucket đầu tiên
+        start = (datetime.now() - span).strftime(ROLLUPS[granularity][1])
+        rows = self.data_manager.query_rollup(granularity, self.selected_camera(), start=start)
+        self.draw_bars(self.time_series_figure, self.time_series_canvas,
+                       [row[0] for row in rows], [row[1] for row in rows], [row[2] for row in rows])
+
+    def update_monthly_comparison(self):
+        year = self.year_combo.currentText()
+        if not year:
+            return
+        rows = {row[0]: row for row in self.data_manager.query_rollup(
+            "month", self.selected_camera(), start=f"{year}-01", end=f"{year}-12")}
+        months = [f"{year}-{month:02d}" for month in range(1, 13)]
+        self.draw_bars(self.monthly_figure, self.monthly_canvas, [m[5:] for m in months],
+                       [rows[m][1] if m in rows else 0 for m in months],
+                       [rows[m][2] if m in rows else 0 for m in months])
+
+    def export_monthly_png(self):
+        path, _ = QFileDialog.getSaveFileName(self, "Xuất PNG", f"so_sanh_thang_{self.year_combo.currentText()}.png", "PNG (*.png)")
+        if path:
+            self.monthly_figure.savefig(path)
+
+    def update_total_people(self):
+        span = TOTAL_RANGES[self.total_range_combo.currentText()]
+        start = (datetime.now() - span).strftime(ROLLUPS["day"][1]) if span is not None else None
+        in_count, out_count = self.data_manager.totals(self.selected_camera(), start=start)
+        self.total_label.setText(f"Tổng IN: {in_count}   Tổng OUT: {out_count}")
+
+    def update_realtime_totals(self):
+        today = datetime.now().strftime(ROLLUPS["day"][1])
+        in_count, out_count = self.data_manager.totals(start=today)
+        self.realtime_label.setText(f"Tổng IN: {in_count}   Tổng OUT: {out_count}")
+        self.draw_in_out_pie(in_count, out_count)
+
     def update_realtime_stats(self, cam_id):
-        cursor = self.data_manager.conn.cursor()
-        cursor.execute('''
-            SELECT in_count, out_count, total_count FROM stats
-            WHERE camera_id = ?
-            ORDER BY timestamp DESC LIMIT 1
-        ''', (cam_id,))
-        stats = cursor.fetchone()
+        stats = self.data_manager.latest_stats(cam_id)
         if stats:
             in_count, out_count, total_count = stats
-            self.realtime_label.setText(f"Tổng IN: {in_count}   Tổng OUT: {out_count}")
\ No newline at end of file
+            self.realtime_label.setText(f"Tổng IN: {in_count}   Tổng OUT: {out_count}")
+            self.draw_in_out_pie(in_count, out_count)
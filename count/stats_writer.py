@@ -0,0 +1,149 @@
+import glob
+import json
+import os
+import threading
+import time
+
+
+class StatsWriter:
+    """
+    Append-only, line-delimited JSON time series.
+
+    Every record is one compact JSON line appended to `<base>.jsonl`, so a save
+    costs O(record) instead of rewriting the whole history. Data is flushed to
+    the OS on every append and fsync'ed at most every `fsync_interval` seconds.
+    When the active file grows past `max_bytes` it is renamed to
+    `<base>.<YYYYmmdd_HHMMSS>.jsonl` and a new file is started.
+    """
+
+    def __init__(self, base_path, max_bytes=16 * 1024 * 1024, fsync_interval=5.0):
+        """
+        Initialize StatsWriter.
+
+        Args:
+            base_path (str): Path without extension, e.g. "stats_data/camera_1_stats".
+            max_bytes (int): Size at which the active file is rotated.
+            fsync_interval (float): Seconds between fsync calls.
+        """
+        self.base_path = base_path
+        self.path = base_path + ".jsonl"
+        self.max_bytes = max_bytes
+        self.fsync_interval = fsync_interval
+        self.last_fsync = time.monotonic()
+        self._lock = threading.Lock()
+        self._file = None
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def _open(self):
+        if self._file is None:
+            self._file = open(self.path, "a", encoding="utf-8")
+        return self._file
+
+    def append(self, record):
+        """
+        Append one record.
+
+        Args:
+            record (dict): JSON-serializable record.
+        """
+        line = json.dumps(record, ensure_ascii=False, separators=(",", ":")) + "\n"
+        with self._lock:
+            f = self._open()
+            f.write(line)
+            f.flush()
+            now = time.monotonic()
+            if now - self.last_fsync >= self.fsync_interval:
+                os.fsync(f.fileno())
+                self.last_fsync = now
+            if f.tell() >= self.max_bytes:
+                self._rotate()
+
+    def _rotate(self):
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._file.close()
+        self._file = None
+        suffix = time.strftime("%Y%m%d_%H%M%S", time.localtime())
+        target = f"{self.base_path}.{suffix}.jsonl"
+        index = 1
+        while os.path.exists(target):
+            target = f"{self.base_path}.{suffix}_{index:03d}.jsonl"
+            index += 1
+        os.replace(self.path, target)
+
+    def flush(self):
+        """Flush and fsync pending data."""
+        with self._lock:
+            if self._file is not None:
+                self._file.flush()
+                os.fsync(self._file.fileno())
+                self.last_fsync = time.monotonic()
+
+    def close(self):
+        """Flush, fsync and close the active file."""
+        with self._lock:
+            if self._file is not None:
+                self._file.flush()
+                os.fsync(self._file.fileno())
+                self._file.close()
+                self._file = None
+
+
+def stats_files(base_path):
+    """
+    List the files of a series in chronological order: rotated segments, then the active file.
+
+    Args:
+        base_path (str): Path without extension, as given to StatsWriter.
+
+    Returns:
+        list: File paths that exist.
+    """
+    segments = sorted(glob.glob(glob.escape(base_path) + ".*.jsonl"))
+    active = base_path + ".jsonl"
+    if os.path.exists(active):
+        segments.append(active)
+    return segments
+
+
+def read_stats(base_path, start=None, end=None):
+    """
+    Stream the records of a series back, oldest first.
+
+    A legacy `<base>.json` file (one JSON array, written before the series
+    became append-only) is read first if present. A truncated last line left
+    by a crash is skipped.
+
+    Args:
+        base_path (str): Path without extension, as given to StatsWriter.
+        start (str): Only yield records with "timestamp" >= start ("%Y-%m-%d %H:%M:%S").
+        end (str): Only yield records with "timestamp" <= end.
+
+    Yields:
+        dict: One record at a time.
+    """
+    def in_range(record):
+        timestamp = record.get("timestamp", "")
+        return (start is None or timestamp >= start) and (end is None or timestamp <= end)
+
+    legacy = base_path + ".json"
+    if os.path.exists(legacy):
+        try:
+            with open(legacy, "r", encoding="utf-8") as f:
+                for record in json.load(f):
+                    if in_range(record):
+                        yield record
+        except json.JSONDecodeError:
+            pass
+
+    for path in stats_files(base_path):
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                if in_range(record):
+                    yield record
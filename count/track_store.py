@@ -0,0 +1,127 @@
+import numpy as np
+
+
+class TrackStore:
+    """
+    Bounded per-track state stored as a structure of arrays.
+
+    Every track id gets a slot; each column is one NumPy array indexed by slot,
+    so per-frame reads and writes are vectorized. Tracks not seen for `ttl`
+    seconds are evicted and their slots reused, so memory is bounded by the
+    peak number of tracks alive at the same time rather than by every track
+    ever seen. Arrays double when full and never shrink.
+    """
+
+    def __init__(self, ttl=10.0, capacity=64, columns=None):
+        """
+        Initialize TrackStore.
+
+        Args:
+            ttl (float): Seconds a track may go unseen before it is evicted.
+            capacity (int): Initial number of slots.
+            columns (dict): {name: (dtype, fill) or (dtype, fill, width)} per-track columns;
+                new tracks start at `fill`.
+        """
+        self.ttl = ttl
+        self.specs = {name: (spec + (None,))[:3] for name, spec in (columns or {}).items()}
+        self.slots = {}
+        self.free = list(range(capacity - 1, -1, -1))
+        self.track_ids = np.full(capacity, -1, dtype=np.int64)
+        self.last_seen = np.zeros(capacity, dtype=np.float64)
+        self.columns = {name: self._column(capacity, spec) for name, spec in self.specs.items()}
+        self.evicted = 0
+        self.peak = 0
+
+    @staticmethod
+    def _column(size, spec):
+        dtype, fill, width = spec
+        return np.full(size if width is None else (size, width), fill, dtype=dtype)
+
+    def __getitem__(self, name):
+        # Arrays are replaced when the store grows; look them up again after touch()
+        return self.columns[name]
+
+    def __len__(self):
+        return len(self.slots)
+
+    def _grow(self):
+        size = len(self.track_ids)
+        self.track_ids = np.concatenate([self.track_ids, np.full(size, -1, dtype=np.int64)])
+        self.last_seen = np.concatenate([self.last_seen, np.zeros(size)])
+        for name, spec in self.specs.items():
+            self.columns[name] = np.concatenate([self.columns[name], self._column(size, spec)])
+        self.free.extend(range(2 * size - 1, size - 1, -1))
+
+    def _slot(self, track_id):
+        slot = self.slots.get(track_id)
+        if slot is None:
+            if not self.free:
+                self._grow()
+            slot = self.free.pop()
+            self.slots[track_id] = slot
+            self.track_ids[slot] = track_id
+            for name, (_, fill, _) in self.specs.items():
+                self.columns[name][slot] = fill
+        return slot
+
+    def touch(self, track_ids, timestamp):
+        """
+        Mark tracks as seen, creating slots for new ones.
+
+        Args:
+            track_ids (np.ndarray): (N,) track ids on this frame.
+            timestamp (float): Frame time in seconds (time.monotonic()).
+
+        Returns:
+            np.ndarray: (N,) slot of each track.
+        """
+        slots = np.fromiter((self._slot(int(tid)) for tid in track_ids), dtype=np.intp, count=len(track_ids))
+        self.last_seen[slots] = timestamp
+        self.peak = max(self.peak, len(self.slots))
+        return slots
+
+    def evict(self, timestamp):
+        """
+        Drop tracks unseen for longer than the TTL.
+
+        Their columns stay readable until the slots are reused by the next touch().
+
+        Args:
+            timestamp (float): Current time in seconds.
+
+        Returns:
+            tuple: (slots, track ids) of the evicted tracks.
+        """
+        if not self.slots:
+            return np.zeros(0, dtype=np.intp), np.zeros(0, dtype=np.int64)
+        stale = np.nonzero((self.track_ids >= 0) & (self.last_seen < timestamp - self.ttl))[0]
+        stale_ids = self.track_ids[stale]
+        for slot in stale:
+            del self.slots[int(self.track_ids[slot])]
+            self.track_ids[slot] = -1
+            self.free.append(int(slot))
+        self.evicted += len(stale)
+        return stale, stale_ids
+
+    def live(self):
+        """Mask of slots holding a track."""
+        return self.track_ids >= 0
+
+    def nbytes(self):
+        """Bytes held by the slot arrays (the id-to-slot dict is not included)."""
+        return self.track_ids.nbytes + self.last_seen.nbytes + sum(c.nbytes for c in self.columns.values())
+
+    def stats(self):
+        """
+        Track count and memory use.
+
+        Returns:
+            dict: {"live_tracks", "peak_tracks", "capacity", "evicted", "bytes"}
+        """
+        return {
+            "live_tracks": len(self.slots),
+            "peak_tracks": self.peak,
+            "capacity": len(self.track_ids),
+            "evicted": self.evicted,
+            "bytes": self.nbytes(),
+        }
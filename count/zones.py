@@ -0,0 +1,150 @@
+import cv2
+import numpy as np
+from count.track_store import TrackStore
+
+
+class ZoneMap:
+    """
+    Polygon zones rasterized once into a label mask.
+
+    Pixel (x, y) of the mask holds the index + 1 of the zone covering it (0 for
+    none), so finding the zone of any number of points is a single array
+    lookup. Where zones overlap, the zone listed later wins.
+    """
+
+    def __init__(self, polygons, frame_shape):
+        """
+        Initialize ZoneMap.
+
+        Args:
+            polygons (list): One [(x, y), ...] point list per zone, in frame pixels.
+            frame_shape (tuple): (h, w, ...) of the frames that will be analysed.
+        """
+        self.shape = tuple(frame_shape[:2])
+        dtype = np.uint8 if len(polygons) < 255 else np.uint16
+        self.mask = np.zeros(self.shape, dtype=dtype)
+        for idx, points in enumerate(polygons):
+            cv2.fillPoly(self.mask, [np.asarray(points, dtype=np.int32).reshape(-1, 1, 2)], idx + 1)
+
+    def lookup(self, points):
+        """
+        Zone index of every point.
+
+        Args:
+            points (np.ndarray): (N, 2) points x, y in frame pixels.
+
+        Returns:
+            np.ndarray: (N,) int32 zone indexes, -1 outside every zone.
+        """
+        points = np.asarray(points).reshape(-1, 2)
+        h, w = self.shape
+        xs = np.clip(points[:, 0].astype(np.intp), 0, w - 1)
+        ys = np.clip(points[:, 1].astype(np.intp), 0, h - 1)
+        return self.mask[ys, xs].astype(np.int32) - 1
+
+
+class ZoneAnalytics:
+    """
+    Live occupancy and dwell time of tracks in polygon zones.
+
+    Per-track state (current zone, time it entered the zone) lives in a
+    TrackStore, so a frame costs one mask lookup plus work proportional to the
+    tracks that changed zone, whatever the number of zones. A track that has
+    not been seen for `grace` seconds leaves its zone and is evicted.
+    """
+
+    def __init__(self, zone_list, grace=2.0, capacity=64):
+        """
+        Initialize ZoneAnalytics.
+
+        Args:
+            zone_list (list): Zones, each with 'name' and 'points'; entries with fewer than 3 points are skipped.
+            grace (float): Seconds a track may be missing before it leaves its zone.
+            capacity (int): Initial number of track slots, grown as needed.
+        """
+        zones = [zone for zone in zone_list if len(zone.get("points", [])) >= 3]
+        self.polygons = [[(int(x), int(y)) for x, y in zone["points"]] for zone in zones]
+        self.names = [zone.get("name", f"Zone {i + 1}") for i, zone in enumerate(zones)]
+        self.grace = grace
+        self.zone_map = None
+        self.tracks = TrackStore(ttl=grace, capacity=capacity,
+                                 columns={"zone": (np.int32, -1), "entered": (np.float64, 0.0)})
+
+        count = len(self.polygons)
+        self.visits = np.zeros(count, dtype=np.int64)
+        self.dwell_total = np.zeros(count, dtype=np.float64)
+        self.dwell_max = np.zeros(count, dtype=np.float64)
+
+    def set_frame_shape(self, frame_shape):
+        """Rasterize the zones for this frame size (only when it changes)."""
+        if self.zone_map is None or self.zone_map.shape != tuple(frame_shape[:2]):
+            self.zone_map = ZoneMap(self.polygons, frame_shape)
+
+    def _exit(self, slot, track_id, timestamp, events):
+        zone = self.tracks["zone"]
+        dwell = timestamp - self.tracks["entered"][slot]
+        self.dwell_total[zone[slot]] += dwell
+        self.dwell_max[zone[slot]] = max(self.dwell_max[zone[slot]], dwell)
+        events.append(("exit", int(track_id), int(zone[slot]), dwell))
+        zone[slot] = -1
+
+    def update(self, track_ids, points, timestamp):
+        """
+        Move tracks between zones.
+
+        Args:
+            track_ids (np.ndarray): (N,) ids of the tracks on this frame.
+            points (np.ndarray): (N, 2) anchor point of each track in frame pixels.
+            timestamp (float): Frame time in seconds (time.monotonic()).
+
+        Returns:
+            list: ("enter", track_id, zone_index, 0.0) and ("exit", track_id, zone_index, dwell_seconds) events.
+        """
+        events = []
+        if len(track_ids):
+            slots = self.tracks.touch(track_ids, timestamp)
+            zone, entered = self.tracks["zone"], self.tracks["entered"]
+            zones = self.zone_map.lookup(points)
+            changed = np.nonzero(zone[slots] != zones)[0]
+            for i in changed:
+                slot = slots[i]
+                if zone[slot] >= 0:
+                    self._exit(slot, track_ids[i], timestamp, events)
+                if zones[i] >= 0:
+                    zone[slot] = zones[i]
+                    entered[slot] = timestamp
+                    self.visits[zones[i]] += 1
+                    events.append(("enter", int(track_ids[i]), int(zones[i]), 0.0))
+
+        # Tracks that disappeared leave their zone when they were last seen
+        for slot, track_id in zip(*self.tracks.evict(timestamp)):
+            if self.tracks["zone"][slot] >= 0:
+                self._exit(slot, track_id, self.tracks.last_seen[slot], events)
+        return events
+
+    def occupancy(self):
+        """
+        Tracks currently inside each zone.
+
+        Returns:
+            np.ndarray: (Z,) counts.
+        """
+        zone = self.tracks["zone"]
+        inside = zone[self.tracks.live() & (zone >= 0)]
+        return np.bincount(inside, minlength=len(self.names))
+
+    def get_stats(self):
+        """
+        Occupancy and dwell statistics per zone.
+
+        Returns:
+            dict: {zone name: {"occupancy", "visits", "avg_dwell", "max_dwell"}}, dwell in seconds over completed visits.
+        """
+        occupancy = self.occupancy()
+        completed = self.visits - occupancy
+        return {name: {
+            "occupancy": int(occupancy[i]),
+            "visits": int(self.visits[i]),
+            "avg_dwell": round(float(self.dwell_total[i] / completed[i]), 1) if completed[i] > 0 else 0.0,
+            "max_dwell": round(float(self.dwell_max[i]), 1),
+        } for i, name in enumerate(self.names)}
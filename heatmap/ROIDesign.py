@@ -4,6 +4,7 @@ import os
 from PyQt5.QtWidgets import QWidget, QLabel, QPushButton, QVBoxLayout, QHBoxLayout, QComboBox, QMessageBox, QInputDialog
 from PyQt5.QtGui import QPixmap, QImage
 from PyQt5.QtCore import Qt, QPoint
+from core.frame_hub import get_frame_hub
 from heatmap.roi_manager import save_roi, load_roi
 
 class ROIDesign(QWidget):
@@ -16,6 +17,7 @@ class ROIDesign(QWidget):
         self.lines = []
         self.drawing = False
         self.start_point = QPoint()
+        self.subscription = None
 
         self.init_ui()
 
@@ -50,7 +52,10 @@ class ROIDesign(QWidget):
 
     def change_camera(self, camera_name):
         self.current_camera = camera_name
-        self.cap = cv2.VideoCapture(self.camera_sources[camera_name])
+        # Dùng chung luồng giải mã với các cửa sổ camera đang mở
+        if self.subscription:
+            self.subscription.close()
+        self.subscription = get_frame_hub().subscribe(self.camera_sources[camera_name], size=(640, 480))
         # Load ROI đã lưu nếu có
         self.lines = load_roi(camera_name)
         self.update_frame()
@@ -90,15 +95,15 @@ class ROIDesign(QWidget):
 
 
     def update_frame(self):
-        if not self.cap or not self.cap.isOpened():
+        if not self.subscription:
             return
 
-        ret, frame = self.cap.read()
-        if not ret:
+        shared_frame = self.subscription.latest(timeout=2.0)
+        if shared_frame is None:
             return
 
-        # Resize frame để phù hợp với UI (640x480)
-        frame = cv2.resize(frame, (640, 480))
+        # FrameHub đã resize về 640x480; sao chép trước khi vẽ
+        frame = shared_frame.image.copy()
         self.paint_lines(frame)
 
         rgb_image = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
@@ -117,3 +122,9 @@ class ROIDesign(QWidget):
     def clear_roi(self):
         self.lines = []
         self.update_frame()
+
+    def closeEvent(self, event):
+        if self.subscription:
+            self.subscription.close()
+            self.subscription = None
+        super().closeEvent(event)
@@ -1,46 +1,80 @@
 from PyQt5.QtCore import QThread, pyqtSignal
 import cv2
-from ultralytics import solutions
-import torch
-
-# Đảm bảo mô hình sử dụng GPU (device 0)
-device = torch.device('cuda:0' if torch.cuda.is_available() else 'cpu')
+import time
+from heatmap.heat import HeatmapAccumulator
+from core.inference_server import get_inference_server
+from core.frame_hub import RECONNECT_DELAY, get_frame_hub
+from core.mailbox import LatestFrameMailbox
 
 class CameraThread(QThread):
-    frame_received = pyqtSignal(int, object)  # Emitting the frame with camera ID
+    frame_ready = pyqtSignal(int)  # A new frame is waiting in display_mailbox
 
-    def __init__(self, cam_id, source, parent=None):
+    def __init__(self, cam_id, source, model_path="yolo11n.pt", decay=0.995, conf=0.2, device=None, parent=None):
         super().__init__(parent)
         self.cam_id = cam_id
         self.source = source
+        self.model_path = model_path
+        self.decay = decay
+        self.conf = conf
+        self.device = device
         self._ai_heatmap = False  # Default is AI heatmap disabled
+        self.running = True
+        self.subscription = None
+        self.display_mailbox = LatestFrameMailbox()  # Latest processed frame for the GUI
+        self.heatmap = None  # Created on first use and kept for the life of the thread
 
     def set_ai_heatmap(self, enabled):
         """Set AI heatmap state for this camera."""
         self._ai_heatmap = enabled
 
+    def frame_stats(self):
+        """Dropped-frame counters for the decode and display handoffs."""
+        return {
+            "decode": self.subscription.stats() if self.subscription else {},
+            "display": self.display_mailbox.stats(),
+        }
+
+    def gate_stats(self):
+        """Inferences saved by the heatmap's motion gate, empty until the AI heatmap is used."""
+        return self.heatmap.gate_stats() if self.heatmap is not None else {}
+
     def run(self):
-        cap = cv2.VideoCapture(self.source)
-        while True:  # Infinite loop to replay the video
-            ret, frame = cap.read()
-            if not ret:  # Check if video has finished
-                cap.set(cv2.CAP_PROP_POS_FRAMES, 0)  # Reset to the first frame to loop
-                continue  # Skip the rest of the loop and restart
+        # The hub decodes the source once for every window and replays files when they end
+        self.subscription = get_frame_hub().subscribe(self.source)
+        while self.running:
+            shared_frame = self.subscription.read(timeout=1.0)
+            if shared_frame is None:
+                if self.subscription.ended and self.running:
+                    # Source failed to open or stopped: retry after a pause instead of spinning
+                    time.sleep(RECONNECT_DELAY)
+                    self.subscription = self.subscription.resubscribe()
+                continue
+            frame = shared_frame.image  # Shared and read-only
 
             # Apply AI heatmap if enabled
             if self._ai_heatmap:
                 frame = self.apply_ai_heatmap(frame)
 
-            self.frame_received.emit(self.cam_id, frame)
+            # Only signal when the GUI has taken the previous frame; otherwise it is replaced
+            if not self.display_mailbox.put(frame):
+                self.frame_ready.emit(self.cam_id)
 
-        cap.release()
+        self.subscription.close()
+        self.display_mailbox.close()
 
-    def apply_ai_heatmap(self, frame):
-        """Apply AI heatmap to the frame."""
-        heatmap = solutions.Heatmap(model="yolo11n.pt", 
-                                    colormap=cv2.COLORMAP_PARULA,
-                                    conf = 0.2,
-                                    device = 0,
-                                    classes = [0])
-        return heatmap.process(frame).plot_im  # Return the frame with heatmap
+    def stop(self):
+        self.running = False
+        self.wait()
 
+    def apply_ai_heatmap(self, frame):
+        """Add the frame's detections to the accumulated heatmap and overlay it."""
+        if self.heatmap is None:
+            self.heatmap = HeatmapAccumulator(model_path=self.model_path,
+                                              colormap=cv2.COLORMAP_PARULA,
+                                              conf=self.conf,
+                                              decay=self.decay,
+                                              device=self.device,
+                                              classes=[0],
+                                              inference_server=get_inference_server(self.model_path),
+                                              source_id=f"heatmap-{self.cam_id}")
+        return self.heatmap.process(frame)  # Return the frame with heatmap
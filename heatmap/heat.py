@@ -1,14 +1,23 @@
 import cv2
-import json
+import os
 import time
-from ultralytics import solutions
-from ultralytics import YOLO
+import numpy as np
+import torch
+from core.detector import load_detector
+from core.model_registry import get_model_registry
+from count.line_crossing import LineCrossingEngine
+from count.track_store import TrackStore
+from count.stats_writer import StatsWriter
+from core.motion import MotionGate
 
 class ObjectCounter:
     """
     Class để đếm đối tượng qua nhiều đường line và hiển thị/lưu số liệu.
+
+    Mô hình chỉ chạy detect + track một lần mỗi frame, sau đó mọi đường line
+    được kiểm tra trên cùng quỹ đạo của các track.
     """
-    def __init__(self, model_path, classes_to_count, roi_list, save_interval=10):
+    def __init__(self, model_path, classes_to_count, roi_list, save_interval=10, device=None, track_ttl=10.0):
         """
         Khởi tạo ObjectCounter.
 
@@ -17,37 +26,45 @@ class ObjectCounter:
             classes_to_count (list): Danh sách các lớp cần đếm (ví dụ: [0] cho người).
             roi_list (list): Danh sách ROI từ file JSON, mỗi ROI có 'name', 'start', 'end'.
             save_interval (int): Khoảng thời gian (giây) giữa các lần lưu số liệu (mặc định: 10 giây).
+            device (str): Thiết bị chạy mô hình (mặc định: cuda:0 nếu có, ngược lại cpu).
         """
         self.model_path = model_path
         self.classes_to_count = classes_to_count
         self.save_interval = save_interval
         self.last_save_time = time.time()
+        self.device = device if device else ("cuda:0" if torch.cuda.is_available() else "cpu")
+
+        # Một mô hình và một tracker dùng chung cho mọi đường line
+        # Mô hình riêng: track(persist=True) giữ trạng thái tracker trên chính mô hình nên không dùng chung được
+        self.model, self.device = load_detector(model_path, device=self.device)
 
-        # Khởi tạo danh sách các bộ đếm
-        self.counters = []
+        # Khởi tạo danh sách các đường line
+        self.lines = []
         self.line_names = []
+        self.line_counts = []
         for roi in roi_list:
             if "start" in roi and "end" in roi:
-                # Chuyển đổi start và end thành định dạng [(x1, y1), (x2, y2)]
-                line_points = [
+                line_points = (
                     (int(roi['start'][0]), int(roi['start'][1])),
                     (int(roi['end'][0]), int(roi['end'][1]))
-                ]
-                counter = solutions.ObjectCounter(
-                    view=True,
-                    region=line_points,
-                    model=model_path,
-                    classes=classes_to_count
                 )
-                self.counters.append(counter)
-                self.line_names.append(roi.get('name', f"Line {len(self.counters)}"))
+                self.lines.append(line_points)
+                self.line_names.append(roi.get('name', f"Line {len(self.lines)}"))
+                self.line_counts.append({"in": 0, "out": 0})
                 print(f"Đã thêm bộ đếm cho {roi.get('name', 'Line')} với điểm: {line_points}")
             else:
                 print(f"Bỏ qua ROI không hợp lệ: {roi.get('name', 'Không có tên')}")
 
-        if not self.counters:
+        if not self.lines:
             raise ValueError("Không có đường line hợp lệ để đếm.")
 
+        # Kiểm tra mọi track với mọi đường line trong một lần tính vector hóa
+        self.crossing_engine = LineCrossingEngine(self.lines, self.line_names)
+
+        # Phía đã ghi nhận của từng track với mỗi line (0 khi box còn đè lên line); track không còn thấy sau track_ttl giây bị xóa
+        self.tracks = TrackStore(ttl=track_ttl, columns={"side": (np.int8, 0, len(self.lines))})
+        self.count_writer = None
+
     def count(self, frame):
         """
         Đếm đối tượng trên frame và hiển thị số liệu lên frame.
@@ -58,57 +75,63 @@ class ObjectCounter:
         Returns:
             tuple: (frame đã vẽ, dictionary chứa số liệu đếm).
         """
-        im0 = frame.copy()
+        results = self.model.track(frame, persist=True, classes=self.classes_to_count,
+                                   device=self.device, verbose=False)[0]
+        im0 = results.plot()
         counts = {}
 
-        # Áp dụng từng bộ đếm và hiển thị số liệu
-        for idx, counter in enumerate(self.counters):
-            results = counter(im0)
-            im0 = results.plot_im  # Frame đã vẽ line và các đối tượng
+        # Cập nhật quỹ đạo và kiểm tra từng đường line
+        boxes = results.boxes
+        now = time.monotonic()
+        if boxes is not None and boxes.id is not None:
+            track_ids = boxes.id.int().cpu().numpy()
+            slots = self.tracks.touch(track_ids, now)
+            side = self.tracks["side"]
+            crossings, side[slots] = self.crossing_engine.update(track_ids, boxes.xyxy.cpu().numpy(), side[slots])
+            for _, idx, direction in crossings:
+                self.line_counts[idx]["in" if direction > 0 else "out"] += 1
+        self.tracks.evict(now)
 
-            # Lấy số liệu in/out từ counter
-            in_count = counter.in_count
-            out_count = counter.out_count
+        # Hiển thị line và số liệu lên frame gần điểm đầu của line
+        for idx, (start, end) in enumerate(self.lines):
             line_name = self.line_names[idx]
+            in_count = self.line_counts[idx]["in"]
+            out_count = self.line_counts[idx]["out"]
             counts[line_name] = {"in": in_count, "out": out_count}
 
-            # Hiển thị số liệu lên frame gần điểm đầu của line
-            start_point = counter.region[0]  # Điểm đầu của line
+            cv2.line(im0, start, end, (255, 255, 255), 2)
             text = f"{line_name}: In {in_count} / Out {out_count}"
-            cv2.putText(im0, text, (start_point[0], start_point[1] - 10),
+            cv2.putText(im0, text, (start[0], start[1] - 10),
                         cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 255), 2)
 
         return im0, counts
 
     def save_counts(self, filename):
         """
-        Lưu số liệu đếm vào file JSON nếu đã đến thời điểm lưu.
+        Ghi nối số liệu đếm vào chuỗi JSON theo dòng nếu đã đến thời điểm lưu.
 
         Args:
-            filename (str): Đường dẫn đến file JSON để lưu.
+            filename (str): Đường dẫn chuỗi số liệu; phần mở rộng được thay bằng ".jsonl"
+                (xem count.stats_writer.StatsWriter).
         """
         current_time = time.time()
         if current_time - self.last_save_time >= self.save_interval:
             counts = {}
-            for idx, counter in enumerate(self.counters):
-                line_name = self.line_names[idx]
-                counts[line_name] = {"in": counter.in_count, "out": counter.out_count}
+            for idx, line_count in enumerate(self.line_counts):
+                counts[self.line_names[idx]] = dict(line_count)
 
             data = {
                 "timestamp": time.strftime("%Y-%m-%d %H:%M:%S", time.localtime()),
                 "counts": counts
             }
 
-            # Ghi thêm vào file JSON
-            try:
-                with open(filename, 'r') as f:
-                    existing_data = json.load(f)
-            except (FileNotFoundError, json.JSONDecodeError):
-                existing_data = []
-
-            existing_data.append(data)
-            with open(filename, 'w') as f:
-                json.dump(existing_data, f, indent=4)
+            # Chỉ ghi thêm một dòng, không ghi lại toàn bộ lịch sử
+            base_path = os.path.splitext(filename)[0]
+            if self.count_writer is None or self.count_writer.base_path != base_path:
+                if self.count_writer is not None:
+                    self.count_writer.close()
+                self.count_writer = StatsWriter(base_path)
+            self.count_writer.append(data)
 
             self.last_save_time = current_time
             print(f"Đã lưu số liệu vào {filename} tại {data['timestamp']}")
@@ -120,6 +143,143 @@ class ObjectCounter:
         Returns:
             dict: Tổng số liệu {"total": int, "in": int, "out": int}.
         """
-        total_in = sum(counter.in_count for counter in self.counters)
-        total_out = sum(counter.out_count for counter in self.counters)
-        return {"total": total_in + total_out, "in": total_in, "out": total_out}
\ No newline at end of file
+        total_in = sum(line_count["in"] for line_count in self.line_counts)
+        total_out = sum(line_count["out"] for line_count in self.line_counts)
+        return {"total": total_in + total_out, "in": total_in, "out": total_out}
+
+class HeatmapAccumulator:
+    """
+    Heatmap tích lũy theo thời gian cho một camera.
+
+    Mô hình được nạp một lần; mỗi frame chỉ thêm vị trí các đối tượng phát hiện
+    được vào lưới float32 và nhân lưới với hệ số suy giảm `decay`.
+    """
+    def __init__(self, model_path="yolo11n.pt", classes=(0,), conf=0.2, decay=0.995,
+                 colormap=cv2.COLORMAP_PARULA, alpha=0.5, device=None,
+                 inference_server=None, source_id=None, motion_threshold=0.002):
+        """
+        Khởi tạo HeatmapAccumulator.
+
+        Args:
+            model_path (str): Đường dẫn đến mô hình YOLO.
+            classes (tuple): Các lớp được đưa vào heatmap (mặc định: người).
+            conf (float): Ngưỡng độ tin cậy của phát hiện.
+            decay (float): Hệ số nhân lưới mỗi frame, 1.0 là không suy giảm.
+            colormap (int): Bảng màu OpenCV dùng để hiển thị.
+            alpha (float): Độ trong suốt khi chồng heatmap lên frame.
+            device (str): Thiết bị chạy mô hình (mặc định: cuda:0 nếu có, ngược lại cpu).
+            inference_server (InferenceServer): Mô hình dùng chung theo batch; nếu có thì không nạp mô hình riêng.
+            source_id: Khóa của camera trên inference server.
+            motion_threshold (float): Dưới ngưỡng chuyển động này thì bỏ qua phát hiện, None để luôn phát hiện.
+        """
+        self.classes = list(classes)
+        self.conf = conf
+        self.decay = decay
+        self.colormap = colormap
+        self.alpha = alpha
+        self.device = device if device else ("cuda:0" if torch.cuda.is_available() else "cpu")
+        self.inference_server = inference_server
+        self.source_id = source_id
+        self.model_path = model_path
+        # Mô hình dùng chung qua ModelRegistry, chỉ nạp khi cần tới
+        self.model = None
+        self.model_lock = None
+        self.heat = None
+        # Cảnh tĩnh thì không chạy mô hình, lưới nhiệt chỉ suy giảm
+        self.motion_gate = MotionGate(threshold=motion_threshold) if motion_threshold is not None else None
+        # Vết Gaussian mẫu, được co giãn theo kích thước từng hộp
+        kernel = cv2.getGaussianKernel(64, 16)
+        self.stamp = (kernel @ kernel.T).astype(np.float32)
+        self.stamp /= self.stamp.max()
+
+    def reset(self):
+        """Xóa toàn bộ nhiệt đã tích lũy."""
+        self.heat = None
+
+    def update(self, frame):
+        """
+        Phát hiện đối tượng trên frame và cộng vị trí của chúng vào lưới nhiệt.
+
+        Args:
+            frame (np.ndarray): Frame BGR đầu vào.
+        """
+        if self.motion_gate is not None and not self.motion_gate.should_infer(frame):
+            self.add_boxes(frame.shape, [])
+            return
+        if self.inference_server is not None:
+            results = self.inference_server.infer(self.source_id, frame)
+        else:
+            if self.model is None:
+                self.model, self.device, self.model_lock = get_model_registry().get(self.model_path, device=self.device).result()
+            with self.model_lock:
+                results = self.model(frame, classes=self.classes, conf=self.conf,
+                                     device=self.device, verbose=False)[0]
+        boxes = []
+        if results.boxes is not None:
+            data = results.boxes.data.cpu().numpy()
+            # Server trả về mọi lớp với ngưỡng thấp, lọc lại theo cấu hình của camera
+            keep = np.isin(data[:, 5], self.classes) & (data[:, 4] >= self.conf)
+            boxes = data[keep, :4]
+        self.add_boxes(frame.shape, boxes)
+
+    def gate_stats(self):
+        """Số lần phát hiện đã chạy/bỏ qua nhờ cổng chuyển động (xem MotionGate.stats)."""
+        return self.motion_gate.stats() if self.motion_gate is not None else {}
+
+    def add_boxes(self, frame_shape, boxes):
+        """
+        Cộng các hộp (x1, y1, x2, y2) vào lưới nhiệt sau khi áp dụng suy giảm.
+
+        Args:
+            frame_shape (tuple): Kích thước frame (h, w, ...).
+            boxes (iterable): Các hộp theo tọa độ pixel.
+        """
+        h, w = frame_shape[:2]
+        if self.heat is None or self.heat.shape != (h, w):
+            self.heat = np.zeros((h, w), dtype=np.float32)
+        if self.decay < 1.0:
+            self.heat *= self.decay
+
+        for x1, y1, x2, y2 in boxes:
+            x1, y1 = max(int(x1), 0), max(int(y1), 0)
+            x2, y2 = min(int(x2), w), min(int(y2), h)
+            if x2 <= x1 or y2 <= y1:
+                continue
+            self.heat[y1:y2, x1:x2] += cv2.resize(self.stamp, (x2 - x1, y2 - y1))
+
+    def render(self, frame):
+        """
+        Chồng heatmap hiện tại lên frame.
+
+        Args:
+            frame (np.ndarray): Frame BGR để vẽ.
+
+        Returns:
+            np.ndarray: Frame đã chồng heatmap.
+        """
+        if self.heat is None or self.heat.shape != frame.shape[:2]:
+            return frame
+        peak = float(self.heat.max())
+        if peak <= 0:
+            return frame
+        normalized = cv2.convertScaleAbs(self.heat, alpha=255.0 / peak)
+        colored = cv2.applyColorMap(normalized, self.colormap)
+        blended = cv2.addWeighted(frame, 1 - self.alpha, colored, self.alpha, 0)
+        # Chỉ tô màu những vùng đã có nhiệt
+        mask = normalized > 0
+        output = frame.copy()
+        output[mask] = blended[mask]
+        return output
+
+    def process(self, frame):
+        """
+        Cập nhật lưới nhiệt với frame mới và trả về frame đã chồng heatmap.
+
+        Args:
+            frame (np.ndarray): Frame BGR đầu vào.
+
+        Returns:
+            np.ndarray: Frame đã chồng heatmap.
+        """
+        self.update(frame)
+        return self.render(frame)
@@ -108,7 +108,7 @@ class MainWindow(QMainWindow):
 
     def start_camera(self, cam_id, source):
         thread = CameraThread(cam_id, source)
-        thread.frame_received.connect(self.update_camera_view)
+        thread.frame_ready.connect(self.on_frame_ready)
         thread.start()
         self.camera_threads[cam_id] = thread
 
@@ -212,6 +212,15 @@ class MainWindow(QMainWindow):
         self.current_page = 0
         self.display_cameras()
 
+    def on_frame_ready(self, cam_id):
+        """Lấy frame mới nhất của camera từ mailbox và hiển thị"""
+        thread = self.camera_threads.get(cam_id)
+        if thread is None:
+            return
+        frame = thread.display_mailbox.get_nowait()
+        if frame is not None:
+            self.update_camera_view(cam_id, frame)
+
     def update_camera_view(self, cam_id, frame):
         """Cập nhật hình ảnh video lên cửa sổ khi có frame mới"""
         if cam_id in self.camera_labels:
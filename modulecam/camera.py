@@ -16,6 +16,8 @@ from PyQt5.QtMultimedia import QMediaPlayer, QMediaContent
 from PyQt5.QtMultimediaWidgets import QVideoWidget
 from PyQt5.QtCore import QUrl
 import humanize  # pip install humanize
+import threading
+from modulecam.recording_catalog import VIDEO_EXTENSIONS, get_catalog
 import json
 from PyQt5.QtCore import QSize
 class CameraPlaceholderWidget(QWidget):
@@ -67,9 +69,17 @@ class CameraWidget(QWidget):
         self.record_button.setCheckable(True)
         self.record_button.clicked.connect(self.toggle_record)
 
+        # Ghi tự động theo sự kiện (vượt line, chuyển động, phát hiện đối tượng)
+        self.auto_button = QPushButton("Auto")
+        self.auto_button.setCheckable(True)
+        self.auto_button.clicked.connect(self.toggle_auto_record)
+
         self.snapshot_button = QPushButton("Snapshot")
         self.snapshot_button.clicked.connect(self.take_snapshot)
 
+        self.burst_button = QPushButton("Burst")
+        self.burst_button.clicked.connect(self.take_burst)
+
         self.zoom_button = QPushButton("Zoom")
         self.zoom_button.setCheckable(True)
         self.zoom_button.clicked.connect(self.toggle_zoom)
@@ -78,7 +88,9 @@ class CameraWidget(QWidget):
         control_layout.addWidget(self.status_label)
         control_layout.addWidget(self.play_button)
         control_layout.addWidget(self.record_button)
+        control_layout.addWidget(self.auto_button)
         control_layout.addWidget(self.snapshot_button)
+        control_layout.addWidget(self.burst_button)
         control_layout.addWidget(self.zoom_button)
         control_layout.addStretch()
 
@@ -98,6 +110,9 @@ class CameraWidget(QWidget):
             self.thread.frame_updated.connect(self.update_frame)
             self.thread.info_updated.connect(self.update_info)
             self.thread.start()
+            if self.camera_data.get('record_policy', {}).get('enabled'):
+                self.auto_button.setChecked(True)
+                self.toggle_auto_record()
 
     def update_frame(self, pixmap):
         self.video_label.setPixmap(pixmap)
@@ -124,9 +139,20 @@ class CameraWidget(QWidget):
             self.status_label.setText("🟢 Đang phát")
             self.thread.stop_recording()
 
+    def toggle_auto_record(self):
+        self.thread.set_auto_record(self.auto_button.isChecked())
+        if self.auto_button.isChecked():
+            self.status_label.setText("🟡 Ghi theo sự kiện")
+        elif not self.record_button.isChecked():
+            self.status_label.setText("🟢 Đang phát")
+
     def take_snapshot(self):
         self.thread.snapshot()
 
+    def take_burst(self):
+        self.thread.snapshot_burst(count=self.camera_data.get('burst_count', 10),
+                                   fps=self.camera_data.get('burst_fps', 5.0))
+
     def toggle_zoom(self):
         if self.zoom_button.isChecked():
             new_size = QSize(1080, 720)
@@ -249,6 +275,9 @@ class MainWindow(QMainWindow):
 
         main_layout.addWidget(self.sidebar)
         main_layout.addWidget(self.pages)
+
+        # Đồng bộ danh mục ghi hình với thư mục recordings/ ở nền
+        threading.Thread(target=get_catalog().reconcile, daemon=True).start()
         
         
     def save_state(self):
@@ -418,32 +447,16 @@ class MainWindow(QMainWindow):
                 col = i % 3
                 self.live_results_layout.addWidget(widget, row, col)
         else:
-            from datetime import datetime
-            base_dir = "recordings"
-            if not os.path.exists(base_dir):
-                return
-            row = 0
-            for camera_folder in os.listdir(base_dir):
-                cam_id = camera_folder.replace("camera_", "")
-                folder_path = os.path.join(base_dir, camera_folder)
-                for filename in os.listdir(folder_path):
-                    if not filename.endswith((".mp4", ".avi")):
-                        continue
-                    filepath = os.path.join(folder_path, filename)
-                    file_stat = os.stat(filepath)
-                    created_time = datetime.fromtimestamp(file_stat.st_mtime)
-                    if keyword not in filename.lower() and keyword not in cam_id.lower() and keyword not in camera_folder.lower():
-                        continue
-                    filesize = humanize.naturalsize(file_stat.st_size)
-                    created_str = created_time.strftime("%Y-%m-%d %H:%M:%S")
-                    event = filename.split('_')[0]
-                    self.result_table.insertRow(row)
-                    self.result_table.setItem(row, 0, QTableWidgetItem(cam_id))
-                    self.result_table.setItem(row, 1, QTableWidgetItem(camera_folder))
-                    self.result_table.setItem(row, 2, QTableWidgetItem(created_str))
-                    self.result_table.setItem(row, 3, QTableWidgetItem(event))
-                    self.result_table.setItem(row, 4, QTableWidgetItem(filename))
-                    row += 1
+            # Truy vấn danh mục thay vì duyệt thư mục recordings/
+            for row, record in enumerate(get_catalog().search(keyword)):
+                created_str = datetime.fromtimestamp(record["start_time"]).strftime("%Y-%m-%d %H:%M:%S")
+                event = record["filename"].split('_')[0]
+                self.result_table.insertRow(row)
+                self.result_table.setItem(row, 0, QTableWidgetItem(record["camera_id"]))
+                self.result_table.setItem(row, 1, QTableWidgetItem(f"camera_{record['camera_id']}"))
+                self.result_table.setItem(row, 2, QTableWidgetItem(created_str))
+                self.result_table.setItem(row, 3, QTableWidgetItem(event))
+                self.result_table.setItem(row, 4, QTableWidgetItem(record["filename"]))
 
     def clear_live_results(self):
         for i in reversed(range(self.live_results_layout.count())):
@@ -510,6 +523,7 @@ class MainWindow(QMainWindow):
         if confirm == QMessageBox.Yes:
             if os.path.exists(filepath):
                 os.remove(filepath)
+                get_catalog().remove(filepath)
                 self.video_table.removeRow(selected_row)
                 QMessageBox.information(self, "Thành công", "Video đã được xóa.")
             else:
@@ -527,9 +541,10 @@ class MainWindow(QMainWindow):
                 for camera_folder in os.listdir(base_dir):
                     folder_path = os.path.join(base_dir, camera_folder)
                     for filename in os.listdir(folder_path):
-                        if filename.endswith((".mp4", ".avi")):
+                        if filename.endswith(VIDEO_EXTENSIONS):
                             filepath = os.path.join(folder_path, filename)
                             os.remove(filepath)
+                get_catalog().reconcile()
                 self.load_recorded_videos()  # Cập nhật lại bảng video
                 QMessageBox.information(self, "Thành công", "Tất cả video đã được xóa.")
             else:
@@ -581,36 +596,21 @@ class MainWindow(QMainWindow):
 
 
     def load_recorded_videos(self):
-        from datetime import datetime
         self.video_table.setRowCount(0)
-        base_dir = "recordings"
-        if not os.path.exists(base_dir):
-            return
         selected_camera = self.review_camera_filter.currentText()
         start_dt = self.review_start_date.dateTime().toPyDateTime()
         end_dt = self.review_end_date.dateTime().toPyDateTime()
-        row = 0
-        for camera_folder in os.listdir(base_dir):
-            cam_id = camera_folder.replace("camera_", "")
-            if selected_camera != "Tất cả camera" and selected_camera != cam_id:
-                continue
-            folder_path = os.path.join(base_dir, camera_folder)
-            for filename in os.listdir(folder_path):
-                if not filename.endswith((".mp4", ".avi")):
-                    continue
-                filepath = os.path.join(folder_path, filename)
-                file_stat = os.stat(filepath)
-                created_time = datetime.fromtimestamp(file_stat.st_mtime)
-                if not (start_dt <= created_time <= end_dt):
-                    continue
-                filesize = humanize.naturalsize(file_stat.st_size)
-                created_str = created_time.strftime("%Y-%m-%d %H:%M:%S")
-                self.video_table.insertRow(row)
-                self.video_table.setItem(row, 0, QTableWidgetItem(filename))
-                self.video_table.setItem(row, 1, QTableWidgetItem(cam_id))
-                self.video_table.setItem(row, 2, QTableWidgetItem(created_str))
-                self.video_table.setItem(row, 3, QTableWidgetItem(filesize))
-                row += 1
+        cam_id = None if selected_camera == "Tất cả camera" else selected_camera
+        # Lọc bằng truy vấn có chỉ mục trên danh mục ghi hình
+        records = get_catalog().query(cam_id, start_dt.timestamp(), end_dt.timestamp())
+        for row, record in enumerate(records):
+            created_str = datetime.fromtimestamp(record["start_time"]).strftime("%Y-%m-%d %H:%M:%S")
+            filesize = humanize.naturalsize(record["size"] or 0)
+            self.video_table.insertRow(row)
+            self.video_table.setItem(row, 0, QTableWidgetItem(record["filename"]))
+            self.video_table.setItem(row, 1, QTableWidgetItem(record["camera_id"]))
+            self.video_table.setItem(row, 2, QTableWidgetItem(created_str))
+            self.video_table.setItem(row, 3, QTableWidgetItem(filesize))
 
     def play_selected_video(self, row, col):
         filename = self.video_table.item(row, 0).text()
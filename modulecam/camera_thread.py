@@ -7,6 +7,12 @@ from PyQt5.QtGui import QPixmap, QImage
 from PyQt5.QtWidgets import QMessageBox
 from PyQt5.QtCore import Qt
 import numpy as np
+from core.frame_hub import get_frame_hub
+from modulecam.recorder import Recorder
+from modulecam.passthrough import PassthroughRecorder, passthrough_available
+from modulecam.ring_buffer import PreEventBuffer
+from modulecam.record_policy import RecordPolicy
+from modulecam.snapshot import get_snapshot_writer
 
 class CameraThread(QThread):
     frame_updated = pyqtSignal(QPixmap)
@@ -19,34 +25,49 @@ class CameraThread(QThread):
         self.video_label_size = video_label_size
         self.video_label = video_label
         self.info_label = info_label
-        self.capture = None
+        self.subscription = None
+        self.running = True
+        self.latest_frame = None
         self.is_recording = False
-        self.recording_writer = None
+        self.recorder = None
+        # Giữ vài giây frame gần nhất (JPEG) để clip ghi có cả đoạn trước khi bấm Record
+        self.pre_event = PreEventBuffer(seconds=camera.get('pre_event_seconds', 5),
+                                        max_bytes=camera.get('pre_event_max_bytes', 32 * 1024 * 1024))
+        # (record_dir, fps, frame_size, frame trước lúc bấm ghi) của đoạn "_pre" chờ passthrough ghi được gói đầu tiên
+        self.pending_preroll = None
+        self.record_policy = None
         self.snapshot_count = 0
         self.start_time = None
         self.duration = 0
         self.bitrate = 0
-        self.video_file = None
         self.lock = threading.Lock()
 
     def run(self):
         """Bắt đầu quá trình capture video và xử lý các frame."""
-        self.capture = cv2.VideoCapture(self.camera['source'])
-        self.capture.set(cv2.CAP_PROP_FPS, 15)  # Giới hạn FPS
-        
-        if not self.capture.isOpened():
+        # Nguồn được giải mã một lần trong FrameHub, dùng chung với các module khác
+        self.subscription = get_frame_hub().subscribe(self.camera['source'], fps=15, loop=False)  # Giới hạn FPS
+
+        if not self.subscription.wait_opened(timeout=10):
             QMessageBox.warning(None, "Lỗi", f"Không thể mở camera: {self.camera['name']}")
+            self.subscription.close()
             return
 
         self.start_time = time.time()
 
-        while self.capture.isOpened():
+        while self.running and not self.subscription.ended:
+            shared_frame = self.subscription.read(timeout=1.0)
+            if shared_frame is None:
+                continue
+            frame = shared_frame.image
+            self.latest_frame = frame
+            if not self.is_recording or self.pending_preroll is not None:
+                self.pre_event.push(frame, shared_frame.timestamp)
+                self.flush_preroll()
+            record_policy = self.record_policy
+            if record_policy is not None:
+                record_policy.update(frame)
             if self.paused:
-                time.sleep(0.1)
                 continue
-            ret, frame = self.capture.read()
-            if not ret:
-                break
 
             self.process_frame(frame)
 
@@ -54,14 +75,14 @@ class CameraThread(QThread):
             self.calculate_stream_info()
 
             # Cập nhật thông tin label
-            self.info_updated.emit(f"Bitrate: {self.bitrate} kbps | Duration: {self.format_duration(self.duration)}")
+            pre_event = self.pre_event.stats()
+            self.info_updated.emit(f"Bitrate: {self.bitrate} kbps | Duration: {self.format_duration(self.duration)}"
+                                   f" | Pre-event: {pre_event['seconds']:.0f}s / {pre_event['bytes'] / 1e6:.1f} MB")
 
             # Gửi frame hiện tại để hiển thị
             self.frame_updated.emit(self.convert_frame_to_qpixmap(frame))
 
-            time.sleep(0.05)  # Dừng để tránh quá tải CPU
-            
-        self.capture.release()
+        self.subscription.close()
 
     def process_frame(self, frame):
         """Xử lý frame (chuyển đổi màu sắc, ghi nếu cần)."""
@@ -84,8 +105,9 @@ class CameraThread(QThread):
     def calculate_stream_info(self):
         """Tính toán bitrate và thời gian của stream."""
         self.duration = time.time() - self.start_time
-        frame_rate = self.capture.get(cv2.CAP_PROP_FPS)
-        frame_size = self.capture.get(cv2.CAP_PROP_FRAME_WIDTH) * self.capture.get(cv2.CAP_PROP_FRAME_HEIGHT) * 3
+        info = self.subscription.info
+        frame_rate = info["fps"]
+        frame_size = info["width"] * info["height"] * 3
         self.bitrate = (frame_rate * frame_size) / 1000  # tính bitrate (kbps)
 
     def format_duration(self, duration):
@@ -100,49 +122,119 @@ class CameraThread(QThread):
         if self.is_recording:
             return
 
-        self.is_recording = True
-
         record_dir = os.path.join("recordings", f"camera_{self.camera['id']}")
-        os.makedirs(record_dir, exist_ok=True)
-
-        timestamp = time.strftime("%Y%m%d_%H%M%S")
-        #self.video_file = os.path.join(record_dir, f"{timestamp}.mp4")
-        self.video_file = os.path.join(record_dir, f"{timestamp}.avi")
-        #fourcc = cv2.VideoWriter_fourcc(*'mp4v')
-        fourcc = cv2.VideoWriter_fourcc(*'XVID')
-        fps = self.capture.get(cv2.CAP_PROP_FPS)
-        frame_width = int(self.capture.get(cv2.CAP_PROP_FRAME_WIDTH))
-        frame_height = int(self.capture.get(cv2.CAP_PROP_FRAME_HEIGHT))
+        source = self.camera['source']
+        info = self.subscription.info
+        # Frame đến với tốc độ đã giới hạn của subscription, ghi đúng tốc độ đó
+        fps = min(info["fps"] or self.subscription.fps, self.subscription.fps)
+        frame_size = (info["width"], info["height"])
+
+        # Mặc định mã hóa lại frame đã giải mã; passthrough chỉ dùng cho luồng mạng khi được cấu hình,
+        # vì nó mở thêm một phiên kết nối tới camera
+        if self.camera.get('record_mode', 're-encode') == 'passthrough' and passthrough_available(source):
+            # Gói nén không nối được với JPEG, đoạn trước sự kiện được ghi thành file "_pre" riêng.
+            # Passthrough chỉ bắt đầu ghi từ keyframe đầu tiên, nên bộ đệm tiếp tục nhận frame tới lúc đó
+            # Lấy ngay phần trước lúc bấm ghi để nó không bị đẩy khỏi bộ đệm trong lúc chờ
+            with self.lock:
+                self.pending_preroll = (record_dir, fps, frame_size, self.pre_event.take())
+            # Chép nguyên gói nén từ camera sang MKV, không giải mã/mã hóa lại
+            self.recorder = PassthroughRecorder(self.camera['id'], source, record_dir,
+                                                extension=".mkv", segment_seconds=600)
+            self.is_recording = True
+            return
 
-        self.recording_writer = cv2.VideoWriter(self.video_file, fourcc, fps, (frame_width, frame_height))
+        # Đổ bộ đệm trước sự kiện ra đĩa trước các frame trực tiếp
+        preroll = self.pre_event.take()
+        # Mã hóa chạy trên luồng riêng, file được cắt mỗi 10 phút
+        self.recorder = Recorder(self.camera['id'], record_dir, fps, frame_size,
+                                 fourcc="XVID", extension=".avi", segment_seconds=600, preroll=preroll,
+                                 event_source=source)
+        self.is_recording = True
 
     def stop_recording(self):
         """Dừng ghi video."""
         if not self.is_recording:
             return
 
+        # Passthrough chưa ghi được gói nào: vẫn lưu đoạn trước sự kiện
+        self.flush_preroll(force=True)
         self.is_recording = False
-        if self.recording_writer:
-            self.recording_writer.release()
-        self.recording_writer = None
+        recorder, self.recorder = self.recorder, None
+        if recorder:
+            # Chờ luồng mã hóa ghi nốt hàng đợi ở nền, không chặn giao diện
+            threading.Thread(target=self.finish_recording, args=(recorder,), daemon=True).start()
+
+    def finish_recording(self, recorder):
+        """Dừng recorder rồi báo số frame bị bỏ (chỉ đủ sau khi luồng ghi kết thúc)."""
+        recorder.stop()
+        stats = recorder.stats()
+        if stats["dropped"]:
+            print(f"[Camera {self.camera['id']}] Recorder dropped {stats['dropped']} frames")
+
+    def flush_preroll(self, force=False):
+        """
+        Ghi đoạn trước sự kiện của bản ghi passthrough thành file "_pre".
+
+        Chờ tới khi passthrough ghi được gói đầu tiên và bộ đệm đã nén tới thời
+        điểm đó, để hai file nối liền nhau.
+
+        Args:
+            force (bool): Ghi ngay tất cả frame đang có (khi dừng ghi).
+        """
+        recorder = self.recorder
+        first_packet_time = getattr(recorder, "first_packet_time", None)
+        if not force:
+            latest = self.pre_event.latest()
+            if first_packet_time is None or latest is None or latest < first_packet_time:
+                return
+        with self.lock:
+            pending, self.pending_preroll = self.pending_preroll, None
+        if pending is None:
+            return
+        record_dir, fps, frame_size, preroll = pending
+        preroll = preroll + self.pre_event.take(until=first_packet_time)
+        if preroll:
+            pre_recorder = Recorder(self.camera['id'], record_dir, fps, frame_size, preroll=preroll, suffix="_pre")
+            threading.Thread(target=pre_recorder.stop, daemon=True).start()
 
     def record_frame(self, frame):
-        """Ghi lại frame hiện tại vào file."""
-        if self.recording_writer:
-            self.recording_writer.write(frame)
+        """Đưa frame hiện tại vào hàng đợi ghi (không chặn vòng capture)."""
+        recorder = self.recorder
+        if recorder and not isinstance(recorder, PassthroughRecorder):
+            recorder.write(frame)
+
+    def set_auto_record(self, enabled):
+        """Bật/tắt ghi theo sự kiện (vượt line, chuyển động, phát hiện đối tượng)."""
+        if enabled and self.record_policy is None:
+            options = self.camera.get('record_policy', {})
+            self.record_policy = RecordPolicy(
+                self,
+                triggers=options.get('triggers', ("line_crossing", "motion", "detection")),
+                post_roll=options.get('post_roll', 10.0),
+                motion_threshold=options.get('motion_threshold', 0.02),
+            )
+        elif not enabled and self.record_policy is not None:
+            record_policy, self.record_policy = self.record_policy, None
+            record_policy.close()
+
+    def recording_stats(self):
+        """Thông số ghi hình hiện tại, None nếu không ghi."""
+        recorder = self.recorder
+        return recorder.stats() if recorder else None
 
         
-    def snapshot(self):
-        if self.capture:
-            ret, frame = self.capture.read()
-            if ret:
-                snapshot_dir = "snapshots"
-                if not os.path.exists(snapshot_dir):
-                    os.makedirs(snapshot_dir)
+    def snapshot(self, fmt=None):
+        """Chụp frame mới nhất đã giải mã; nén và ghi file trên thread pool."""
+        frame = self.latest_frame
+        if frame is None:
+            return None
+        self.snapshot_count += 1
+        return get_snapshot_writer().save(frame, self.camera['id'], fmt=fmt or self.camera.get('snapshot_format'))
 
-                snapshot_filename = os.path.join(snapshot_dir, f"snapshot_{self.camera['id']}_{self.snapshot_count}.png")
-                cv2.imwrite(snapshot_filename, frame)
-                self.snapshot_count += 1
+    def snapshot_burst(self, count=10, fps=5.0, fmt=None):
+        """Chụp liên tiếp `count` ảnh với tốc độ `fps`, không ảnh hưởng luồng capture."""
+        return get_snapshot_writer().burst(lambda: self.latest_frame, self.camera['id'], count=count, fps=fps,
+                                           fmt=fmt or self.camera.get('snapshot_format'))
 
 
     def pause_stream(self, pause):
@@ -150,5 +242,9 @@ class CameraThread(QThread):
 
     def close(self):
         """Dừng thread và giải phóng tài nguyên."""
-        if self.capture:
-            self.capture.release()
+        self.running = False
+        self.set_auto_record(False)
+        self.stop_recording()
+        self.pre_event.close()
+        if self.subscription:
+            self.subscription.close()
@@ -0,0 +1,188 @@
+import os
+import threading
+import time
+from core.pipeline import StageStats
+from core.events import Event, get_event_bus
+from modulecam.recording_catalog import get_catalog
+
+try:
+    import av  # pip install av
+except ImportError:
+    av = None
+
+STREAM_PREFIXES = ("rtsp://", "rtsps://", "rtmp://", "http://", "https://")
+
+
+def passthrough_available(source):
+    """
+    Nguồn có thể ghi trực tiếp gói nén (không giải mã/mã hóa lại) hay không.
+
+    Chỉ áp dụng cho luồng mạng trực tiếp. File cục bộ được ghi lại từ frame
+    đã giải mã, để clip khớp với đoạn đang hiển thị thay vì chép lại từ đầu file.
+    """
+    if av is None or not isinstance(source, str):
+        return False
+    return source.lower().startswith(STREAM_PREFIXES)
+
+
+class PassthroughRecorder:
+    """
+    Ghi video bằng cách chép nguyên gói nén (demux/remux qua PyAV/FFmpeg).
+
+    Mở một kết nối demux riêng tới nguồn và ghi thẳng các gói H.264/H.265 vào
+    file MKV/MP4, không giải mã hay mã hóa lại, nên tốn rất ít CPU. Việc giải
+    mã cho hiển thị/phân tích vẫn do FrameHub đảm nhiệm. Vì vậy camera phải
+    cho phép thêm một phiên RTSP; chế độ này chỉ bật khi cấu hình
+    record_mode = "passthrough". File được cắt thành đoạn tại keyframe đầu
+    tiên sau `segment_seconds`.
+    """
+
+    def __init__(self, camera_id, source, record_dir, extension=".mkv", segment_seconds=600,
+                 open_timeout=10.0, read_timeout=5.0):
+        """
+        Args:
+            camera_id: Mã camera.
+            source (str): URL RTSP/HTTP (đường dẫn file cũng đọc được, được chép nhanh nhất có thể).
+            record_dir (str): Thư mục lưu video.
+            extension (str): ".mkv" hoặc ".mp4".
+            segment_seconds (float): Thời lượng tối đa một đoạn, None để không giới hạn.
+            open_timeout (float): Giây chờ mở nguồn.
+            read_timeout (float): Giây chờ mỗi lần đọc gói.
+        """
+        if av is None:
+            raise RuntimeError("PyAV chưa được cài đặt (pip install av)")
+        self.camera_id = camera_id
+        self.source = source
+        self.record_dir = record_dir
+        self.extension = extension
+        self.segment_seconds = segment_seconds
+        self.open_timeout = open_timeout
+        self.read_timeout = read_timeout
+        self.lock = threading.Lock()
+        self.running = True
+        self.written = 0
+        self.bytes = 0
+        self.segments = []
+        self.error = None
+        self.mux_stats = StageStats("mux")
+        self.output = None
+        self.out_stream = None
+        self.video_file = None
+        self.segment_start = None
+        self.segment_offset = None
+        self.segment_duration = 0.0
+        # time.monotonic() lúc gói đầu tiên được ghi (sau keyframe đầu tiên), None nếu chưa có
+        self.first_packet_time = None
+        os.makedirs(record_dir, exist_ok=True)
+        self.thread = threading.Thread(target=self.run, name=f"passthrough-{camera_id}", daemon=True)
+        self.thread.start()
+
+    def write(self, frame):
+        """Không dùng frame đã giải mã; giữ cùng giao diện với Recorder."""
+        return True
+
+    def open_input(self):
+        options = {}
+        if self.source.lower().startswith(("rtsp://", "rtsps://")):
+            options["rtsp_transport"] = "tcp"
+        return av.open(self.source, options=options, timeout=(self.open_timeout, self.read_timeout))
+
+    def run(self):
+        """Vòng lặp demux: đọc gói nén từ nguồn và ghi thẳng ra đoạn hiện tại."""
+        try:
+            container = self.open_input()
+        except Exception as e:
+            self.error = str(e)
+            print(f"[Passthrough {self.camera_id}] Không mở được nguồn: {e}")
+            return
+        try:
+            in_stream = container.streams.video[0]
+            time_base = in_stream.time_base
+            for packet in container.demux(in_stream):
+                if not self.running:
+                    break
+                if packet.dts is None or packet.size == 0:
+                    continue
+                if packet.is_keyframe and (self.output is None or self.segment_full()):
+                    self.rotate(in_stream)
+                if self.output is None:
+                    # Chưa gặp keyframe đầu tiên, bỏ qua để file bắt đầu giải mã được
+                    continue
+                with self.mux_stats.measure():
+                    if self.segment_offset is None:
+                        self.segment_offset = packet.dts
+                    packet.dts -= self.segment_offset
+                    if packet.pts is not None:
+                        packet.pts -= self.segment_offset
+                    self.segment_duration = float(packet.dts * time_base)
+                    packet.stream = self.out_stream
+                    self.output.mux(packet)
+                with self.lock:
+                    if self.first_packet_time is None:
+                        self.first_packet_time = time.monotonic()
+                    self.written += 1
+                    self.bytes += packet.size
+        except Exception as e:
+            self.error = str(e)
+            print(f"[Passthrough {self.camera_id}] Lỗi khi ghi: {e}")
+        finally:
+            self.close_segment()
+            container.close()
+
+    def segment_full(self):
+        return bool(self.segment_seconds) and self.segment_duration >= self.segment_seconds
+
+    def rotate(self, in_stream):
+        """Đóng đoạn hiện tại (nếu có) và mở file mới với cùng thông số luồng."""
+        self.close_segment()
+        timestamp = time.strftime("%Y%m%d_%H%M%S")
+        video_file = os.path.join(self.record_dir, f"{timestamp}{self.extension}")
+        index = 1
+        while os.path.exists(video_file):
+            video_file = os.path.join(self.record_dir, f"{timestamp}_{index:03d}{self.extension}")
+            index += 1
+        self.video_file = video_file
+        self.output = av.open(video_file, "w")
+        if hasattr(self.output, "add_stream_from_template"):
+            self.out_stream = self.output.add_stream_from_template(in_stream)
+        else:
+            self.out_stream = self.output.add_stream(template=in_stream)
+        self.segment_start = time.time()
+        self.segment_offset = None
+        self.segment_duration = 0.0
+        with self.lock:
+            self.segments.append(video_file)
+        get_catalog().add_recording(video_file, self.camera_id, self.segment_start, in_stream.codec_context.name)
+        # Module đếm người trên cùng nguồn ghi file phát hiện kèm theo đoạn này
+        get_event_bus().publish(Event("recording_segment", self.source,
+                                      {"path": video_file, "start_time": self.segment_start}))
+
+    def close_segment(self):
+        if self.output is None:
+            return
+        self.output.close()
+        self.output = None
+        get_catalog().finish_recording(self.video_file, time.time(), self.segment_duration)
+        get_event_bus().publish(Event("recording_closed", self.source, {"path": self.video_file}))
+
+    def stop(self, timeout=None):
+        """Dừng demux, đóng đoạn đang ghi và chờ luồng kết thúc."""
+        self.running = False
+        self.thread.join(timeout)
+
+    def stats(self):
+        """
+        Lấy thông số ghi hình.
+
+        Returns:
+            dict: {"written", "dropped", "bytes", "segments", "error", "mux"}
+        """
+        with self.lock:
+            return {
+                "written": self.written,
+                "dropped": 0,
+                "bytes": self.bytes,
+                "segments": len(self.segments),
+                "error": self.error,
+                "mux": self.mux_stats.snapshot(),
+            }
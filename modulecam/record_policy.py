@@ -0,0 +1,92 @@
+import threading
+import time
+from core.events import Event, get_event_bus
+from core.motion import MotionDetector
+
+DEFAULT_TRIGGERS = ("line_crossing", "motion", "detection")
+
+
+class RecordPolicy:
+    """
+    Tự động bắt đầu/dừng ghi hình theo sự kiện.
+
+    Nhận sự kiện (vượt line, chuyển động, phát hiện đối tượng) từ EventBus cho
+    nguồn video của camera; mỗi sự kiện kéo dài thời hạn ghi thêm `post_roll`
+    giây. Đoạn trước sự kiện do PreEventBuffer của CameraThread cung cấp khi
+    bắt đầu ghi. Việc bắt đầu/dừng luôn diễn ra trên luồng capture qua
+    update(), callback của EventBus chỉ cập nhật thời hạn.
+    """
+
+    def __init__(self, camera_thread, triggers=DEFAULT_TRIGGERS, post_roll=10.0, motion_threshold=0.02,
+                 max_clip_seconds=600):
+        """
+        Args:
+            camera_thread (CameraThread): Camera được điều khiển ghi.
+            triggers (iterable): Loại sự kiện kích hoạt ghi.
+            post_roll (float): Số giây tiếp tục ghi sau sự kiện cuối cùng.
+            motion_threshold (float): Tỉ lệ điểm ảnh chuyển động tối thiểu để coi là có chuyển động.
+            max_clip_seconds (float): Thời lượng tối đa của một clip sự kiện.
+        """
+        self.camera_thread = camera_thread
+        self.source = camera_thread.camera['source']
+        self.triggers = frozenset(triggers)
+        self.post_roll = post_roll
+        self.motion_threshold = motion_threshold
+        self.max_clip_seconds = max_clip_seconds
+        self.motion = MotionDetector() if "motion" in self.triggers else None
+        self.lock = threading.Lock()
+        self.deadline = 0.0
+        self.last_event = None
+        self.clip_start = None
+        self.clips = 0
+        self.event_bus = get_event_bus()
+        self.token = self.event_bus.subscribe(self.on_event, source=self.source, kinds=self.triggers)
+
+    def on_event(self, event):
+        with self.lock:
+            self.deadline = max(self.deadline, event.timestamp + self.post_roll)
+            self.last_event = event
+
+    def update(self, frame):
+        """
+        Gọi trên luồng capture với mỗi frame: tính chuyển động, bắt đầu hoặc dừng ghi.
+
+        Args:
+            frame (np.ndarray): Frame hiện tại.
+        """
+        if self.motion is not None:
+            score = self.motion.update(frame)
+            if score >= self.motion_threshold:
+                self.event_bus.publish(Event("motion", self.source, {"score": score}))
+
+        now = time.monotonic()
+        with self.lock:
+            active = now < self.deadline
+        thread = self.camera_thread
+        if active and self.clip_start is None and not thread.is_recording:
+            thread.start_recording()
+            self.clip_start = now
+            self.clips += 1
+        elif self.clip_start is not None:
+            if not thread.is_recording:
+                # Người dùng đã dừng ghi thủ công
+                self.clip_start = None
+            elif not active or now - self.clip_start >= self.max_clip_seconds:
+                thread.stop_recording()
+                self.clip_start = None
+
+    def close(self):
+        """Hủy đăng ký sự kiện và dừng clip đang ghi do chính sách này bắt đầu."""
+        self.event_bus.unsubscribe(self.token)
+        if self.clip_start is not None and self.camera_thread.is_recording:
+            self.camera_thread.stop_recording()
+        self.clip_start = None
+
+    def stats(self):
+        """
+        Returns:
+            dict: {"recording", "clips", "last_event"}
+        """
+        with self.lock:
+            last_event = self.last_event.kind if self.last_event else None
+        return {"recording": self.clip_start is not None, "clips": self.clips, "last_event": last_event}
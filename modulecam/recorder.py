@@ -0,0 +1,184 @@
+import os
+import queue
+import threading
+import time
+import cv2
+from core.pipeline import StageStats
+from core.events import Event, get_event_bus
+from modulecam.recording_catalog import get_catalog
+from modulecam.ring_buffer import decode_jpeg
+
+_STOP = object()
+
+
+class Recorder:
+    """
+    Ghi video trên một luồng mã hóa riêng, nhận frame qua hàng đợi có giới hạn.
+
+    Luồng capture chỉ gọi write() (không chặn). Khi hàng đợi đầy, frame bị bỏ
+    và được đếm vào `dropped`, nên tốc độ capture không phụ thuộc vào việc có
+    đang ghi hay không. File được cắt thành từng đoạn theo thời lượng
+    (`segment_seconds`) hoặc dung lượng (`segment_bytes`); mỗi đoạn được ghi
+    nhận vào danh mục ghi hình. Các frame `preroll` (JPEG từ PreEventBuffer)
+    được ghi vào đầu đoạn đầu tiên, trước các frame trực tiếp.
+    """
+
+    def __init__(self, camera_id, record_dir, fps, frame_size, fourcc="XVID", extension=".avi",
+                 queue_size=64, segment_seconds=600, segment_bytes=None, preroll=None, suffix="", event_source=None):
+        """
+        Args:
+            camera_id: Mã camera.
+            record_dir (str): Thư mục lưu video.
+            fps (float): FPS ghi vào file.
+            frame_size (tuple): (width, height) của frame.
+            fourcc (str): Mã codec cho cv2.VideoWriter.
+            extension (str): Phần mở rộng của file.
+            queue_size (int): Số frame tối đa chờ mã hóa.
+            segment_seconds (float): Thời lượng tối đa một đoạn, None để không giới hạn.
+            segment_bytes (int): Dung lượng tối đa một đoạn, None để không giới hạn.
+            preroll (list): Các (timestamp, jpeg bytes) ghi trước frame trực tiếp.
+            suffix (str): Hậu tố thêm vào tên file, ví dụ "_pre".
+            event_source: Nguồn video để báo sự kiện mở/đóng đoạn ghi (module đếm ghi file
+                phát hiện kèm theo), None để không báo.
+        """
+        self.camera_id = camera_id
+        self.record_dir = record_dir
+        self.fps = fps
+        self.frame_size = tuple(frame_size)
+        self.fourcc = fourcc
+        self.extension = extension
+        self.segment_seconds = segment_seconds
+        self.segment_bytes = segment_bytes
+        self.preroll = preroll or []
+        self.suffix = suffix
+        self.event_source = event_source
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.lock = threading.Lock()
+        self.written = 0
+        self.dropped = 0
+        self.segments = []
+        self.encode_stats = StageStats("encode")
+        self.writer = None
+        self.video_file = None
+        self.segment_start = None
+        self.segment_frames = 0
+        os.makedirs(record_dir, exist_ok=True)
+        self.thread = threading.Thread(target=self.run, name=f"recorder-{camera_id}", daemon=True)
+        self.thread.start()
+
+    def write(self, frame):
+        """
+        Đưa một frame vào hàng đợi mã hóa, không chặn luồng gọi.
+
+        Returns:
+            bool: False nếu frame bị bỏ do hàng đợi đầy.
+        """
+        try:
+            self.queue.put_nowait(frame)
+            return True
+        except queue.Full:
+            with self.lock:
+                self.dropped += 1
+            return False
+
+    def run(self):
+        """Vòng lặp mã hóa: lấy frame từ hàng đợi, ghi và xoay vòng file."""
+        if self.preroll:
+            self.write_preroll()
+        while True:
+            frame = self.queue.get()
+            if frame is _STOP:
+                break
+            if self.writer is None or self.segment_full():
+                self.rotate()
+            with self.encode_stats.measure():
+                self.writer.write(frame)
+            self.segment_frames += 1
+            with self.lock:
+                self.written += 1
+        self.close_segment()
+
+    def write_preroll(self):
+        """Giải nén và ghi các frame của bộ đệm trước sự kiện."""
+        self.rotate(self.preroll[0][0])
+        for _, data in self.preroll:
+            frame = decode_jpeg(data)
+            if frame is None:
+                continue
+            if (frame.shape[1], frame.shape[0]) != self.frame_size:
+                frame = cv2.resize(frame, self.frame_size)
+            with self.encode_stats.measure():
+                self.writer.write(frame)
+            self.segment_frames += 1
+            with self.lock:
+                self.written += 1
+        self.preroll = []
+
+    def segment_full(self):
+        if self.segment_seconds and self.segment_frames >= self.segment_seconds * self.fps:
+            return True
+        if self.segment_bytes and self.segment_frames % 30 == 0:
+            try:
+                return os.path.getsize(self.video_file) >= self.segment_bytes
+            except OSError:
+                return False
+        return False
+
+    def rotate(self, preroll_time=None):
+        """
+        Đóng đoạn hiện tại (nếu có) và mở file mới.
+
+        Args:
+            preroll_time (float): time.monotonic() của frame đầu tiên trong bộ đệm,
+                để thời điểm bắt đầu đoạn lùi về trước lúc bấm ghi.
+        """
+        self.close_segment()
+        start = time.time()
+        if preroll_time is not None:
+            start -= max(0.0, time.monotonic() - preroll_time)
+        timestamp = time.strftime("%Y%m%d_%H%M%S", time.localtime(start))
+        video_file = os.path.join(self.record_dir, f"{timestamp}{self.suffix}{self.extension}")
+        index = 1
+        while os.path.exists(video_file):
+            video_file = os.path.join(self.record_dir, f"{timestamp}{self.suffix}_{index:03d}{self.extension}")
+            index += 1
+        self.video_file = video_file
+        self.writer = cv2.VideoWriter(video_file, cv2.VideoWriter_fourcc(*self.fourcc), self.fps, self.frame_size)
+        self.segment_start = start
+        self.segment_frames = 0
+        with self.lock:
+            self.segments.append(video_file)
+        get_catalog().add_recording(video_file, self.camera_id, self.segment_start, self.fourcc)
+        if self.event_source is not None:
+            get_event_bus().publish(Event("recording_segment", self.event_source,
+                                          {"path": video_file, "start_time": self.segment_start}))
+
+    def close_segment(self):
+        if self.writer is None:
+            return
+        self.writer.release()
+        self.writer = None
+        get_catalog().finish_recording(self.video_file, time.time(), self.segment_frames / self.fps)
+        if self.event_source is not None:
+            get_event_bus().publish(Event("recording_closed", self.event_source, {"path": self.video_file}))
+
+    def stop(self, timeout=None):
+        """Mã hóa nốt các frame còn trong hàng đợi, đóng file và dừng luồng."""
+        self.queue.put(_STOP)
+        self.thread.join(timeout)
+
+    def stats(self):
+        """
+        Lấy thông số ghi hình.
+
+        Returns:
+            dict: {"written", "dropped", "queued", "segments", "encode"}
+        """
+        with self.lock:
+            return {
+                "written": self.written,
+                "dropped": self.dropped,
+                "queued": self.queue.qsize(),
+                "segments": len(self.segments),
+                "encode": self.encode_stats.snapshot(),
+            }
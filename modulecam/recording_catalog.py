@@ -0,0 +1,206 @@
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime
+import cv2
+
+VIDEO_EXTENSIONS = (".mp4", ".avi", ".mkv")
+
+
+class RecordingCatalog:
+    """
+    Danh mục các đoạn ghi hình lưu trong SQLite.
+
+    CameraThread cập nhật danh mục khi bắt đầu/kết thúc ghi, giao diện tìm kiếm
+    và lọc theo ngày chỉ truy vấn bảng có chỉ mục thay vì duyệt thư mục
+    recordings/. reconcile() đồng bộ lại với các thay đổi bên ngoài ứng dụng.
+    """
+
+    def __init__(self, db_path="recordings/catalog.db", base_dir="recordings"):
+        self.db_path = db_path
+        self.base_dir = base_dir
+        os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        self.lock = threading.Lock()
+        # Đoạn đang được Recorder/PassthroughRecorder của tiến trình này ghi
+        self.active = set()
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.create_table()
+
+    def create_table(self):
+        with self.lock, self.conn:
+            self.conn.execute('''
+                CREATE TABLE IF NOT EXISTS recordings (
+                    path TEXT PRIMARY KEY,
+                    camera_id TEXT,
+                    filename TEXT,
+                    start_time REAL,
+                    end_time REAL,
+                    size INTEGER,
+                    codec TEXT,
+                    duration REAL,
+                    mtime REAL,
+                    status TEXT
+                )
+            ''')
+            self.conn.execute('CREATE INDEX IF NOT EXISTS idx_recordings_camera_start ON recordings(camera_id, start_time)')
+            self.conn.execute('CREATE INDEX IF NOT EXISTS idx_recordings_start ON recordings(start_time)')
+
+    def add_recording(self, path, camera_id, start_time, codec):
+        """Ghi nhận một đoạn ghi mới đang được ghi."""
+        with self.lock, self.conn:
+            self.active.add(os.path.normpath(path))
+            self.conn.execute('''
+                INSERT OR REPLACE INTO recordings (path, camera_id, filename, start_time, end_time, size, codec, duration, mtime, status)
+                VALUES (?, ?, ?, ?, NULL, 0, ?, 0, ?, 'recording')
+            ''', (os.path.normpath(path), str(camera_id), os.path.basename(path), start_time, codec, start_time))
+
+    def finish_recording(self, path, end_time, duration=None):
+        """Cập nhật thời điểm kết thúc, dung lượng và thời lượng khi dừng ghi."""
+        path = os.path.normpath(path)
+        try:
+            stat = os.stat(path)
+            size, mtime = stat.st_size, stat.st_mtime
+        except OSError:
+            size, mtime = 0, end_time
+        with self.lock, self.conn:
+            self.active.discard(path)
+            self.conn.execute('''
+                UPDATE recordings
+                SET end_time = ?, size = ?, mtime = ?, status = 'done',
+                    duration = COALESCE(?, ? - start_time)
+                WHERE path = ?
+            ''', (end_time, size, mtime, duration, end_time, path))
+
+    def remove(self, path):
+        with self.lock, self.conn:
+            self.conn.execute('DELETE FROM recordings WHERE path = ?', (os.path.normpath(path),))
+
+    def all_paths(self):
+        with self.lock:
+            return [row["path"] for row in self.conn.execute('SELECT path FROM recordings')]
+
+    def search(self, keyword=""):
+        """Tìm theo tên file hoặc mã camera, mới nhất trước."""
+        pattern = f"%{keyword.lower()}%"
+        with self.lock:
+            return self.conn.execute('''
+                SELECT * FROM recordings
+                WHERE lower(filename) LIKE ? OR camera_id LIKE ? OR ('camera_' || camera_id) LIKE ?
+                ORDER BY start_time DESC
+            ''', (pattern, pattern, pattern)).fetchall()
+
+    def query(self, camera_id=None, start_time=None, end_time=None):
+        """
+        Lọc đoạn ghi theo camera và khoảng thời gian bắt đầu (dùng chỉ mục).
+
+        Args:
+            camera_id (str): Mã camera, None là tất cả.
+            start_time (float): Epoch nhỏ nhất của thời điểm bắt đầu ghi.
+            end_time (float): Epoch lớn nhất của thời điểm bắt đầu ghi.
+
+        Returns:
+            list: Các sqlite3.Row, mới nhất trước.
+        """
+        conditions = []
+        params = []
+        if camera_id is not None:
+            conditions.append('camera_id = ?')
+            params.append(str(camera_id))
+        if start_time is not None:
+            conditions.append('start_time >= ?')
+            params.append(start_time)
+        if end_time is not None:
+            conditions.append('start_time <= ?')
+            params.append(end_time)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ''
+        with self.lock:
+            return self.conn.execute(f'SELECT * FROM recordings {where} ORDER BY start_time DESC', params).fetchall()
+
+    def probe(self, path):
+        """Đọc codec và thời lượng của một file video."""
+        capture = cv2.VideoCapture(path)
+        try:
+            if not capture.isOpened():
+                return None, 0.0
+            fourcc = int(capture.get(cv2.CAP_PROP_FOURCC))
+            codec = "".join(chr((fourcc >> 8 * i) & 0xFF) for i in range(4)).strip("\x00 ") or None
+            fps = capture.get(cv2.CAP_PROP_FPS)
+            frames = capture.get(cv2.CAP_PROP_FRAME_COUNT)
+            duration = frames / fps if fps > 0 and frames > 0 else 0.0
+            return codec, duration
+        finally:
+            capture.release()
+
+    def reconcile(self):
+        """
+        Đồng bộ danh mục với thư mục ghi hình: thêm file mới, cập nhật file đã
+        thay đổi và xóa các dòng của file không còn tồn tại. Dòng 'recording'
+        không còn recorder nào ghi (ứng dụng bị dừng đột ngột khi đang ghi)
+        được đọc lại thông tin file và chuyển sang 'done'.
+
+        Returns:
+            tuple: (số dòng thêm/cập nhật, số dòng xóa)
+        """
+        with self.lock:
+            known = {row["path"]: row for row in self.conn.execute('SELECT path, mtime, size, status FROM recordings')}
+        seen = set()
+        changed = 0
+        if os.path.isdir(self.base_dir):
+            for folder in os.scandir(self.base_dir):
+                if not folder.is_dir():
+                    continue
+                cam_id = folder.name.replace("camera_", "")
+                for entry in os.scandir(folder.path):
+                    if not entry.name.endswith(VIDEO_EXTENSIONS):
+                        continue
+                    path = os.path.normpath(entry.path)
+                    seen.add(path)
+                    with self.lock:
+                        live = path in self.active
+                    if live:
+                        continue
+                    stat = entry.stat()
+                    row = known.get(path)
+                    if (row is not None and row["status"] != 'recording' and
+                            row["mtime"] == stat.st_mtime and row["size"] == stat.st_size):
+                        continue
+                    codec, duration = self.probe(path)
+                    start_time = self.start_time_from_name(entry.name, stat.st_mtime - duration)
+                    with self.lock, self.conn:
+                        self.conn.execute('''
+                            INSERT OR REPLACE INTO recordings (path, camera_id, filename, start_time, end_time, size, codec, duration, mtime, status)
+                            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, 'done')
+                        ''', (path, cam_id, entry.name, start_time, start_time + duration,
+                              stat.st_size, codec, duration, stat.st_mtime))
+                    changed += 1
+        with self.lock, self.conn:
+            missing = [path for path in known if path not in seen and path not in self.active]
+            self.conn.executemany('DELETE FROM recordings WHERE path = ?', [(path,) for path in missing])
+        return changed, len(missing)
+
+    @staticmethod
+    def start_time_from_name(filename, fallback):
+        """Lấy thời điểm bắt đầu từ tên file dạng YYYYmmdd_HHMMSS, nếu không có thì dùng fallback."""
+        stem = os.path.splitext(filename)[0]
+        for candidate in (stem[:15], stem[-15:]):
+            try:
+                return time.mktime(datetime.strptime(candidate, "%Y%m%d_%H%M%S").timetuple())
+            except ValueError:
+                continue
+        return fallback
+
+
+_catalog = None
+_catalog_lock = threading.Lock()
+
+
+def get_catalog():
+    """Danh mục ghi hình dùng chung trong tiến trình."""
+    global _catalog
+    with _catalog_lock:
+        if _catalog is None:
+            _catalog = RecordingCatalog()
+        return _catalog
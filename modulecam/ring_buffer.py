@@ -0,0 +1,156 @@
+import collections
+import queue
+import threading
+import time
+import cv2
+import numpy as np
+
+
+class PreEventBuffer:
+    """
+    Bộ đệm vòng lưu N giây frame gần nhất dưới dạng JPEG.
+
+    Frame được nén trên một luồng riêng nên vòng capture không bị chậm lại.
+    Bộ nhớ bị giới hạn cả theo thời gian (`seconds`) lẫn dung lượng
+    (`max_bytes`); frame cũ nhất bị loại trước. Khi bắt đầu ghi (hoặc có sự
+    kiện kích hoạt), take() trả về các frame trong bộ đệm để ghi ra trước.
+    """
+
+    def __init__(self, seconds=5.0, max_bytes=32 * 1024 * 1024, quality=80, queue_size=8):
+        """
+        Args:
+            seconds (float): Số giây frame giữ lại.
+            max_bytes (int): Dung lượng JPEG tối đa giữ trong bộ nhớ.
+            quality (int): Chất lượng JPEG (0-100).
+            queue_size (int): Số frame tối đa chờ nén; vượt quá thì bỏ frame.
+        """
+        self.seconds = seconds
+        self.max_bytes = max_bytes
+        self.quality = quality
+        self.lock = threading.Lock()
+        self.frames = collections.deque()  # (timestamp, jpeg bytes)
+        self.bytes = 0
+        self.dropped = 0
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.running = True
+        self.thread = threading.Thread(target=self.run, name="pre-event-buffer", daemon=True)
+        self.thread.start()
+
+    def push(self, frame, timestamp=None):
+        """
+        Đưa một frame BGR vào bộ đệm (không chặn).
+
+        Returns:
+            bool: False nếu frame bị bỏ do luồng nén không theo kịp.
+        """
+        try:
+            self.queue.put_nowait((time.monotonic() if timestamp is None else timestamp, frame))
+            return True
+        except queue.Full:
+            with self.lock:
+                self.dropped += 1
+            return False
+
+    def run(self):
+        params = [cv2.IMWRITE_JPEG_QUALITY, self.quality]
+        while self.running:
+            try:
+                item = self.queue.get(timeout=0.5)
+            except queue.Empty:
+                continue
+            if item is None:
+                break
+            if isinstance(item, threading.Event):
+                # Mọi frame đưa vào trước mốc này đã được nén (xem drain())
+                item.set()
+                continue
+            timestamp, frame = item
+            ok, encoded = cv2.imencode(".jpg", frame, params)
+            if not ok:
+                continue
+            data = encoded.tobytes()
+            with self.lock:
+                self.frames.append((timestamp, data))
+                self.bytes += len(data)
+                self._evict(timestamp)
+
+    def _evict(self, now):
+        while self.frames and (now - self.frames[0][0] > self.seconds or self.bytes > self.max_bytes):
+            _, data = self.frames.popleft()
+            self.bytes -= len(data)
+
+    def drain(self, timeout=1.0):
+        """
+        Chờ luồng nén xử lý xong mọi frame đã push() trước lời gọi này.
+
+        Returns:
+            bool: True nếu hàng đợi đã được xử lý hết trong thời gian chờ.
+        """
+        if not self.running or not self.thread.is_alive():
+            return False
+        done = threading.Event()
+        try:
+            self.queue.put(done, timeout=timeout)
+        except queue.Full:
+            return False
+        return done.wait(timeout)
+
+    def take(self, until=None):
+        """
+        Lấy các frame trong bộ đệm (cũ nhất trước) và làm rỗng bộ đệm.
+
+        Các frame còn chờ nén được xử lý trước, để clip không hụt đoạn nối với
+        frame trực tiếp và chúng không rơi vào bộ đệm đã làm rỗng.
+
+        Args:
+            until (float): Chỉ lấy frame có timestamp <= until, None để lấy hết.
+
+        Returns:
+            list: Các (timestamp, jpeg bytes).
+        """
+        self.drain()
+        with self.lock:
+            frames = [item for item in self.frames if until is None or item[0] <= until]
+            self.frames.clear()
+            self.bytes = 0
+        return frames
+
+    def latest(self):
+        """Timestamp của frame mới nhất đã nén vào bộ đệm, None nếu rỗng."""
+        with self.lock:
+            return self.frames[-1][0] if self.frames else None
+
+    def clear(self):
+        with self.lock:
+            self.frames.clear()
+            self.bytes = 0
+
+    def stats(self):
+        """
+        Lấy thông số bộ đệm.
+
+        Returns:
+            dict: {"frames", "bytes", "max_bytes", "seconds", "dropped"}
+        """
+        with self.lock:
+            span = self.frames[-1][0] - self.frames[0][0] if len(self.frames) > 1 else 0.0
+            return {
+                "frames": len(self.frames),
+                "bytes": self.bytes,
+                "max_bytes": self.max_bytes,
+                "seconds": span,
+                "dropped": self.dropped,
+            }
+
+    def close(self):
+        self.running = False
+        try:
+            self.queue.put_nowait(None)
+        except queue.Full:
+            pass
+        self.clear()
+
+
+def decode_jpeg(data):
+    """Giải nén một frame JPEG trong bộ đệm về ảnh BGR."""
+    return cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_COLOR)
@@ -0,0 +1,144 @@
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+import cv2
+
+FORMATS = {
+    "jpg": (".jpg", lambda quality: [cv2.IMWRITE_JPEG_QUALITY, quality]),
+    "png": (".png", lambda quality: [cv2.IMWRITE_PNG_COMPRESSION, 3]),
+    "webp": (".webp", lambda quality: [cv2.IMWRITE_WEBP_QUALITY, quality]),
+}
+
+
+class SnapshotWriter:
+    """
+    Lưu ảnh chụp màn hình camera trên một thread pool nhỏ.
+
+    Ảnh được lấy từ frame đã giải mã sẵn trong bộ nhớ, nên việc chụp không đọc
+    thêm từ nguồn và không chặn giao diện trong lúc nén/ghi file. Mỗi ảnh được
+    ghi thêm một dòng vào `snapshots/index.jsonl` (camera, thời điểm, file,
+    kích thước, burst).
+    """
+
+    def __init__(self, base_dir="snapshots", max_workers=2, fmt="jpg", quality=90):
+        """
+        Args:
+            base_dir (str): Thư mục lưu ảnh.
+            max_workers (int): Số luồng nén ảnh.
+            fmt (str): "jpg", "png" hoặc "webp".
+            quality (int): Chất lượng JPEG/WebP (0-100).
+        """
+        if fmt not in FORMATS:
+            raise ValueError(f"Định dạng ảnh không hỗ trợ: {fmt}")
+        self.base_dir = base_dir
+        self.fmt = fmt
+        self.quality = quality
+        self.index_path = os.path.join(base_dir, "index.jsonl")
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="snapshot")
+        self.lock = threading.Lock()
+        os.makedirs(base_dir, exist_ok=True)
+
+    def save(self, frame, camera_id, timestamp=None, fmt=None, burst_id=None, burst_index=None):
+        """
+        Đưa một frame vào hàng đợi nén và ghi.
+
+        Args:
+            frame (np.ndarray): Ảnh BGR (không bị sửa, có thể là frame dùng chung chỉ đọc).
+            camera_id: Mã camera.
+            timestamp (float): Epoch của frame, mặc định là hiện tại.
+            fmt (str): Ghi đè định dạng mặc định.
+            burst_id (str): Mã loạt chụp nếu ảnh thuộc một burst.
+            burst_index (int): Thứ tự ảnh trong burst.
+
+        Returns:
+            Future: Kết quả là dict metadata của ảnh đã lưu.
+        """
+        timestamp = time.time() if timestamp is None else timestamp
+        return self.executor.submit(self._write, frame, camera_id, timestamp, fmt or self.fmt, burst_id, burst_index)
+
+    def _write(self, frame, camera_id, timestamp, fmt, burst_id, burst_index):
+        extension, params = FORMATS[fmt]
+        moment = datetime.fromtimestamp(timestamp)
+        name = f"snapshot_{camera_id}_{moment.strftime('%Y%m%d_%H%M%S')}_{moment.microsecond // 1000:03d}"
+        if burst_index is not None:
+            name += f"_{burst_index:03d}"
+        path = os.path.join(self.base_dir, name + extension)
+        ok, encoded = cv2.imencode(extension, frame, params(self.quality))
+        if not ok:
+            raise RuntimeError(f"Không nén được ảnh {path}")
+        with open(path, "wb") as f:
+            f.write(encoded.tobytes())
+        record = {
+            "camera_id": str(camera_id),
+            "timestamp": moment.strftime("%Y-%m-%d %H:%M:%S.%f")[:-3],
+            "path": path,
+            "format": fmt,
+            "width": int(frame.shape[1]),
+            "height": int(frame.shape[0]),
+            "bytes": len(encoded),
+        }
+        if burst_id is not None:
+            record["burst_id"] = burst_id
+            record["burst_index"] = burst_index
+        line = json.dumps(record, ensure_ascii=False, separators=(",", ":")) + "\n"
+        with self.lock:
+            with open(self.index_path, "a", encoding="utf-8") as f:
+                f.write(line)
+        return record
+
+    def burst(self, get_frame, camera_id, count=10, fps=5.0, fmt=None):
+        """
+        Chụp liên tiếp `count` ảnh với tốc độ `fps` trên một luồng riêng.
+
+        Chỉ đọc frame mới nhất qua `get_frame`, không can thiệp vào luồng capture.
+
+        Args:
+            get_frame (callable): Trả về frame BGR mới nhất hoặc None.
+            camera_id: Mã camera.
+            count (int): Số ảnh.
+            fps (float): Số ảnh mỗi giây.
+            fmt (str): Ghi đè định dạng mặc định.
+
+        Returns:
+            threading.Thread: Luồng chụp (đã bắt đầu).
+        """
+        burst_id = f"{camera_id}_{time.strftime('%Y%m%d_%H%M%S')}"
+
+        def run():
+            interval = 1.0 / fps
+            next_time = time.monotonic()
+            # Không chờ mãi nếu nguồn ngừng phát
+            deadline = next_time + 3 * count * interval + 2.0
+            last = None
+            taken = 0
+            while taken < count and time.monotonic() < deadline:
+                frame = get_frame()
+                # Bỏ qua nếu chưa có frame mới (nguồn chậm hơn tốc độ burst)
+                if frame is not None and frame is not last:
+                    self.save(frame, camera_id, fmt=fmt, burst_id=burst_id, burst_index=taken)
+                    last = frame
+                    taken += 1
+                next_time += interval
+                delay = next_time - time.monotonic()
+                if delay > 0:
+                    time.sleep(delay)
+
+        thread = threading.Thread(target=run, name=f"snapshot-burst-{camera_id}", daemon=True)
+        thread.start()
+        return thread
+
+
+_writer = None
+_writer_lock = threading.Lock()
+
+
+def get_snapshot_writer():
+    """SnapshotWriter dùng chung trong tiến trình."""
+    global _writer
+    with _writer_lock:
+        if _writer is None:
+            _writer = SnapshotWriter()
+        return _writer
@@ -0,0 +1,12 @@
+import pytest
+
+
+@pytest.fixture
+def catalog(tmp_path, monkeypatch):
+    """Recording catalog in a temporary folder, installed as the process-wide one."""
+    from modulecam import recording_catalog
+    catalog = recording_catalog.RecordingCatalog(str(tmp_path / "recordings" / "catalog.db"),
+                                                 str(tmp_path / "recordings"))
+    monkeypatch.setattr(recording_catalog, "_catalog", catalog)
+    yield catalog
+    catalog.conn.close()
@@ -0,0 +1,72 @@
+import sqlite3
+from datetime import datetime
+import pytest
+from count.data_manager import ROLLUPS, DataManager
+
+# Running totals since each counter started; camera 1 restarts at 10:30
+ROWS = [
+    (1, "2025-01-01 10:00:00", 5, 2, 7),
+    (1, "2025-01-01 10:20:00", 8, 3, 11),
+    (2, "2025-01-01 10:25:00", 4, 4, 8),
+    (1, "2025-01-01 10:30:00", 1, 0, 1),
+    (1, "2025-01-01 11:05:00", 4, 1, 5),
+    (2, "2025-01-01 11:10:00", 6, 4, 10),
+]
+
+
+@pytest.fixture
+def manager(tmp_path):
+    managers = []
+
+    def open_manager(rows=()):
+        path = str(tmp_path / "stats.db")
+        if rows:
+            # A database from before the rollup tables existed
+            conn = sqlite3.connect(path)
+            conn.execute('''CREATE TABLE stats (id INTEGER PRIMARY KEY AUTOINCREMENT, camera_id INTEGER,
+                            timestamp TEXT, in_count INTEGER, out_count INTEGER, total_count INTEGER)''')
+            conn.executemany('INSERT INTO stats (camera_id, timestamp, in_count, out_count, total_count) '
+                             'VALUES (?, ?, ?, ?, ?)', rows)
+            conn.commit()
+            conn.close()
+        managers.append(DataManager(path, flush_interval=0.05))
+        return managers[-1]
+
+    yield open_manager
+    for opened in managers:
+        opened.close()
+
+
+def test_rollups_are_rebuilt_from_existing_rows(manager):
+    data = manager(ROWS)
+    assert data.flush(timeout=5)
+    assert data.query_rollup("hour", camera_id=1) == [("2025-01-01 10:00", 9, 3), ("2025-01-01 11:00", 3, 1)]
+    assert data.query_rollup("hour", camera_id=2) == [("2025-01-01 10:00", 4, 4), ("2025-01-01 11:00", 2, 0)]
+    assert data.query_rollup("day") == [("2025-01-01", 18, 8)]
+    assert data.totals(camera_id=1, granularity="minute") == (12, 4)
+    assert data.camera_ids() == [1, 2]
+
+
+def test_start_in_bucket_format_keeps_the_first_bucket(manager):
+    data = manager(ROWS)
+    assert data.flush(timeout=5)
+    start = datetime(2025, 1, 1, 10, 15)
+    # A minute-precision start sorts after the hour and day buckets it falls in
+    assert data.query_rollup("day", start=start.strftime(ROLLUPS["minute"][1])) == []
+    assert data.query_rollup("day", start=start.strftime(ROLLUPS["day"][1])) == [("2025-01-01", 18, 8)]
+    assert [row[0] for row in data.query_rollup("hour", start=start.strftime(ROLLUPS["hour"][1]))] == [
+        "2025-01-01 10:00", "2025-01-01 11:00"]
+
+
+def test_live_rows_match_a_rebuild(manager):
+    data = manager()
+    for cam_id, _, in_count, out_count, total in ROWS:
+        data.save_stats(cam_id, in_count, out_count, total)
+    assert data.flush(timeout=5)
+    live = {cam_id: data.totals(camera_id=cam_id) for cam_id in (1, 2)}
+    assert live == {1: (12, 4), 2: (6, 4)}
+    assert data.rows_written == len(ROWS)
+
+    data.rebuild_rollups()
+    assert data.flush(timeout=5)
+    assert {cam_id: data.totals(camera_id=cam_id) for cam_id in (1, 2)} == live
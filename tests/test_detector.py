@@ -0,0 +1,31 @@
+import os
+import cv2
+import numpy as np
+import pytest
+
+pytest.importorskip("torch")
+pytest.importorskip("ultralytics")
+
+
+def test_calibration_set_without_frames_writes_nothing(tmp_path):
+    from core.detector import build_calibration_set
+    out_dir = tmp_path / "calibration"
+    with pytest.raises(ValueError, match="found 0"):
+        build_calibration_set([str(tmp_path / "snapshots"), str(tmp_path / "recordings")], str(out_dir))
+    assert not os.path.exists(out_dir / "data.yaml")
+
+
+def test_calibration_set_writes_yaml_last(tmp_path):
+    from core.detector import build_calibration_set
+    snapshots = tmp_path / "snapshots"
+    snapshots.mkdir()
+    for i in range(6):
+        cv2.imwrite(str(snapshots / f"{i}.jpg"), np.full((48, 64, 3), i * 40, dtype=np.uint8))
+    out_dir = tmp_path / "calibration"
+    with pytest.raises(ValueError):
+        build_calibration_set([str(snapshots)], str(out_dir), count=10, min_frames=8)
+    assert not os.path.exists(out_dir / "data.yaml")
+
+    yaml_path = build_calibration_set([str(snapshots)], str(out_dir), count=4, min_frames=4)
+    assert os.path.exists(yaml_path)
+    assert len(os.listdir(out_dir / "images")) == 4
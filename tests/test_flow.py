@@ -0,0 +1,52 @@
+import cv2
+import numpy as np
+from core.flow import BoxPropagator, DetectionCadence
+
+
+def cadence(detect_time, flow_time=0.002, frame_period=0.04):
+    result = DetectionCadence()
+    result.detect_time, result.flow_time, result.frame_period = detect_time, flow_time, frame_period
+    return result
+
+
+def test_cadence_detects_every_frame_with_headroom():
+    assert cadence(0.005).update(0, 0.0) == 1
+    assert cadence(0.005).update(3, 0.5) == 1
+
+
+def test_cadence_stretches_to_the_cpu_budget():
+    # (0.1 + 3 * 0.002) / 4 fits 0.7 * 0.04; 3 frames would not
+    assert cadence(0.1).update(0, 0.0) == 4
+    assert cadence(0.1).update(2, 1.0) == 4
+
+
+def test_cadence_is_capped_by_object_motion():
+    assert cadence(0.1).update(2, 20.0) == 2
+    # A crowd halves the gap objects may travel over
+    assert cadence(0.1).update(10, 10.0) == 2
+    assert cadence(1.0).update(2, 100.0) == 1
+    assert cadence(1.0).update(0, 0.0) == DetectionCadence().max_interval
+
+
+def test_cadence_ignores_the_first_detector_run():
+    result = DetectionCadence()
+    result.frame_period = 0.04
+    result.record_detect(5.0)
+    assert result.detect_time is None and result.update(0, 0.0) == 1
+
+
+def test_propagator_follows_motion_and_resets_velocity():
+    rng = np.random.default_rng(0)
+    image = cv2.GaussianBlur(rng.integers(0, 255, (240, 320), dtype=np.uint8), (5, 5), 0)
+    shifted = np.roll(image, (2, 3), axis=(0, 1))
+    boxes = np.array([[100, 80, 160, 160], [200, 40, 260, 120]], dtype=np.float32)
+
+    propagator = BoxPropagator()
+    propagator.reset(image, boxes)
+    moved = propagator.propagate(shifted, boxes)
+    assert np.allclose(moved - boxes, [3, 2, 3, 2], atol=0.5)
+    assert propagator.max_speed > 2
+
+    # Box order changes between detector runs, so velocities must not carry over
+    propagator.reset(shifted, boxes[::-1])
+    assert not propagator.velocity.any()
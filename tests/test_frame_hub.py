@@ -0,0 +1,77 @@
+import time
+import cv2
+import numpy as np
+import pytest
+from core.frame_hub import Frame, FrameHub, Subscription
+
+
+@pytest.fixture
+def clip(tmp_path):
+    """Ten 64x48 frames at 100 fps, so one pass of the file takes 0.1 s."""
+    path = str(tmp_path / "clip.avi")
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"MJPG"), 100, (64, 48))
+    for i in range(10):
+        writer.write(np.full((48, 64, 3), i * 20, dtype=np.uint8))
+    writer.release()
+    return path
+
+
+def read_for(subscription, seconds):
+    frames = 0
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline and not subscription.ended:
+        if subscription.read(timeout=0.05) is not None:
+            frames += 1
+    return frames
+
+
+def test_non_looping_subscriber_does_not_stop_looping_ones(clip):
+    hub = FrameHub()
+    once = hub.subscribe(clip, loop=False)
+    looping = hub.subscribe(clip, loop=True)
+    assert once.wait_opened(timeout=5)
+
+    read_for(once, 2.0)
+    assert once.ended
+    # The looping subscriber keeps getting frames after the file wrapped around
+    assert not looping.ended
+    assert read_for(looping, 0.5) > 0
+    once.close()
+    looping.close()
+
+
+def test_failed_source_ends_and_read_returns_immediately(tmp_path):
+    broken = tmp_path / "broken.avi"
+    broken.write_bytes(b"not a video")
+    hub = FrameHub()
+    subscription = hub.subscribe(str(broken))
+    assert not subscription.wait_opened(timeout=5)
+    deadline = time.monotonic() + 5
+    while not subscription.ended and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert subscription.ended
+    assert subscription.read(timeout=1.0) is None
+    subscription.close()
+
+
+def test_resubscribe_keeps_settings(clip):
+    hub = FrameHub()
+    first = hub.subscribe(clip, size=(32, 24), fps=10, loop=False)
+    second = first.resubscribe()
+    assert first.ended
+    assert (second.size, second.fps, second.loop) == ((32, 24), 10, False)
+    frame = second.read(timeout=2.0)
+    assert frame is not None and frame.image.shape[:2] == (24, 32)
+    second.close()
+
+
+@pytest.mark.parametrize("source_fps, fps", [(25, 15), (30, 15), (30, 10), (30, 30), (10, 15)])
+def test_fps_limit_keeps_the_requested_rate(source_fps, fps):
+    subscription = Subscription(None, "test", fps=fps)
+    rng = np.random.default_rng(0)
+    seconds = 20
+    timestamps = 1000 + np.arange(seconds * source_fps) / source_fps + rng.uniform(-0.003, 0.003, seconds * source_fps)
+    for seq, timestamp in enumerate(timestamps):
+        subscription._offer(Frame(None, seq, timestamp))
+    delivered = subscription.stats()["put"]
+    assert abs(delivered - seconds * min(source_fps, fps)) <= 2
@@ -0,0 +1,140 @@
+import numpy as np
+import pytest
+from count.line_crossing import LineCrossingEngine, box_side
+from count.recount import recount_lines
+from count.sidecar import RECORD
+
+# Horizontal line; boxes above it (smaller y) are on the "in" side
+LINE = ((100, 200), (500, 200))
+
+
+def box_at(cx, cy, w=40, h=80):
+    return [cx - w / 2, cy - h / 2, cx + w / 2, cy + h / 2]
+
+
+def replay(engine, centers, track_id=7):
+    """Feed one track through the engine frame by frame like ObjectCounter does."""
+    committed = np.zeros((1, len(engine.names)), dtype=np.int8)
+    crossings = []
+    for cx, cy in centers:
+        found, committed = engine.update(np.array([track_id]), np.array([box_at(cx, cy)]), committed)
+        crossings.extend(found)
+    return crossings
+
+
+def test_sides_match_scalar_rule():
+    rng = np.random.default_rng(0)
+    lines = [(tuple(rng.uniform(0, 640, 2)), tuple(rng.uniform(0, 480, 2))) for _ in range(5)] + [LINE]
+    corners = rng.uniform(0, 600, size=(500, 2))
+    boxes = np.hstack([corners, corners + rng.uniform(5, 120, size=(500, 2))])
+    engine = LineCrossingEngine(lines)
+
+    expected = [[box_side(box, start, end) for start, end in lines] for box in boxes.tolist()]
+    assert np.array_equal(engine.sides(boxes), np.array(expected, dtype=np.int8))
+    assert set(np.unique(expected)) == {-1, 0, 1}
+
+
+def test_jitter_on_the_line_does_not_count():
+    engine = LineCrossingEngine([LINE])
+    rng = np.random.default_rng(1)
+    # Box centred on the line, its centroid flipping sides every frame
+    centers = [(300 + rng.normal(0, 2), 200 + (3 if i % 2 else -3)) for i in range(200)]
+    assert replay(engine, centers) == []
+    assert engine.get_counts() == {"Line 1": {"in": 0, "out": 0}}
+
+
+def test_jitter_after_approach_does_not_count():
+    engine = LineCrossingEngine([LINE])
+    # Committed to the "in" side, then stands on the line jittering, then walks back
+    centers = [(300, 100), (300, 130), (300, 160)] + [(300, 200 + (5 if i % 2 else -5)) for i in range(50)] + [(300, 120)]
+    assert replay(engine, centers) == []
+
+
+def test_full_crossing_counts_once_each_way():
+    engine = LineCrossingEngine([LINE])
+    down = [(300, y) for y in range(100, 320, 10)]
+    crossings = replay(engine, down + down[::-1])
+    assert crossings == [(7, 0, -1), (7, 0, 1)]
+    assert engine.get_counts() == {"Line 1": {"in": 1, "out": 1}}
+
+
+def test_crossing_beyond_the_segment_does_not_count():
+    engine = LineCrossingEngine([LINE])
+    assert replay(engine, [(600, y) for y in range(100, 320, 10)]) == []
+
+
+def test_recount_matches_live_engine():
+    engine = LineCrossingEngine([LINE])
+    # Walk out, jitter on the line, walk back in, cross out again
+    centers = ([(300, y) for y in range(100, 320, 20)] + [(300, 200 + (4 if i % 2 else -4)) for i in range(20)]
+               + [(300, y) for y in range(300, 90, -20)] + [(300, y) for y in range(100, 320, 20)])
+    live = replay(engine, centers)
+
+    rows = np.zeros(len(centers), dtype=RECORD)
+    rows["time"] = np.arange(len(centers)) * 0.1
+    rows["track_id"] = 7
+    rows["box"] = [box_at(cx, cy) for cx, cy in centers]
+    keys = rows["track_id"].astype(np.int64)
+    roi = [{"name": "Door", "start": LINE[0], "end": LINE[1]}]
+    names, counts = recount_lines(rows, keys, roi)
+
+    assert names == ["Door"]
+    assert [d for _, _, d in live] == [-1, 1, -1]
+    assert counts.sum(axis=0).tolist() == [[1, 2]]
+
+
+# supervision's LineZone uses np.cross on 2D vectors, deprecated in NumPy 2
+@pytest.mark.filterwarnings("ignore::DeprecationWarning")
+def test_matches_supervision_line_zone():
+    sv = pytest.importorskip("supervision")
+    rng = np.random.default_rng(3)
+    line = ((100, 200), (500, 260))
+    line_zone = sv.LineZone(start=sv.Point(*line[0]), end=sv.Point(*line[1]))
+    engine = LineCrossingEngine([line])
+    track_ids = np.arange(20)
+    committed = np.zeros((20, 1), dtype=np.int8)
+    positions = rng.uniform(50, 550, size=(20, 2))
+    for _ in range(2000):
+        positions = np.clip(positions + rng.normal(0, 6, size=(20, 2)), 0, 640)
+        boxes = np.hstack([positions - (20, 40), positions + (20, 40)])
+        line_zone.trigger(sv.Detections(xyxy=boxes, tracker_id=track_ids, class_id=np.zeros(20, dtype=int)))
+        _, committed = engine.update(track_ids, boxes, committed)
+    assert line_zone.in_count + line_zone.out_count > 0
+    assert engine.get_counts()["Line 1"] == {"in": line_zone.in_count, "out": line_zone.out_count}
+
+
+def test_batch_update_matches_per_track_replay():
+    rng = np.random.default_rng(5)
+    lines = [LINE, ((300, 50), (300, 400)), ((50, 50), (550, 400))]
+    engine = LineCrossingEngine(lines, ["A", "B", "C"])
+    track_ids = np.array([3, 11, 12, 40])
+    positions = rng.uniform(100, 400, size=(4, 2))
+    committed = np.zeros((4, 3), dtype=np.int8)
+    expected_committed = np.zeros((4, 3), dtype=np.int8)
+    expected = np.zeros((3, 2), dtype=int)
+    for _ in range(500):
+        positions += rng.normal(0, 10, size=(4, 2))
+        boxes = np.hstack([positions - (15, 30), positions + (15, 30)])
+        crossings, committed = engine.update(track_ids, boxes, committed)
+        for (tid, line, direction) in crossings:
+            assert tid in track_ids.tolist() and direction in (1, -1)
+        # Same rule one track and one line at a time
+        for i, box in enumerate(boxes.tolist()):
+            for j, (start, end) in enumerate(lines):
+                side = box_side(box, start, end)
+                if side and expected_committed[i, j] and side != expected_committed[i, j]:
+                    expected[j, 0 if side > 0 else 1] += 1
+                if side:
+                    expected_committed[i, j] = side
+    assert np.array_equal(committed, expected_committed)
+    assert engine.counts.tolist() == expected.tolist() and expected.sum() > 0
+    assert engine.get_counts()["B"] == {"in": int(expected[1, 0]), "out": int(expected[1, 1])}
+
+
+def test_from_rois_skips_zones_and_empty_batches():
+    engine = LineCrossingEngine.from_rois([{"name": "Door", "start": [100, 200], "end": [500, 200]},
+                                           {"name": "Zone", "points": [[0, 0], [1, 0], [1, 1]]}])
+    assert engine.names == ["Door"]
+    committed = np.zeros((0, 1), dtype=np.int8)
+    crossings, updated = engine.update(np.zeros(0, dtype=int), np.zeros((0, 4)), committed)
+    assert crossings == [] and updated.shape == (0, 1)
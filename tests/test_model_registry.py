@@ -0,0 +1,34 @@
+import threading
+import time
+import pytest
+
+pytest.importorskip("torch")
+pytest.importorskip("ultralytics")
+
+
+def test_failed_load_is_retried():
+    from core.model_registry import ModelRegistry
+    registry = ModelRegistry()
+    attempts = []
+
+    def load(key, imgsz):
+        attempts.append(key)
+        if len(attempts) == 1:
+            raise FileNotFoundError(key[0])
+        return "model", key[2], threading.Lock()
+
+    registry._load = load
+    first = registry.get("missing.pt", backend="pytorch", device="cpu")
+    with pytest.raises(FileNotFoundError):
+        first.result(timeout=5)
+
+    second = registry.get("missing.pt", backend="pytorch", device="cpu")
+    assert second is not first
+    assert second.result(timeout=5)[0] == "model"
+    assert registry.get("missing.pt", backend="pytorch", device="cpu") is second
+    assert len(attempts) == 2
+
+    deadline = time.monotonic() + 5
+    while len(registry.stats()) != 1 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert [state["ready"] for state in registry.stats().values()] == [True]
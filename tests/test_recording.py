@@ -0,0 +1,154 @@
+import os
+import time
+import cv2
+import numpy as np
+import pytest
+from core.frame_hub import FrameHub
+
+# modulecam/__init__ imports the camera widgets
+pytest.importorskip("PyQt5")
+pytest.importorskip("humanize")
+
+
+@pytest.fixture
+def clip(tmp_path):
+    """Twenty 64x48 frames at 100 fps."""
+    path = str(tmp_path / "clip.avi")
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"MJPG"), 100, (64, 48))
+    for i in range(20):
+        writer.write(np.full((48, 64, 3), i * 10, dtype=np.uint8))
+    writer.release()
+    return path
+
+
+def count_frames(path):
+    capture = cv2.VideoCapture(path)
+    frames = 0
+    while capture.read()[0]:
+        frames += 1
+    capture.release()
+    return frames
+
+
+def test_passthrough_only_for_live_streams(clip, monkeypatch, catalog):
+    from modulecam import passthrough
+    monkeypatch.setattr(passthrough, "av", object())
+    assert passthrough.passthrough_available("rtsp://camera.local/stream1")
+    assert passthrough.passthrough_available("HTTP://camera.local/video.mjpg")
+    assert not passthrough.passthrough_available(clip)
+    assert not passthrough.passthrough_available(0)
+    monkeypatch.setattr(passthrough, "av", None)
+    assert not passthrough.passthrough_available("rtsp://camera.local/stream1")
+
+
+def test_reencode_records_file_source(clip, tmp_path, catalog):
+    from modulecam.recorder import Recorder
+    hub = FrameHub()
+    subscription = hub.subscribe(clip, loop=False)
+    assert subscription.wait_opened(timeout=5)
+    recorder = Recorder(1, str(tmp_path / "recordings" / "camera_1"), 20, (64, 48), fourcc="MJPG")
+    while not subscription.ended:
+        frame = subscription.read(timeout=0.5)
+        if frame is not None:
+            recorder.write(frame.image)
+    subscription.close()
+    recorder.stop(timeout=5)
+
+    stats = recorder.stats()
+    assert stats["dropped"] == 0 and stats["segments"] == 1
+    [row] = catalog.query(camera_id=1)
+    assert row["status"] == "done"
+    assert count_frames(row["path"]) == stats["written"] > 0
+
+
+def test_passthrough_remuxes_without_reencoding(tmp_path, catalog):
+    av = pytest.importorskip("av")
+    from modulecam.passthrough import PassthroughRecorder
+    # A local file stands in for the RTSP stream
+    source = str(tmp_path / "stream.mkv")
+    with av.open(source, "w") as output:
+        stream = output.add_stream("mpeg4", rate=25)
+        stream.width, stream.height, stream.pix_fmt = 64, 48, "yuv420p"
+        for i in range(50):
+            image = np.full((48, 64, 3), i * 5, dtype=np.uint8)
+            for packet in stream.encode(av.VideoFrame.from_ndarray(image, format="bgr24")):
+                output.mux(packet)
+        for packet in stream.encode():
+            output.mux(packet)
+
+    recorder = PassthroughRecorder(1, source, str(tmp_path / "recordings" / "camera_1"), segment_seconds=None)
+    recorder.thread.join(timeout=10)
+    stats = recorder.stats()
+    assert stats["error"] is None and stats["segments"] == 1
+    [row] = catalog.query(camera_id=1)
+    assert row["status"] == "done" and os.path.exists(row["path"])
+    with av.open(row["path"]) as recorded:
+        assert recorded.streams.video[0].codec_context.name == "mpeg4"
+        assert sum(1 for _ in recorded.demux(recorded.streams.video[0]) if _.size) == stats["written"] == 50
+
+
+def test_pre_event_take_until():
+    from modulecam.ring_buffer import PreEventBuffer
+    buffer = PreEventBuffer(seconds=60)
+    frame = np.zeros((48, 64, 3), dtype=np.uint8)
+    for timestamp in (10.0, 10.5, 11.0, 11.5):
+        buffer.push(frame, timestamp)
+    deadline = time.monotonic() + 5
+    while buffer.latest() != 11.5 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert buffer.latest() == 11.5
+
+    # Frames after the first passthrough packet are already in the remuxed file
+    assert [t for t, _ in buffer.take(until=11.0)] == [10.0, 10.5, 11.0]
+    assert buffer.latest() is None and buffer.stats()["bytes"] == 0
+    buffer.close()
+
+
+def write_clip(path, frames, fps=10):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"MJPG"), fps, (64, 48))
+    for i in range(frames):
+        writer.write(np.full((48, 64, 3), i, dtype=np.uint8))
+    writer.release()
+
+
+def test_reconcile_finalizes_orphaned_recordings(tmp_path, catalog):
+    from modulecam.recording_catalog import RecordingCatalog
+    folder = tmp_path / "recordings" / "camera_1"
+    crashed, live, deleted = (os.path.normpath(str(folder / name)) for name in
+                              ("20250101_120000.avi", "20250101_130000.avi", "20250101_140000.avi"))
+    for path in (crashed, live, deleted):
+        write_clip(path, 20)
+    for path in (crashed, deleted):
+        catalog.add_recording(path, 1, 0.0, "MJPG")
+    os.remove(deleted)
+
+    # A new process: nothing is being written any more
+    restarted = RecordingCatalog(catalog.db_path, catalog.base_dir)
+    restarted.add_recording(live, 1, 0.0, "MJPG")
+    assert restarted.reconcile() == (1, 1)
+    rows = {row["path"]: row for row in restarted.query(camera_id=1)}
+    assert set(rows) == {crashed, live}
+    assert rows[crashed]["status"] == "done"
+    assert rows[crashed]["duration"] == pytest.approx(2.0)
+    assert rows[crashed]["size"] == os.path.getsize(crashed)
+    assert rows[live]["status"] == "recording"
+
+    # Nothing changed on disk: a second pass has nothing to do
+    assert restarted.reconcile() == (0, 0)
+    restarted.finish_recording(live, time.time())
+    restarted.conn.close()
+
+
+def test_pre_event_take_includes_frames_still_being_encoded():
+    from modulecam.ring_buffer import PreEventBuffer
+    buffer = PreEventBuffer(seconds=60, queue_size=8)
+    frames = [np.full((480, 640, 3), i * 30, dtype=np.uint8) for i in range(8)]
+    for i, frame in enumerate(frames):
+        assert buffer.push(frame, 100.0 + i)
+    # No wait: some frames are still queued for JPEG encoding
+    assert [t for t, _ in buffer.take()] == [100.0 + i for i in range(8)]
+    time.sleep(0.2)
+    # Nothing from before take() leaks into the emptied ring
+    assert buffer.latest() is None
+    buffer.close()
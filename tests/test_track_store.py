@@ -0,0 +1,63 @@
+import numpy as np
+from count.track_store import TrackStore
+
+
+def make_store(**kwargs):
+    return TrackStore(ttl=2.0, capacity=2, columns={"side": (np.int8, 0, 3), "zone": (np.int32, -1)}, **kwargs)
+
+
+def test_unseen_tracks_are_evicted_after_ttl():
+    store = make_store()
+    store.touch(np.array([1, 2]), 0.0)
+    store.touch(np.array([2]), 1.5)
+
+    slots, ids = store.evict(2.5)
+    assert ids.tolist() == [1] and len(store) == 1
+    assert store.evict(3.0)[1].tolist() == []
+    assert store.evict(3.6)[1].tolist() == [2]
+    assert len(store) == 0 and not store.live().any()
+    assert store.stats()["evicted"] == 2
+
+
+def test_slots_are_reused_and_reset():
+    store = make_store()
+    slots = store.touch(np.array([1, 2]), 0.0)
+    store["zone"][slots] = [4, 5]
+    store["side"][slots] = 1
+    store.evict(5.0)
+
+    # New tracks take the freed slots and start from the fill values
+    new_slots = store.touch(np.array([3, 4]), 5.0)
+    assert sorted(new_slots.tolist()) == sorted(slots.tolist())
+    assert store["zone"][new_slots].tolist() == [-1, -1]
+    assert not store["side"][new_slots].any()
+    assert store.stats()["capacity"] == 2
+
+
+def test_grows_when_full_and_keeps_state():
+    store = make_store()
+    first = store.touch(np.array([1, 2]), 0.0)
+    store["zone"][first] = [7, 8]
+    slots = store.touch(np.array([1, 2, 3, 4, 5]), 1.0)
+    assert slots[:2].tolist() == first.tolist()
+    assert len(set(slots.tolist())) == 5
+    assert store["zone"][slots].tolist() == [7, 8, -1, -1, -1]
+    assert store["side"].shape == (len(store.track_ids), 3)
+    stats = store.stats()
+    assert stats["capacity"] == 8 and stats["peak_tracks"] == 5 and stats["live_tracks"] == 5
+
+
+def test_memory_is_bounded_by_live_tracks():
+    store = make_store()
+    for second in range(1000):
+        # Ten new track ids every second, each seen once
+        store.touch(np.arange(second * 10, second * 10 + 10), float(second))
+        store.evict(float(second))
+    assert store.stats()["capacity"] <= 64
+    assert len(store) <= 40
+
+
+def test_zero_width_column():
+    store = TrackStore(columns={"side": (np.int8, 0, 0)})
+    slots = store.touch(np.array([1]), 0.0)
+    assert store["side"][slots].shape == (1, 0)
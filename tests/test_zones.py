@@ -0,0 +1,60 @@
+import numpy as np
+from count.zones import ZoneAnalytics, ZoneMap
+
+ZONES = [
+    {"name": "Door", "points": [(0, 0), (100, 0), (100, 100), (0, 100)]},
+    {"name": "Hall", "points": [(100, 0), (300, 0), (300, 100), (100, 100)]},
+    {"name": "Broken", "points": [(0, 0), (10, 10)]},
+]
+OUTSIDE, DOOR, HALL = (50, 200), (50, 50), (200, 50)
+
+
+def make_zones():
+    zones = ZoneAnalytics(ZONES, grace=2.0)
+    zones.set_frame_shape((240, 320, 3))
+    return zones
+
+
+def step(zones, tracks, timestamp):
+    """tracks: {track id: point}"""
+    ids = np.array(list(tracks), dtype=int)
+    points = np.array(list(tracks.values()), dtype=float).reshape(-1, 2)
+    return zones.update(ids, points, timestamp)
+
+
+def test_zone_map_lookup():
+    zone_map = ZoneMap([ZONES[0]["points"], ZONES[1]["points"]], (240, 320))
+    assert zone_map.lookup([DOOR, HALL, OUTSIDE, (-5, 1000)]).tolist() == [0, 1, -1, -1]
+
+
+def test_enter_move_and_exit_with_dwell():
+    zones = make_zones()
+    assert zones.names == ["Door", "Hall"]
+    assert step(zones, {1: OUTSIDE}, 0.0) == []
+    assert step(zones, {1: DOOR}, 1.0) == [("enter", 1, 0, 0.0)]
+    assert step(zones, {1: DOOR}, 2.0) == []
+    assert step(zones, {1: HALL}, 4.0) == [("exit", 1, 0, 3.0), ("enter", 1, 1, 0.0)]
+    assert zones.occupancy().tolist() == [0, 1]
+    assert step(zones, {1: OUTSIDE}, 9.0) == [("exit", 1, 1, 5.0)]
+
+    stats = zones.get_stats()
+    assert stats["Door"] == {"occupancy": 0, "visits": 1, "avg_dwell": 3.0, "max_dwell": 3.0}
+    assert stats["Hall"] == {"occupancy": 0, "visits": 1, "avg_dwell": 5.0, "max_dwell": 5.0}
+
+
+def test_lost_track_leaves_when_last_seen():
+    zones = make_zones()
+    step(zones, {1: DOOR, 2: DOOR}, 0.0)
+    step(zones, {1: DOOR, 2: DOOR}, 1.0)
+    assert zones.occupancy().tolist() == [2, 0]
+    # Track 2 disappears; it still counts until the grace period runs out
+    assert step(zones, {1: DOOR}, 2.5) == []
+    assert zones.occupancy().tolist() == [2, 0]
+    assert step(zones, {1: DOOR}, 3.5) == [("exit", 2, 0, 1.0)]
+    assert zones.occupancy().tolist() == [1, 0]
+
+    # Nobody left on screen at all
+    assert step(zones, {}, 10.0) == [("exit", 1, 0, 3.5)]
+    stats = zones.get_stats()["Door"]
+    assert stats["visits"] == 2 and stats["avg_dwell"] == 2.2 and stats["max_dwell"] == 3.5
+    assert len(zones.tracks) == 0